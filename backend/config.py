@@ -1,3 +1,6 @@
+from datetime import time
+from typing import Optional
+
 from pydantic_settings import BaseSettings
 
 
@@ -7,6 +10,83 @@ class Settings(BaseSettings):
     algorithm: str = "HS256"
     access_token_expire_minutes: int = 60 * 24  # 24h
 
+    # In-process caches and the cross-worker invalidation bus
+    cache_ttl_seconds: float = 300
+    cache_degraded_ttl_seconds: float = 5
+    invalidation_channel: str = "kinetica_invalidation"
+    invalidation_reconnect_min_seconds: float = 1
+    invalidation_reconnect_max_seconds: float = 30
+
+    # Monthly partitions of the sessions table
+    session_partition_months_ahead: int = 3
+    partition_maintenance_interval_seconds: float = 60 * 60 * 24
+
+    # Cold-data archiving (services.archive)
+    archive_after_days: int = 365
+    archive_batch_size: int = 500
+
+    # Admission control in front of the DB pool (services.admission)
+    admission_enabled: bool = True
+    rate_limit_gym_per_second: float = 20
+    rate_limit_gym_burst: float = 60
+    rate_limit_user_per_second: float = 5
+    rate_limit_user_burst: float = 20
+    gym_max_concurrent_requests: int = 8
+
+    # Coalesce identical concurrent dashboard reads (services.singleflight)
+    singleflight_enabled: bool = True
+
+    # Working hours assumed for trainers who have not set their own
+    default_work_start: time = time(6, 0)
+    default_work_end: time = time(22, 0)
+
+    # Response compression (services.compression)
+    compression_minimum_size: int = 1024
+    compression_gzip_level: int = 6
+    compression_brotli_quality: int = 4
+
+    # Idempotency-Key handling (services.idempotency)
+    idempotency_ttl_seconds: int = 86400
+    idempotency_wait_seconds: float = 10.0
+    idempotency_purge_interval_seconds: int = 3600
+    idempotency_purge_batch_size: int = 1000
+
+    # Write-behind audit log (services.audit)
+    audit_batch_size: int = 500
+    audit_flush_interval_seconds: float = 2.0
+    # Entries held in memory while the database is slow or down; past this,
+    # new entries are dropped and counted (see /health/audit).
+    audit_queue_max_entries: int = 50000
+
+    # Churn/renewal snapshot (services.retention)
+    retention_low_sessions: int = 2
+    retention_expiry_days: int = 14
+    retention_attendance_window_days: int = 30
+    retention_list_limit: int = 50
+
+    # Expiry and session reminders (services.notifications)
+    notification_expiry_days: int = 7
+    notification_session_hours: int = 24
+    notification_sender: str = "log"  # "log", "file" or "module:attribute"
+    notification_file_path: str = "notifications.jsonl"
+    notification_batch_size: int = 200
+    notification_gym_per_minute: int = 60
+    notification_interval_seconds: float = 10
+    notification_max_attempts: int = 5
+    notification_claim_timeout_seconds: int = 300
+
+    # Member status columns (services.member_stats)
+    member_stats_repair_interval_seconds: float = 900
+
+    # Connection hold-time tracking (services.connection_hold)
+    connection_hold_warn_ms: float = 500
+
+    # Request tracing (services.tracing)
+    trace_sample_rate: float = 0.0  # share of requests recorded, 0 to 1
+    trace_buffer_size: int = 500
+    trace_file_path: Optional[str] = None  # JSON lines; unset keeps memory only
+    trace_max_statement_length: int = 500
+
     class Config:
         env_file = ".env"
 
@@ -1,33 +1,91 @@
-from contextlib import asynccontextmanager
+import asyncio
+import logging
+import time
+from contextlib import asynccontextmanager, suppress
+from typing import Annotated
 
-from fastapi import FastAPI
+from fastapi import Depends, FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from sqlalchemy import text
 
-from models.database import Base, engine
-from routers import auth, dashboard, members, packages, payments, sessions, trainers
+from models.database import User, engine
+
+# Routers are imported eagerly: FastAPI needs every route registered before
+# the app serves its first request (routing and the OpenAPI schema are built
+# from them), and their import cost is route/schema construction, which a
+# deferred import would only move onto the first request. Heavy libraries
+# used by a single handler are deferred inside services instead (passlib).
+from routers import (
+    audit,
+    auth,
+    dashboard,
+    debug,
+    gyms,
+    members,
+    packages,
+    payments,
+    sessions,
+    trainers,
+)
+from services.admission import AdmissionMiddleware, admission
+from services.audit import audit_writer
+from services.auth import require_owner
+from services.compression import CompressionMiddleware
+from services.connection_hold import hold_stats
+from services.idempotency import purge_expired_forever
+from services.invalidation import listen_forever
+from services.member_stats import repair_forever
+from services.partitions import maintain_partitions_forever
+from services.schema import check_schema_version
+from services.tracing import TRACE_HEADER, TracingMiddleware, trace_buffer
+
+logger = logging.getLogger(__name__)
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    async with engine.begin() as conn:
-        await conn.run_sync(Base.metadata.create_all)
-        await conn.execute(
-            text(
-                "ALTER TABLE members ADD COLUMN IF NOT EXISTS goals VARCHAR[] NOT NULL DEFAULT '{}'"
-            )
-        )
+    # Schema changes are applied by `alembic upgrade head` at deploy time;
+    # workers only verify the version, which is one cheap read and takes no locks.
+    started = time.perf_counter()
+    async with engine.connect() as conn:
+        revision = await check_schema_version(conn)
+    app.state.startup_seconds = time.perf_counter() - started
+    logger.info(
+        "Schema at %s; startup checks took %.1f ms",
+        revision,
+        app.state.startup_seconds * 1000,
+    )
+
+    background_tasks = [
+        asyncio.create_task(listen_forever()),
+        asyncio.create_task(maintain_partitions_forever()),
+        asyncio.create_task(purge_expired_forever()),
+        asyncio.create_task(audit_writer.run_forever()),
+        asyncio.create_task(repair_forever()),
+    ]
     yield
+    for task in background_tasks:
+        task.cancel()
+    for task in background_tasks:
+        with suppress(asyncio.CancelledError):
+            await task
+    await audit_writer.drain()
+    await trace_buffer.drain()
 
 
 app = FastAPI(title="Kinetica API", version="1.0.0", lifespan=lifespan)
 
+# Added before CORS so that 429 responses still carry CORS headers.
+app.add_middleware(AdmissionMiddleware)
+app.add_middleware(CompressionMiddleware)
+# Outside compression so the serialize span includes it.
+app.add_middleware(TracingMiddleware)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["http://localhost:3000"],
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[TRACE_HEADER],
 )
 
 app.include_router(auth.router, prefix="/auth", tags=["auth"])
@@ -37,8 +95,31 @@ app.include_router(payments.router, prefix="/payments", tags=["payments"])
 app.include_router(packages.router, prefix="/packages", tags=["packages"])
 app.include_router(dashboard.router, prefix="/dashboard", tags=["dashboard"])
 app.include_router(trainers.router, prefix="/trainers", tags=["trainers"])
+app.include_router(audit.router, prefix="/audit", tags=["audit"])
+app.include_router(gyms.router, prefix="/gyms", tags=["gyms"])
+app.include_router(debug.router, prefix="/debug", tags=["debug"])
 
 
 @app.get("/health")
 async def health():
     return {"status": "ok"}
+
+
+@app.get("/health/admission")
+async def admission_stats(current_user: Annotated[User, Depends(require_owner)]):
+    # Only the caller's own gym: other tenants' traffic is not theirs to see.
+    return {
+        "rejections_by_gym": {current_user.gym_id: admission.stats(current_user.gym_id)}
+    }
+
+
+@app.get("/health/audit")
+async def audit_queue_stats(current_user: Annotated[User, Depends(require_owner)]):
+    return audit_writer.stats()
+
+
+@app.get("/health/connections")
+async def connection_hold_stats(
+    current_user: Annotated[User, Depends(require_owner)],
+):
+    return {"hold_by_route": hold_stats.stats()}
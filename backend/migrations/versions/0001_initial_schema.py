@@ -0,0 +1,164 @@
+"""initial schema
+
+Matches what ``Base.metadata.create_all`` plus the ``members.goals`` ALTER
+produced before migrations existed. Databases created that way should be
+stamped rather than upgraded: ``alembic stamp 0001 && alembic upgrade head``.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-19
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+revision: str = "0001"
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "gyms",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("name", sa.String(200), nullable=False),
+        sa.Column(
+            "type",
+            sa.Enum("gym", "personal_studio", name="gymtype"),
+            nullable=False,
+        ),
+        sa.Column("address", sa.String(500)),
+        sa.Column("phone", sa.String(50)),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.Column("is_active", sa.Boolean(), nullable=False),
+    )
+    op.create_index("ix_gyms_id", "gyms", ["id"])
+
+    op.create_table(
+        "users",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("gym_id", sa.Integer(), sa.ForeignKey("gyms.id"), nullable=False),
+        sa.Column("email", sa.String(254), nullable=False),
+        sa.Column("hashed_password", sa.String(500), nullable=False),
+        sa.Column("name", sa.String(100), nullable=False),
+        sa.Column(
+            "role",
+            sa.Enum("owner", "trainer", "member", name="userrole"),
+            nullable=False,
+        ),
+        sa.Column("phone", sa.String(50)),
+        sa.Column("is_active", sa.Boolean(), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+    )
+    op.create_index("ix_users_id", "users", ["id"])
+    op.create_index("ix_users_email", "users", ["email"], unique=True)
+
+    op.create_table(
+        "members",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("gym_id", sa.Integer(), sa.ForeignKey("gyms.id"), nullable=False),
+        sa.Column("trainer_id", sa.Integer(), sa.ForeignKey("users.id")),
+        sa.Column("name", sa.String(100), nullable=False),
+        sa.Column("email", sa.String(254)),
+        sa.Column("phone", sa.String(50)),
+        sa.Column("birth_date", sa.Date()),
+        sa.Column("notes", sa.Text()),
+        sa.Column("goals", sa.ARRAY(sa.String()), server_default="{}", nullable=False),
+        sa.Column("is_active", sa.Boolean(), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+    )
+    op.create_index("ix_members_id", "members", ["id"])
+    op.create_index("ix_members_email", "members", ["email"])
+
+    op.create_table(
+        "packages",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("gym_id", sa.Integer(), sa.ForeignKey("gyms.id"), nullable=False),
+        sa.Column("name", sa.String(200), nullable=False),
+        sa.Column("description", sa.Text()),
+        sa.Column("total_sessions", sa.Integer(), nullable=False),
+        sa.Column("price", sa.Integer(), nullable=False),
+        sa.Column("validity_days", sa.Integer(), nullable=False),
+        sa.Column("is_active", sa.Boolean(), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+    )
+    op.create_index("ix_packages_id", "packages", ["id"])
+
+    op.create_table(
+        "member_packages",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column(
+            "member_id", sa.Integer(), sa.ForeignKey("members.id"), nullable=False
+        ),
+        sa.Column(
+            "package_id", sa.Integer(), sa.ForeignKey("packages.id"), nullable=False
+        ),
+        sa.Column("sessions_total", sa.Integer(), nullable=False),
+        sa.Column("sessions_remaining", sa.Integer(), nullable=False),
+        sa.Column("price_paid", sa.Integer(), nullable=False),
+        sa.Column(
+            "payment_method",
+            sa.Enum("cash", "card", "transfer", "online_mock", name="paymentmethod"),
+            nullable=False,
+        ),
+        sa.Column(
+            "payment_status",
+            sa.Enum("paid", "pending", "overdue", name="paymentstatus"),
+            nullable=False,
+        ),
+        sa.Column("start_date", sa.Date(), nullable=False),
+        sa.Column("expiry_date", sa.Date(), nullable=False),
+        sa.Column("notes", sa.Text()),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+    )
+    op.create_index("ix_member_packages_id", "member_packages", ["id"])
+
+    op.create_table(
+        "sessions",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column(
+            "member_id", sa.Integer(), sa.ForeignKey("members.id"), nullable=False
+        ),
+        sa.Column(
+            "trainer_id", sa.Integer(), sa.ForeignKey("users.id"), nullable=False
+        ),
+        sa.Column(
+            "member_package_id", sa.Integer(), sa.ForeignKey("member_packages.id")
+        ),
+        sa.Column("scheduled_at", sa.DateTime(), nullable=False),
+        sa.Column("duration_minutes", sa.Integer(), nullable=False),
+        sa.Column(
+            "status",
+            sa.Enum(
+                "scheduled", "completed", "no_show", "cancelled", name="sessionstatus"
+            ),
+            nullable=False,
+        ),
+        sa.Column("notes", sa.Text()),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+    )
+    op.create_index("ix_sessions_id", "sessions", ["id"])
+
+
+def downgrade() -> None:
+    for table in (
+        "sessions",
+        "member_packages",
+        "packages",
+        "members",
+        "users",
+        "gyms",
+    ):
+        op.drop_table(table)
+    for enum_name in (
+        "sessionstatus",
+        "paymentstatus",
+        "paymentmethod",
+        "userrole",
+        "gymtype",
+    ):
+        op.execute(f"DROP TYPE IF EXISTS {enum_name}")
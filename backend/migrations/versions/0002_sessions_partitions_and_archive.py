@@ -0,0 +1,192 @@
+"""partition sessions by month, add session indexes and archive tables
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-19
+
+"""
+
+from datetime import date
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+from sqlalchemy.dialects import postgresql
+
+revision: str = "0002"
+down_revision: Union[str, None] = "0001"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+MONTHS_AHEAD = 3
+
+SESSION_COLUMNS = (
+    "id, member_id, trainer_id, member_package_id, scheduled_at, "
+    "duration_minutes, status, notes, created_at"
+)
+
+
+def _session_status():
+    return postgresql.ENUM(
+        "scheduled",
+        "completed",
+        "no_show",
+        "cancelled",
+        name="sessionstatus",
+        create_type=False,
+    )
+
+
+def _add_months(d: date, months: int) -> date:
+    years, month_index = divmod(d.month - 1 + months, 12)
+    return date(d.year + years, month_index + 1, 1)
+
+
+def _session_columns(partitioned: bool):
+    return [
+        sa.Column("id", sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column(
+            "member_id", sa.Integer(), sa.ForeignKey("members.id"), nullable=False
+        ),
+        sa.Column(
+            "trainer_id", sa.Integer(), sa.ForeignKey("users.id"), nullable=False
+        ),
+        sa.Column(
+            "member_package_id", sa.Integer(), sa.ForeignKey("member_packages.id")
+        ),
+        sa.Column("scheduled_at", sa.DateTime(), nullable=False),
+        sa.Column("duration_minutes", sa.Integer(), nullable=False),
+        sa.Column("status", _session_status(), nullable=False),
+        sa.Column("notes", sa.Text()),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint(*(("id", "scheduled_at") if partitioned else ("id",))),
+    ]
+
+
+def _swap_out_sessions(conn) -> None:
+    op.rename_table("sessions", "sessions_old")
+    # Index and sequence names are schema-wide; free them for the new table.
+    index_names = conn.execute(
+        sa.text("SELECT indexname FROM pg_indexes WHERE tablename = 'sessions_old'")
+    ).scalars()
+    for index_name in list(index_names):
+        op.execute(f'ALTER INDEX "{index_name}" RENAME TO "old_{index_name}"')
+    op.execute("ALTER SEQUENCE IF EXISTS sessions_id_seq RENAME TO sessions_old_id_seq")
+
+
+def _copy_back_sessions() -> None:
+    op.execute(
+        f"INSERT INTO sessions ({SESSION_COLUMNS}) "
+        f"SELECT {SESSION_COLUMNS} FROM sessions_old"
+    )
+    op.execute(
+        "SELECT setval(pg_get_serial_sequence('sessions', 'id'), "
+        "COALESCE((SELECT max(id) FROM sessions), 0) + 1, false)"
+    )
+    op.drop_table("sessions_old")
+
+
+def _create_session_indexes() -> None:
+    op.create_index("ix_sessions_id", "sessions", ["id"])
+    op.create_index(
+        "ix_sessions_trainer_id_scheduled_at",
+        "sessions",
+        ["trainer_id", "scheduled_at"],
+    )
+    op.create_index(
+        "ix_sessions_member_id_scheduled_at", "sessions", ["member_id", "scheduled_at"]
+    )
+    op.create_index("ix_sessions_member_package_id", "sessions", ["member_package_id"])
+
+
+def upgrade() -> None:
+    conn = op.get_bind()
+    _swap_out_sessions(conn)
+
+    op.create_table(
+        "sessions",
+        *_session_columns(partitioned=True),
+        postgresql_partition_by="RANGE (scheduled_at)",
+    )
+    _create_session_indexes()
+
+    this_month = date.today().replace(day=1)
+    oldest = conn.execute(
+        sa.text("SELECT min(scheduled_at) FROM sessions_old")
+    ).scalar()
+    month = min(this_month, oldest.date().replace(day=1)) if oldest else this_month
+    while month <= _add_months(this_month, MONTHS_AHEAD):
+        next_month = _add_months(month, 1)
+        op.execute(
+            f"CREATE TABLE sessions_y{month.year:04d}m{month.month:02d} "
+            f"PARTITION OF sessions FOR VALUES FROM ('{month.isoformat()}') "
+            f"TO ('{next_month.isoformat()}')"
+        )
+        month = next_month
+    op.execute("CREATE TABLE sessions_default PARTITION OF sessions DEFAULT")
+
+    _copy_back_sessions()
+
+    op.create_table(
+        "sessions_archive",
+        sa.Column("id", sa.Integer(), primary_key=True, autoincrement=False),
+        sa.Column(
+            "member_id", sa.Integer(), sa.ForeignKey("members.id"), nullable=False
+        ),
+        sa.Column(
+            "trainer_id", sa.Integer(), sa.ForeignKey("users.id"), nullable=False
+        ),
+        sa.Column("member_package_id", sa.Integer()),
+        sa.Column("scheduled_at", sa.DateTime(), nullable=False),
+        sa.Column("duration_minutes", sa.Integer(), nullable=False),
+        sa.Column("status", _session_status(), nullable=False),
+        sa.Column("notes", sa.Text()),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.Column("archived_at", sa.DateTime(), nullable=False),
+    )
+    op.create_index("ix_sessions_archive_member_id", "sessions_archive", ["member_id"])
+
+    op.create_table(
+        "member_packages_archive",
+        sa.Column("id", sa.Integer(), primary_key=True, autoincrement=False),
+        sa.Column(
+            "member_id", sa.Integer(), sa.ForeignKey("members.id"), nullable=False
+        ),
+        sa.Column(
+            "package_id", sa.Integer(), sa.ForeignKey("packages.id"), nullable=False
+        ),
+        sa.Column("sessions_total", sa.Integer(), nullable=False),
+        sa.Column("sessions_remaining", sa.Integer(), nullable=False),
+        sa.Column("price_paid", sa.Integer(), nullable=False),
+        sa.Column(
+            "payment_method",
+            postgresql.ENUM(name="paymentmethod", create_type=False),
+            nullable=False,
+        ),
+        sa.Column(
+            "payment_status",
+            postgresql.ENUM(name="paymentstatus", create_type=False),
+            nullable=False,
+        ),
+        sa.Column("start_date", sa.Date(), nullable=False),
+        sa.Column("expiry_date", sa.Date(), nullable=False),
+        sa.Column("notes", sa.Text()),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.Column("archived_at", sa.DateTime(), nullable=False),
+    )
+    op.create_index(
+        "ix_member_packages_archive_member_id",
+        "member_packages_archive",
+        ["member_id"],
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("member_packages_archive")
+    op.drop_table("sessions_archive")
+
+    conn = op.get_bind()
+    _swap_out_sessions(conn)
+    op.create_table("sessions", *_session_columns(partitioned=False))
+    op.create_index("ix_sessions_id", "sessions", ["id"])
+    _copy_back_sessions()
@@ -0,0 +1,37 @@
+"""add trainer working hours
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-19
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+revision: str = "0003"
+down_revision: Union[str, None] = "0002"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "trainer_working_hours",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column(
+            "trainer_id", sa.Integer(), sa.ForeignKey("users.id"), nullable=False
+        ),
+        sa.Column("weekday", sa.SmallInteger(), nullable=False),
+        sa.Column("start_time", sa.Time(), nullable=False),
+        sa.Column("end_time", sa.Time(), nullable=False),
+    )
+    op.create_index(
+        "ix_trainer_working_hours_trainer_id", "trainer_working_hours", ["trainer_id"]
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("trainer_working_hours")
@@ -0,0 +1,24 @@
+"""index sessions.scheduled_at for calendar range scans
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-19
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+revision: str = "0004"
+down_revision: Union[str, None] = "0003"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index("ix_sessions_scheduled_at", "sessions", ["scheduled_at"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_sessions_scheduled_at", table_name="sessions")
@@ -0,0 +1,37 @@
+"""add audit log
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-19
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+revision: str = "0006"
+down_revision: Union[str, None] = "0005"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "audit_log",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("gym_id", sa.Integer(), sa.ForeignKey("gyms.id"), nullable=False),
+        sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id"), nullable=False),
+        sa.Column("entity", sa.String(length=50), nullable=False),
+        sa.Column("entity_id", sa.Integer(), nullable=False),
+        sa.Column("field", sa.String(length=50), nullable=False),
+        sa.Column("old_value", sa.String(length=100), nullable=True),
+        sa.Column("new_value", sa.String(length=100), nullable=True),
+        sa.Column("changed_at", sa.DateTime(), nullable=False),
+    )
+    op.create_index("ix_audit_log_gym_id_id", "audit_log", ["gym_id", "id"])
+
+
+def downgrade() -> None:
+    op.drop_table("audit_log")
@@ -0,0 +1,51 @@
+"""add member retention snapshot
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-19
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+revision: str = "0007"
+down_revision: Union[str, None] = "0006"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "member_retention",
+        sa.Column(
+            "member_id",
+            sa.Integer(),
+            sa.ForeignKey("members.id"),
+            primary_key=True,
+        ),
+        sa.Column("gym_id", sa.Integer(), sa.ForeignKey("gyms.id"), nullable=False),
+        sa.Column("trainer_id", sa.Integer(), nullable=True),
+        sa.Column("status", sa.String(length=20), nullable=False),
+        sa.Column("packages_count", sa.Integer(), nullable=False),
+        sa.Column("renewals_count", sa.Integer(), nullable=False),
+        sa.Column("last_days_to_renewal", sa.Integer(), nullable=True),
+        sa.Column("avg_days_to_renewal", sa.Float(), nullable=True),
+        sa.Column("latest_expiry_date", sa.Date(), nullable=False),
+        sa.Column("sessions_remaining", sa.Integer(), nullable=False),
+        sa.Column("recent_sessions", sa.Integer(), nullable=False),
+        sa.Column("previous_sessions", sa.Integer(), nullable=False),
+        sa.Column("low_sessions", sa.Boolean(), nullable=False),
+        sa.Column("near_expiry", sa.Boolean(), nullable=False),
+        sa.Column("falling_attendance", sa.Boolean(), nullable=False),
+        sa.Column("computed_at", sa.DateTime(), nullable=False),
+    )
+    op.create_index(
+        "ix_member_retention_gym_id_status", "member_retention", ["gym_id", "status"]
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("member_retention")
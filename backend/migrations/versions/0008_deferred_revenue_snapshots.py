@@ -0,0 +1,34 @@
+"""add deferred revenue snapshots
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-19
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+revision: str = "0008"
+down_revision: Union[str, None] = "0007"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "deferred_revenue_snapshots",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("gym_id", sa.Integer(), sa.ForeignKey("gyms.id"), nullable=False),
+        sa.Column("snapshot_date", sa.Date(), nullable=False),
+        sa.Column("liability", sa.BigInteger(), nullable=False),
+        sa.Column("sessions_remaining", sa.Integer(), nullable=False),
+        sa.Column("packages", sa.Integer(), nullable=False),
+        sa.UniqueConstraint("gym_id", "snapshot_date"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("deferred_revenue_snapshots")
@@ -0,0 +1,37 @@
+"""add owner gyms for multi-branch owners
+
+Revision ID: 0009
+Revises: 0008
+Create Date: 2026-10-19
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+revision: str = "0009"
+down_revision: Union[str, None] = "0008"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "owner_gyms",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id"), nullable=False),
+        sa.Column("gym_id", sa.Integer(), sa.ForeignKey("gyms.id"), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.UniqueConstraint("user_id", "gym_id"),
+    )
+    # Every existing owner manages the gym they registered.
+    op.execute(
+        "INSERT INTO owner_gyms (user_id, gym_id, created_at) "
+        "SELECT id, gym_id, now() FROM users WHERE role = 'owner'"
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("owner_gyms")
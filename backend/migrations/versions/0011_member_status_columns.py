@@ -0,0 +1,89 @@
+"""add denormalized member status columns
+
+Revision ID: 0011
+Revises: 0010
+Create Date: 2026-10-19
+
+"""
+
+from datetime import datetime
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+revision: str = "0011"
+down_revision: Union[str, None] = "0010"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+_COLUMNS = (
+    "active_package_until",
+    "sessions_remaining",
+    "last_visit_at",
+    "next_session_at",
+)
+
+
+def upgrade() -> None:
+    op.add_column("members", sa.Column("active_package_until", sa.Date()))
+    op.add_column(
+        "members",
+        sa.Column(
+            "sessions_remaining", sa.Integer(), server_default="0", nullable=False
+        ),
+    )
+    op.add_column("members", sa.Column("last_visit_at", sa.DateTime()))
+    op.add_column("members", sa.Column("next_session_at", sa.DateTime()))
+    for column in _COLUMNS:
+        op.create_index(f"ix_members_gym_id_{column}", "members", ["gym_id", column])
+
+    # Initial values; services.member_stats keeps them current from here on.
+    # "Now" comes from the app's clock, not the database's, to match it.
+    now = datetime.now()
+    op.execute(
+        sa.text(
+            """
+            WITH packages AS (
+                SELECT
+                    member_id,
+                    MAX(expiry_date) FILTER (WHERE sessions_remaining > 0)
+                        AS active_package_until,
+                    SUM(sessions_remaining) FILTER (WHERE expiry_date >= :today)
+                        AS sessions_remaining
+                FROM member_packages
+                GROUP BY member_id
+            ), visits AS (
+                SELECT
+                    member_id,
+                    MAX(scheduled_at) FILTER (WHERE status = 'completed')
+                        AS last_visit_at,
+                    MIN(scheduled_at) FILTER (
+                        WHERE status = 'scheduled'
+                          AND scheduled_at >= :now
+                    ) AS next_session_at
+                FROM (
+                    SELECT member_id, scheduled_at, status FROM sessions
+                    UNION ALL
+                    SELECT member_id, scheduled_at, status FROM sessions_archive
+                ) s
+                GROUP BY member_id
+            )
+            UPDATE members m
+            SET active_package_until = p.active_package_until,
+                sessions_remaining = COALESCE(p.sessions_remaining, 0),
+                last_visit_at = v.last_visit_at,
+                next_session_at = v.next_session_at
+            FROM members base
+            LEFT JOIN packages p ON p.member_id = base.id
+            LEFT JOIN visits v ON v.member_id = base.id
+            WHERE m.id = base.id
+            """
+        ).bindparams(now=now, today=now.date())
+    )
+
+
+def downgrade() -> None:
+    for column in _COLUMNS:
+        op.drop_index(f"ix_members_gym_id_{column}", table_name="members")
+        op.drop_column("members", column)
@@ -0,0 +1,48 @@
+"""index member_packages for the filtered payments list
+
+Revision ID: 0012
+Revises: 0011
+Create Date: 2026-10-19
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+revision: str = "0012"
+down_revision: Union[str, None] = "0011"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        "ix_member_packages_member_id_created_at",
+        "member_packages",
+        ["member_id", "created_at"],
+    )
+    op.create_index(
+        "ix_member_packages_member_id_expiry_date",
+        "member_packages",
+        ["member_id", "expiry_date"],
+    )
+    op.create_index("ix_member_packages_package_id", "member_packages", ["package_id"])
+    op.create_index(
+        "ix_member_packages_unpaid",
+        "member_packages",
+        ["member_id", "created_at"],
+        postgresql_where=sa.text("payment_status <> 'paid'"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_member_packages_unpaid", table_name="member_packages")
+    op.drop_index("ix_member_packages_package_id", table_name="member_packages")
+    op.drop_index(
+        "ix_member_packages_member_id_expiry_date", table_name="member_packages"
+    )
+    op.drop_index(
+        "ix_member_packages_member_id_created_at", table_name="member_packages"
+    )
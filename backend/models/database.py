@@ -1,10 +1,21 @@
 import enum
-from datetime import date, datetime
+from datetime import date, datetime, time
 from typing import List, Optional
 
-from sqlalchemy import ARRAY, Boolean, Date, DateTime
+from sqlalchemy import ARRAY, JSON, BigInteger, Boolean, Date, DateTime
 from sqlalchemy import Enum as SAEnum
-from sqlalchemy import ForeignKey, Integer, String, Text
+from sqlalchemy import (
+    Float,
+    ForeignKey,
+    Index,
+    Integer,
+    SmallInteger,
+    String,
+    Text,
+    Time,
+    UniqueConstraint,
+    text,
+)
 from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column, relationship
 
@@ -96,6 +107,14 @@ class User(Base):
 
 class Member(Base):
     __tablename__ = "members"
+    __table_args__ = (
+        Index(
+            "ix_members_gym_id_active_package_until", "gym_id", "active_package_until"
+        ),
+        Index("ix_members_gym_id_sessions_remaining", "gym_id", "sessions_remaining"),
+        Index("ix_members_gym_id_last_visit_at", "gym_id", "last_visit_at"),
+        Index("ix_members_gym_id_next_session_at", "gym_id", "next_session_at"),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
     gym_id: Mapped[int] = mapped_column(Integer, ForeignKey("gyms.id"), nullable=False)
@@ -114,6 +133,13 @@ class Member(Base):
     created_at: Mapped[datetime] = mapped_column(
         DateTime, default=datetime.utcnow, nullable=False
     )
+    # Maintained by services.member_stats for filtering and sorting the list.
+    active_package_until: Mapped[Optional[date]] = mapped_column(Date)
+    sessions_remaining: Mapped[int] = mapped_column(
+        Integer, default=0, server_default="0", nullable=False
+    )
+    last_visit_at: Mapped[Optional[datetime]] = mapped_column(DateTime)
+    next_session_at: Mapped[Optional[datetime]] = mapped_column(DateTime)
 
     gym: Mapped["Gym"] = relationship("Gym", back_populates="members")
     trainer: Mapped[Optional["User"]] = relationship(
@@ -148,6 +174,18 @@ class Package(Base):
 
 class MemberPackage(Base):
     __tablename__ = "member_packages"
+    __table_args__ = (
+        Index("ix_member_packages_member_id_created_at", "member_id", "created_at"),
+        Index("ix_member_packages_member_id_expiry_date", "member_id", "expiry_date"),
+        Index("ix_member_packages_package_id", "package_id"),
+        # Outstanding balances are a small slice of all packages.
+        Index(
+            "ix_member_packages_unpaid",
+            "member_id",
+            "created_at",
+            postgresql_where=text("payment_status <> 'paid'"),
+        ),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
     member_id: Mapped[int] = mapped_column(
@@ -181,10 +219,33 @@ class MemberPackage(Base):
     )
 
 
+class TrainerWorkingHours(Base):
+    __tablename__ = "trainer_working_hours"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    trainer_id: Mapped[int] = mapped_column(
+        Integer, ForeignKey("users.id"), index=True, nullable=False
+    )
+    weekday: Mapped[int] = mapped_column(SmallInteger, nullable=False)  # Monday=0
+    start_time: Mapped[time] = mapped_column(Time, nullable=False)
+    end_time: Mapped[time] = mapped_column(Time, nullable=False)
+
+
 class Session(Base):
     __tablename__ = "sessions"
+    # Monthly range partitions on scheduled_at, managed by services.partitions.
+    # Postgres requires the partition key in the primary key, so the table PK is
+    # (id, scheduled_at) while the ORM keeps identifying rows by id alone.
+    __table_args__ = (
+        Index("ix_sessions_trainer_id_scheduled_at", "trainer_id", "scheduled_at"),
+        Index("ix_sessions_member_id_scheduled_at", "member_id", "scheduled_at"),
+        Index("ix_sessions_scheduled_at", "scheduled_at"),
+        {"postgresql_partition_by": "RANGE (scheduled_at)"},
+    )
 
-    id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
+    id: Mapped[int] = mapped_column(
+        Integer, primary_key=True, autoincrement=True, index=True
+    )
     member_id: Mapped[int] = mapped_column(
         Integer, ForeignKey("members.id"), nullable=False
     )
@@ -192,9 +253,11 @@ class Session(Base):
         Integer, ForeignKey("users.id"), nullable=False
     )
     member_package_id: Mapped[Optional[int]] = mapped_column(
-        Integer, ForeignKey("member_packages.id"), nullable=True
+        Integer, ForeignKey("member_packages.id"), nullable=True, index=True
+    )
+    scheduled_at: Mapped[datetime] = mapped_column(
+        DateTime, primary_key=True, nullable=False
     )
-    scheduled_at: Mapped[datetime] = mapped_column(DateTime, nullable=False)
     duration_minutes: Mapped[int] = mapped_column(Integer, default=60, nullable=False)
     status: Mapped[SessionStatus] = mapped_column(
         SAEnum(SessionStatus), default=SessionStatus.scheduled, nullable=False
@@ -210,16 +273,217 @@ class Session(Base):
         "MemberPackage", back_populates="sessions"
     )
 
+    __mapper_args__ = {"primary_key": [id]}
+
+
+# Cold storage for rows moved out by services.archive. Archived sessions keep
+# their member_package_id without a foreign key, since the package may itself
+# have been archived.
+
+
+class SessionArchive(Base):
+    __tablename__ = "sessions_archive"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    member_id: Mapped[int] = mapped_column(
+        Integer, ForeignKey("members.id"), index=True, nullable=False
+    )
+    trainer_id: Mapped[int] = mapped_column(
+        Integer, ForeignKey("users.id"), nullable=False
+    )
+    member_package_id: Mapped[Optional[int]] = mapped_column(Integer)
+    scheduled_at: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+    duration_minutes: Mapped[int] = mapped_column(Integer, nullable=False)
+    status: Mapped[SessionStatus] = mapped_column(SAEnum(SessionStatus), nullable=False)
+    notes: Mapped[Optional[str]] = mapped_column(Text)
+    created_at: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+    archived_at: Mapped[datetime] = mapped_column(
+        DateTime, default=datetime.utcnow, nullable=False
+    )
+
+    member: Mapped["Member"] = relationship("Member")
+    trainer: Mapped["User"] = relationship("User")
+
+
+class MemberPackageArchive(Base):
+    __tablename__ = "member_packages_archive"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    member_id: Mapped[int] = mapped_column(
+        Integer, ForeignKey("members.id"), index=True, nullable=False
+    )
+    package_id: Mapped[int] = mapped_column(
+        Integer, ForeignKey("packages.id"), nullable=False
+    )
+    sessions_total: Mapped[int] = mapped_column(Integer, nullable=False)
+    sessions_remaining: Mapped[int] = mapped_column(Integer, nullable=False)
+    price_paid: Mapped[int] = mapped_column(Integer, nullable=False)
+    payment_method: Mapped[PaymentMethod] = mapped_column(
+        SAEnum(PaymentMethod), nullable=False
+    )
+    payment_status: Mapped[PaymentStatus] = mapped_column(
+        SAEnum(PaymentStatus), nullable=False
+    )
+    start_date: Mapped[date] = mapped_column(Date, nullable=False)
+    expiry_date: Mapped[date] = mapped_column(Date, nullable=False)
+    notes: Mapped[Optional[str]] = mapped_column(Text)
+    created_at: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+    archived_at: Mapped[datetime] = mapped_column(
+        DateTime, default=datetime.utcnow, nullable=False
+    )
+
+    member: Mapped["Member"] = relationship("Member")
+    package: Mapped["Package"] = relationship("Package")
+
+
+class IdempotencyKey(Base):
+    """A client-supplied Idempotency-Key and the response it produced.
+
+    The row is inserted in the same transaction as the write it guards, so a
+    concurrent duplicate blocks on the unique index until that write commits or
+    rolls back. ``response_body`` stays NULL until the response is stored.
+    """
+
+    __tablename__ = "idempotency_keys"
+    __table_args__ = (UniqueConstraint("user_id", "key"),)
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    user_id: Mapped[int] = mapped_column(
+        Integer, ForeignKey("users.id"), nullable=False
+    )
+    key: Mapped[str] = mapped_column(String(255), nullable=False)
+    request_hash: Mapped[str] = mapped_column(String(64), nullable=False)
+    status_code: Mapped[Optional[int]] = mapped_column(SmallInteger)
+    response_body: Mapped[Optional[dict]] = mapped_column(JSON)
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime, default=datetime.utcnow, nullable=False
+    )
+    expires_at: Mapped[datetime] = mapped_column(DateTime, index=True, nullable=False)
+
+
+class AuditLog(Base):
+    """Who changed a payment or session field, written by services.audit."""
+
+    __tablename__ = "audit_log"
+    __table_args__ = (Index("ix_audit_log_gym_id_id", "gym_id", "id"),)
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    gym_id: Mapped[int] = mapped_column(Integer, ForeignKey("gyms.id"), nullable=False)
+    user_id: Mapped[int] = mapped_column(
+        Integer, ForeignKey("users.id"), nullable=False
+    )
+    entity: Mapped[str] = mapped_column(String(50), nullable=False)
+    entity_id: Mapped[int] = mapped_column(Integer, nullable=False)
+    field: Mapped[str] = mapped_column(String(50), nullable=False)
+    old_value: Mapped[Optional[str]] = mapped_column(String(100))
+    new_value: Mapped[Optional[str]] = mapped_column(String(100))
+    changed_at: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+
+    user: Mapped["User"] = relationship("User")
+
+
+class MemberRetention(Base):
+    """Nightly per-member churn/renewal snapshot, rebuilt by services.retention."""
+
+    __tablename__ = "member_retention"
+    __table_args__ = (Index("ix_member_retention_gym_id_status", "gym_id", "status"),)
+
+    member_id: Mapped[int] = mapped_column(
+        Integer, ForeignKey("members.id"), primary_key=True
+    )
+    gym_id: Mapped[int] = mapped_column(Integer, ForeignKey("gyms.id"), nullable=False)
+    trainer_id: Mapped[Optional[int]] = mapped_column(Integer)
+    status: Mapped[str] = mapped_column(String(20), nullable=False)
+    packages_count: Mapped[int] = mapped_column(Integer, nullable=False)
+    renewals_count: Mapped[int] = mapped_column(Integer, nullable=False)
+    last_days_to_renewal: Mapped[Optional[int]] = mapped_column(Integer)
+    avg_days_to_renewal: Mapped[Optional[float]] = mapped_column(Float)
+    latest_expiry_date: Mapped[date] = mapped_column(Date, nullable=False)
+    sessions_remaining: Mapped[int] = mapped_column(Integer, nullable=False)
+    recent_sessions: Mapped[int] = mapped_column(Integer, nullable=False)
+    previous_sessions: Mapped[int] = mapped_column(Integer, nullable=False)
+    low_sessions: Mapped[bool] = mapped_column(Boolean, nullable=False)
+    near_expiry: Mapped[bool] = mapped_column(Boolean, nullable=False)
+    falling_attendance: Mapped[bool] = mapped_column(Boolean, nullable=False)
+    computed_at: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+
+    member: Mapped["Member"] = relationship("Member")
+
+
+class DeferredRevenueSnapshot(Base):
+    """Daily per-gym unused-sessions liability, written by services.revenue."""
+
+    __tablename__ = "deferred_revenue_snapshots"
+    __table_args__ = (UniqueConstraint("gym_id", "snapshot_date"),)
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    gym_id: Mapped[int] = mapped_column(Integer, ForeignKey("gyms.id"), nullable=False)
+    snapshot_date: Mapped[date] = mapped_column(Date, nullable=False)
+    liability: Mapped[int] = mapped_column(BigInteger, nullable=False)
+    sessions_remaining: Mapped[int] = mapped_column(Integer, nullable=False)
+    packages: Mapped[int] = mapped_column(Integer, nullable=False)
+
+
+class OwnerGym(Base):
+    """A branch an owner manages.
+
+    ``User.gym_id`` remains the owner's current branch, which every other route
+    acts on; owners switch between their linked gyms through /gyms.
+    """
+
+    __tablename__ = "owner_gyms"
+    __table_args__ = (UniqueConstraint("user_id", "gym_id"),)
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    user_id: Mapped[int] = mapped_column(
+        Integer, ForeignKey("users.id"), nullable=False
+    )
+    gym_id: Mapped[int] = mapped_column(Integer, ForeignKey("gyms.id"), nullable=False)
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime, default=datetime.utcnow, nullable=False
+    )
+
+
+class Notification(Base):
+    """A reminder queued by services.notifications and sent by its worker.
+
+    ``ref_id`` is the member package for expiry reminders and the session for
+    session reminders; the unique constraint makes re-running a scan a no-op.
+    """
+
+    __tablename__ = "notifications"
+    __table_args__ = (
+        UniqueConstraint("member_id", "kind", "ref_id"),
+        Index(
+            "ix_notifications_unsent",
+            "status",
+            "gym_id",
+            "id",
+            postgresql_where=text("status IN ('pending', 'sending')"),
+        ),
+    )
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    gym_id: Mapped[int] = mapped_column(Integer, ForeignKey("gyms.id"), nullable=False)
+    member_id: Mapped[int] = mapped_column(
+        Integer, ForeignKey("members.id"), nullable=False
+    )
+    kind: Mapped[str] = mapped_column(String(30), nullable=False)
+    ref_id: Mapped[int] = mapped_column(Integer, nullable=False)
+    channel: Mapped[str] = mapped_column(String(10), nullable=False)
+    recipient: Mapped[str] = mapped_column(String(254), nullable=False)
+    payload: Mapped[dict] = mapped_column(JSON, nullable=False)
+    status: Mapped[str] = mapped_column(String(10), default="pending", nullable=False)
+    attempts: Mapped[int] = mapped_column(SmallInteger, default=0, nullable=False)
+    last_error: Mapped[Optional[str]] = mapped_column(Text)
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime, default=datetime.utcnow, nullable=False
+    )
+    claimed_at: Mapped[Optional[datetime]] = mapped_column(DateTime)
+    sent_at: Mapped[Optional[datetime]] = mapped_column(DateTime)
+
 
 engine = create_async_engine(settings.database_url, echo=False)
 async_session_maker = async_sessionmaker(
     engine, class_=AsyncSession, expire_on_commit=False
 )
-
-
-async def get_db():
-    async with async_session_maker() as session:
-        try:
-            yield session
-        finally:
-            await session.close()
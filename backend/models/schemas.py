@@ -1,7 +1,7 @@
-from datetime import date, datetime
-from typing import List, Optional
+from datetime import date, datetime, time
+from typing import Dict, List, Literal, Optional
 
-from pydantic import BaseModel, EmailStr, Field, field_validator
+from pydantic import BaseModel, EmailStr, Field, field_validator, model_validator
 
 from models.database import (
     GymType,
@@ -11,6 +11,16 @@ from models.database import (
     UserRole,
 )
 
+# "columnar" opts list endpoints into services.columnar.to_columnar output.
+ListFormat = Literal["json", "columnar"]
+MemberSort = Literal[
+    "name", "sessions_remaining", "last_visit", "next_session", "created_at"
+]
+PaymentSort = Literal[
+    "created_at", "start_date", "expiry_date", "price_paid", "member_name"
+]
+SortOrder = Literal["asc", "desc"]
+
 # --- Auth ---
 
 
@@ -171,6 +181,10 @@ class MemberResponse(BaseModel):
     goals: List[str] = []
     is_active: bool
     created_at: datetime
+    active_package_until: Optional[date] = None
+    sessions_remaining: int = 0
+    last_visit_at: Optional[datetime] = None
+    next_session_at: Optional[datetime] = None
     member_packages: List[MemberPackageSummary] = []
 
     model_config = {"from_attributes": True}
@@ -227,6 +241,30 @@ class MemberBasic(BaseModel):
 MemberPackageResponse.model_rebuild()
 
 
+class ReconciliationLine(BaseModel):
+    line: int
+    transfer_date: date
+    amount: int
+    payer_name: str
+
+
+class ReconciliationMatch(ReconciliationLine):
+    member_package_id: int
+    member_name: str
+
+
+class ReconciliationAmbiguous(ReconciliationLine):
+    candidate_ids: List[int]
+
+
+class ReconciliationResult(BaseModel):
+    dry_run: bool
+    matched: List[ReconciliationMatch]
+    ambiguous: List[ReconciliationAmbiguous]
+    unmatched: List[ReconciliationLine]
+    invalid_lines: List[int]
+
+
 # --- Session ---
 
 
@@ -251,6 +289,48 @@ class SessionUpdate(BaseModel):
     notes: Optional[str] = None
 
 
+class SessionStatusChange(BaseModel):
+    id: int
+    status: SessionStatus
+
+
+class SessionBulkUpdate(BaseModel):
+    updates: List[SessionStatusChange] = Field(min_length=1, max_length=500)
+
+
+class PackageBalance(BaseModel):
+    member_package_id: int
+    sessions_remaining: int
+
+
+class SessionBulkResult(BaseModel):
+    updated: List[SessionStatusChange]
+    unchanged: List[int]
+    packages: List[PackageBalance]
+
+
+class CalendarSession(BaseModel):
+    id: int
+    member_id: int
+    trainer_id: int
+    member_package_id: Optional[int]
+    scheduled_at: datetime
+    duration_minutes: int
+    status: SessionStatus
+
+
+class CalendarDay(BaseModel):
+    date: date
+    sessions: List[CalendarSession]
+
+
+class CalendarResponse(BaseModel):
+    # Names are sent once per person instead of once per session.
+    members: Dict[int, str]
+    trainers: Dict[int, str]
+    days: List[CalendarDay]
+
+
 class SessionResponse(BaseModel):
     id: int
     member_id: int
@@ -279,6 +359,79 @@ MemberResponse.model_rebuild()
 SessionResponse.model_rebuild()
 
 
+# --- Audit log ---
+
+
+class AuditLogEntry(BaseModel):
+    id: int
+    entity: str
+    entity_id: int
+    field: str
+    old_value: Optional[str]
+    new_value: Optional[str]
+    changed_at: datetime
+    user_id: int
+    user: Optional[TrainerBasic] = None
+
+    model_config = {"from_attributes": True}
+
+
+# --- Member detail ---
+
+
+class MemberDetailResponse(BaseModel):
+    member: MemberResponse
+    packages: List[MemberPackageResponse]
+    recent_sessions: List[SessionResponse]
+    sessions_cursor: Optional[str] = None
+
+
+# --- Trainer availability ---
+
+
+class WorkingHoursEntry(BaseModel):
+    weekday: int = Field(ge=0, le=6)  # Monday=0
+    start_time: time
+    end_time: time
+
+    model_config = {"from_attributes": True}
+
+    @model_validator(mode="after")
+    def check_order(self) -> "WorkingHoursEntry":
+        if self.end_time <= self.start_time:
+            raise ValueError("end_time must be after start_time")
+        return self
+
+
+class AvailabilitySlot(BaseModel):
+    start: datetime
+    end: datetime
+
+
+# --- Trainer report ---
+
+
+class TrainerReportBucket(BaseModel):
+    period_start: datetime
+    scheduled: int
+    completed: int
+    no_show: int
+    cancelled: int
+    utilization_hours: float
+
+
+class TrainerReport(BaseModel):
+    trainer_id: int
+    trainer_name: str
+    scheduled: int
+    completed: int
+    no_show: int
+    cancelled: int
+    distinct_members: int
+    utilization_hours: float  # booked time, cancelled sessions excluded
+    buckets: List[TrainerReportBucket] = []
+
+
 # --- Dashboard ---
 
 
@@ -289,6 +442,16 @@ class DashboardStats(BaseModel):
     active_members: int
 
 
+class BranchStats(DashboardStats):
+    gym_id: int
+    gym_name: str
+
+
+class ChainDashboard(BaseModel):
+    totals: DashboardStats
+    branches: List[BranchStats]
+
+
 class TodaySession(BaseModel):
     id: int
     scheduled_at: datetime
@@ -306,3 +469,87 @@ class ExpiringPackage(BaseModel):
     package_name: str
     sessions_remaining: int
     expiry_date: date
+
+
+class RetentionMember(BaseModel):
+    member_id: int
+    member_name: str
+    status: str
+    latest_expiry_date: date
+    sessions_remaining: int
+    recent_sessions: int
+    previous_sessions: int
+    low_sessions: bool
+    near_expiry: bool
+    falling_attendance: bool
+    last_days_to_renewal: Optional[int]
+
+
+class RenewalBucket(BaseModel):
+    label: str
+    members: int
+
+
+class RetentionReport(BaseModel):
+    computed_at: Optional[datetime]  # None until the first nightly run
+    active: int = 0
+    at_risk: int = 0
+    churned: int = 0
+    # Members by their average days from one package's expiry to the next start.
+    renewal_distribution: List[RenewalBucket] = []
+    at_risk_members: List[RetentionMember] = []
+    churned_members: List[RetentionMember] = []
+
+
+# --- Deferred revenue ---
+
+
+class DeferredRevenueLine(BaseModel):
+    id: Optional[int]  # package or trainer id; None for members without a trainer
+    name: Optional[str]
+    liability: int
+    sessions_remaining: int
+    packages: int
+
+
+class DeferredRevenueReport(BaseModel):
+    as_of: date
+    liability: int
+    sessions_remaining: int
+    packages: int
+    by_package: List[DeferredRevenueLine] = []
+    by_trainer: List[DeferredRevenueLine] = []
+
+
+class DeferredRevenuePoint(BaseModel):
+    snapshot_date: date
+    liability: int
+    sessions_remaining: int
+    packages: int
+
+    model_config = {"from_attributes": True}
+
+
+# --- Request tracing ---
+
+
+class TraceSpan(BaseModel):
+    name: str
+    start_ms: float
+    duration_ms: float
+    detail: Optional[str] = None
+
+    model_config = {"from_attributes": True}
+
+
+class TraceEntry(BaseModel):
+    trace_id: str
+    method: str
+    path: str
+    route: Optional[str]
+    status_code: Optional[int]
+    started_at: datetime
+    duration_ms: float
+    spans: List[TraceSpan] = []
+
+    model_config = {"from_attributes": True}
@@ -0,0 +1,45 @@
+from typing import Annotated, List, Optional
+
+from fastapi import APIRouter, Depends, Query, Response
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+
+from models.database import AuditLog, User
+from models.schemas import AuditLogEntry
+from services.auth import require_owner
+from services.connection_hold import ReleasingRoute, get_db
+
+router = APIRouter(route_class=ReleasingRoute)
+
+
+@router.get("", response_model=List[AuditLogEntry])
+async def list_audit_log(
+    response: Response,
+    current_user: Annotated[User, Depends(require_owner)],
+    db: AsyncSession = Depends(get_db),
+    entity: Optional[str] = Query(default=None),
+    entity_id: Optional[int] = Query(default=None),
+    cursor: Optional[int] = Query(default=None),
+    limit: int = Query(default=50, ge=1, le=200),
+):
+    # Newest first; the cursor is the id of the last entry served.
+    query = (
+        select(AuditLog)
+        .where(AuditLog.gym_id == current_user.gym_id)
+        .options(selectinload(AuditLog.user))
+        .order_by(AuditLog.id.desc())
+        .limit(limit + 1)
+    )
+    if entity:
+        query = query.where(AuditLog.entity == entity)
+    if entity_id is not None:
+        query = query.where(AuditLog.entity_id == entity_id)
+    if cursor is not None:
+        query = query.where(AuditLog.id < cursor)
+
+    entries = (await db.execute(query)).scalars().all()
+    if len(entries) > limit:
+        entries = entries[:limit]
+        response.headers["X-Next-Cursor"] = str(entries[-1].id)
+    return entries
@@ -4,7 +4,7 @@ from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from models.database import Gym, User, UserRole, get_db
+from models.database import Gym, OwnerGym, User, UserRole
 from models.schemas import Token, UserCreate, UserLogin, UserResponse
 from services.auth import (
     create_access_token,
@@ -12,14 +12,18 @@ from services.auth import (
     get_password_hash,
     verify_password,
 )
+from services.connection_hold import ReleasingRoute, get_db
 
-router = APIRouter()
+router = APIRouter(route_class=ReleasingRoute)
 
 
 @router.post(
     "/register", response_model=UserResponse, status_code=status.HTTP_201_CREATED
 )
 async def register(payload: UserCreate, db: AsyncSession = Depends(get_db)):
+    # Hash before the first query: bcrypt is slow and would otherwise run while
+    # the session holds a pooled connection.
+    hashed_password = get_password_hash(payload.password)
     existing = await db.execute(select(User).where(User.email == payload.email))
     if existing.scalar_one_or_none():
         raise HTTPException(
@@ -36,12 +40,14 @@ async def register(payload: UserCreate, db: AsyncSession = Depends(get_db)):
     user = User(
         gym_id=gym.id,
         email=payload.email,
-        hashed_password=get_password_hash(payload.password),
+        hashed_password=hashed_password,
         name=payload.name,
         phone=payload.phone,
         role=UserRole.owner,
     )
     db.add(user)
+    await db.flush()
+    db.add(OwnerGym(user_id=user.id, gym_id=gym.id))
     await db.commit()
     await db.refresh(user)
     return user
@@ -53,6 +59,8 @@ async def login(payload: UserLogin, db: AsyncSession = Depends(get_db)):
         select(User).where(User.email == payload.email, User.is_active == True)
     )
     user = result.scalar_one_or_none()
+    # Nothing else to read; release the connection before the bcrypt check.
+    await db.close()
     if not user or not verify_password(payload.password, user.hashed_password):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid credentials"
@@ -1,105 +1,149 @@
 from datetime import date, datetime, time, timedelta
-from typing import Annotated, List
+from typing import Annotated, Dict, List, Optional
 
-from fastapi import APIRouter, Depends
-from sqlalchemy import func, select
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy import and_, case, func, select
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 
+from config import settings
 from models.database import (
     Member,
     MemberPackage,
+    MemberRetention,
     PaymentStatus,
     Session,
     SessionStatus,
     User,
     UserRole,
-    get_db,
+    async_session_maker,
+)
+from models.schemas import (
+    BranchStats,
+    ChainDashboard,
+    DashboardStats,
+    ExpiringPackage,
+    RenewalBucket,
+    RetentionMember,
+    RetentionReport,
+    TodaySession,
 )
-from models.schemas import DashboardStats, ExpiringPackage, TodaySession
 from services.auth import get_current_user
+from services.branches import branch_gyms
+from services.cache import registry
+from services.connection_hold import ReleasingRoute, get_db
+from services.singleflight import singleflight
 
-router = APIRouter()
+router = APIRouter(route_class=ReleasingRoute)
 
+_stats_cache = registry.create(
+    "dashboard_stats",
+    settings.cache_ttl_seconds,
+    depends_on=("member", "member_package", "session"),
+)
 
-@router.get("", response_model=DashboardStats)
-async def get_dashboard_stats(
-    current_user: Annotated[User, Depends(get_current_user)],
-    db: AsyncSession = Depends(get_db),
-):
-    today = date.today()
+# Dashboard reads are coalesced per (route, gym, trainer scope, day): identical
+# concurrent requests share one query. Loaders open their own session because
+# the shared result must not depend on any single caller's request lifetime.
+
+
+def _trainer_scope(user: User) -> Optional[int]:
+    return user.id if user.role == UserRole.trainer else None
+
+
+async def _load_branch_stats(
+    gym_ids: List[int], trainer_id: Optional[int], today: date
+) -> Dict[int, DashboardStats]:
+    # One query per metric, grouped by gym, however many branches are asked for.
+    # Generations are read first: an invalidation that lands mid-query means the
+    # result may predate the write, so it is returned but not cached.
+    generations = {gym_id: _stats_cache.generation(gym_id) for gym_id in gym_ids}
     day_start = datetime.combine(today, time.min)
     day_end = datetime.combine(today, time.max)
     week_end = today + timedelta(days=7)
 
     # Today's sessions count
     sessions_query = (
-        select(func.count(Session.id))
+        select(Member.gym_id, func.count(Session.id))
         .join(Member, Session.member_id == Member.id)
         .where(
-            Member.gym_id == current_user.gym_id,
+            Member.gym_id.in_(gym_ids),
             Session.scheduled_at.between(day_start, day_end),
             Session.status != SessionStatus.cancelled,
         )
     )
-    if current_user.role == UserRole.trainer:
-        sessions_query = sessions_query.where(Session.trainer_id == current_user.id)
-    today_sessions = (await db.execute(sessions_query)).scalar() or 0
+    if trainer_id is not None:
+        sessions_query = sessions_query.where(Session.trainer_id == trainer_id)
 
     # Expiring packages this week
     expiring_query = (
-        select(func.count(MemberPackage.id))
+        select(Member.gym_id, func.count(MemberPackage.id))
         .join(Member, MemberPackage.member_id == Member.id)
         .where(
-            Member.gym_id == current_user.gym_id,
+            Member.gym_id.in_(gym_ids),
             Member.is_active == True,
             MemberPackage.expiry_date >= today,
             MemberPackage.expiry_date <= week_end,
             MemberPackage.sessions_remaining > 0,
         )
     )
-    if current_user.role == UserRole.trainer:
-        expiring_query = expiring_query.where(Member.trainer_id == current_user.id)
-    expiring_count = (await db.execute(expiring_query)).scalar() or 0
+    if trainer_id is not None:
+        expiring_query = expiring_query.where(Member.trainer_id == trainer_id)
 
     # Members with unpaid/pending packages
     unpaid_query = (
-        select(func.count(func.distinct(MemberPackage.member_id)))
+        select(Member.gym_id, func.count(func.distinct(MemberPackage.member_id)))
         .join(Member, MemberPackage.member_id == Member.id)
         .where(
-            Member.gym_id == current_user.gym_id,
+            Member.gym_id.in_(gym_ids),
             Member.is_active == True,
             MemberPackage.payment_status.in_(
                 [PaymentStatus.pending, PaymentStatus.overdue]
             ),
         )
     )
-    if current_user.role == UserRole.trainer:
-        unpaid_query = unpaid_query.where(Member.trainer_id == current_user.id)
-    unpaid_members = (await db.execute(unpaid_query)).scalar() or 0
+    if trainer_id is not None:
+        unpaid_query = unpaid_query.where(Member.trainer_id == trainer_id)
 
     # Total active members
-    members_query = select(func.count(Member.id)).where(
-        Member.gym_id == current_user.gym_id, Member.is_active == True
-    )
-    if current_user.role == UserRole.trainer:
-        members_query = members_query.where(Member.trainer_id == current_user.id)
-    active_members = (await db.execute(members_query)).scalar() or 0
-
-    return DashboardStats(
-        today_sessions=today_sessions,
-        expiring_packages_this_week=expiring_count,
-        unpaid_members=unpaid_members,
-        active_members=active_members,
+    members_query = select(Member.gym_id, func.count(Member.id)).where(
+        Member.gym_id.in_(gym_ids), Member.is_active == True
     )
+    if trainer_id is not None:
+        members_query = members_query.where(Member.trainer_id == trainer_id)
 
+    async with async_session_maker() as db:
+        counts = [
+            dict((await db.execute(query.group_by(Member.gym_id))).all())
+            for query in (sessions_query, expiring_query, unpaid_query, members_query)
+        ]
 
-@router.get("/today", response_model=List[TodaySession])
-async def get_today_sessions(
-    current_user: Annotated[User, Depends(get_current_user)],
-    db: AsyncSession = Depends(get_db),
-):
-    today = date.today()
+    stats = {}
+    for gym_id in gym_ids:
+        today_sessions, expiring_count, unpaid_members, active_members = (
+            column.get(gym_id, 0) for column in counts
+        )
+        stats[gym_id] = DashboardStats(
+            today_sessions=today_sessions,
+            expiring_packages_this_week=expiring_count,
+            unpaid_members=unpaid_members,
+            active_members=active_members,
+        )
+        _stats_cache.set(
+            (gym_id, today, trainer_id), stats[gym_id], generations[gym_id]
+        )
+    return stats
+
+
+async def _load_stats(
+    gym_id: int, trainer_id: Optional[int], today: date
+) -> DashboardStats:
+    return (await _load_branch_stats([gym_id], trainer_id, today))[gym_id]
+
+
+async def _load_today_sessions(
+    gym_id: int, trainer_id: Optional[int], today: date
+) -> List[TodaySession]:
     day_start = datetime.combine(today, time.min)
     day_end = datetime.combine(today, time.max)
 
@@ -107,18 +151,19 @@ async def get_today_sessions(
         select(Session)
         .join(Member, Session.member_id == Member.id)
         .where(
-            Member.gym_id == current_user.gym_id,
+            Member.gym_id == gym_id,
             Session.scheduled_at.between(day_start, day_end),
             Session.status != SessionStatus.cancelled,
         )
         .options(selectinload(Session.member), selectinload(Session.trainer))
         .order_by(Session.scheduled_at)
     )
-    if current_user.role == UserRole.trainer:
-        query = query.where(Session.trainer_id == current_user.id)
+    if trainer_id is not None:
+        query = query.where(Session.trainer_id == trainer_id)
 
-    result = await db.execute(query)
-    sessions = result.scalars().all()
+    async with async_session_maker() as db:
+        result = await db.execute(query)
+        sessions = result.scalars().all()
 
     return [
         TodaySession(
@@ -133,19 +178,16 @@ async def get_today_sessions(
     ]
 
 
-@router.get("/expiring", response_model=List[ExpiringPackage])
-async def get_expiring_packages(
-    current_user: Annotated[User, Depends(get_current_user)],
-    db: AsyncSession = Depends(get_db),
-):
-    today = date.today()
+async def _load_expiring_packages(
+    gym_id: int, trainer_id: Optional[int], today: date
+) -> List[ExpiringPackage]:
     week_end = today + timedelta(days=7)
 
     query = (
         select(MemberPackage)
         .join(Member, MemberPackage.member_id == Member.id)
         .where(
-            Member.gym_id == current_user.gym_id,
+            Member.gym_id == gym_id,
             Member.is_active == True,
             MemberPackage.expiry_date >= today,
             MemberPackage.expiry_date <= week_end,
@@ -156,11 +198,12 @@ async def get_expiring_packages(
         )
         .order_by(MemberPackage.expiry_date)
     )
-    if current_user.role == UserRole.trainer:
-        query = query.where(Member.trainer_id == current_user.id)
+    if trainer_id is not None:
+        query = query.where(Member.trainer_id == trainer_id)
 
-    result = await db.execute(query)
-    packages = result.scalars().all()
+    async with async_session_maker() as db:
+        result = await db.execute(query)
+        packages = result.scalars().all()
 
     return [
         ExpiringPackage(
@@ -172,3 +215,177 @@ async def get_expiring_packages(
         )
         for mp in packages
     ]
+
+
+@router.get("", response_model=DashboardStats)
+async def get_dashboard_stats(
+    current_user: Annotated[User, Depends(get_current_user)],
+):
+    today = date.today()
+    trainer_scope = _trainer_scope(current_user)
+    cached = _stats_cache.get((current_user.gym_id, today, trainer_scope))
+    if cached is not None:
+        return cached
+
+    return await singleflight.do(
+        ("dashboard/stats", current_user.gym_id, trainer_scope, today),
+        lambda: _load_stats(current_user.gym_id, trainer_scope, today),
+    )
+
+
+@router.get("/chain", response_model=ChainDashboard)
+async def get_chain_dashboard(
+    current_user: Annotated[User, Depends(get_current_user)],
+    db: AsyncSession = Depends(get_db),
+):
+    if current_user.role != UserRole.owner:
+        raise HTTPException(status_code=403, detail="Owner only")
+
+    today = date.today()
+    gyms = await branch_gyms(db, current_user)
+    stats: Dict[int, DashboardStats] = {}
+    for gym in gyms:
+        cached = _stats_cache.get((gym.id, today, None))
+        if cached is not None:
+            stats[gym.id] = cached
+    missing = [gym.id for gym in gyms if gym.id not in stats]
+    if missing:
+        stats.update(
+            await singleflight.do(
+                ("dashboard/chain", tuple(missing), today),
+                lambda: _load_branch_stats(missing, None, today),
+            )
+        )
+
+    branches = [
+        BranchStats(gym_id=gym.id, gym_name=gym.name, **stats[gym.id].model_dump())
+        for gym in gyms
+    ]
+    totals = DashboardStats(
+        **{
+            field: sum(getattr(branch, field) for branch in branches)
+            for field in DashboardStats.model_fields
+        }
+    )
+    return ChainDashboard(totals=totals, branches=branches)
+
+
+@router.get("/today", response_model=List[TodaySession])
+async def get_today_sessions(
+    current_user: Annotated[User, Depends(get_current_user)],
+):
+    today = date.today()
+    trainer_scope = _trainer_scope(current_user)
+    return await singleflight.do(
+        ("dashboard/today", current_user.gym_id, trainer_scope, today),
+        lambda: _load_today_sessions(current_user.gym_id, trainer_scope, today),
+    )
+
+
+@router.get("/expiring", response_model=List[ExpiringPackage])
+async def get_expiring_packages(
+    current_user: Annotated[User, Depends(get_current_user)],
+):
+    today = date.today()
+    trainer_scope = _trainer_scope(current_user)
+    return await singleflight.do(
+        ("dashboard/expiring", current_user.gym_id, trainer_scope, today),
+        lambda: _load_expiring_packages(current_user.gym_id, trainer_scope, today),
+    )
+
+
+# (label, lower bound inclusive, upper bound exclusive) in days
+_RENEWAL_BUCKETS = [
+    ("renewed early", None, 0),
+    ("0-7 days", 0, 8),
+    ("8-30 days", 8, 31),
+    ("31-90 days", 31, 91),
+    ("over 90 days", 91, None),
+]
+
+
+def _renewal_bucket_column():
+    days = MemberRetention.avg_days_to_renewal
+    whens = []
+    for label, low, high in _RENEWAL_BUCKETS:
+        conditions = []
+        if low is not None:
+            conditions.append(days >= low)
+        if high is not None:
+            conditions.append(days < high)
+        whens.append((and_(*conditions), label))
+    return case(*whens)
+
+
+def _retention_member(row) -> RetentionMember:
+    snapshot, member_name = row
+    return RetentionMember(
+        member_id=snapshot.member_id,
+        member_name=member_name,
+        status=snapshot.status,
+        latest_expiry_date=snapshot.latest_expiry_date,
+        sessions_remaining=snapshot.sessions_remaining,
+        recent_sessions=snapshot.recent_sessions,
+        previous_sessions=snapshot.previous_sessions,
+        low_sessions=snapshot.low_sessions,
+        near_expiry=snapshot.near_expiry,
+        falling_attendance=snapshot.falling_attendance,
+        last_days_to_renewal=snapshot.last_days_to_renewal,
+    )
+
+
+@router.get("/retention", response_model=RetentionReport)
+async def get_retention(
+    current_user: Annotated[User, Depends(get_current_user)],
+    db: AsyncSession = Depends(get_db),
+):
+    # Reads only the nightly snapshot built by services.retention.
+    scope = [MemberRetention.gym_id == current_user.gym_id]
+    trainer_scope = _trainer_scope(current_user)
+    if trainer_scope is not None:
+        scope.append(MemberRetention.trainer_id == trainer_scope)
+
+    report = RetentionReport(computed_at=None)
+    status_rows = await db.execute(
+        select(
+            MemberRetention.status,
+            func.count(),
+            func.max(MemberRetention.computed_at),
+        )
+        .where(*scope)
+        .group_by(MemberRetention.status)
+    )
+    for status, count, computed_at in status_rows:
+        setattr(report, status, count)
+        report.computed_at = computed_at
+
+    bucket = _renewal_bucket_column().label("bucket")
+    bucket_rows = await db.execute(
+        select(bucket, func.count())
+        .where(*scope, MemberRetention.avg_days_to_renewal.is_not(None))
+        .group_by(bucket)
+    )
+    counts = dict(bucket_rows.all())
+    report.renewal_distribution = [
+        RenewalBucket(label=label, members=counts.get(label, 0))
+        for label, _, _ in _RENEWAL_BUCKETS
+    ]
+
+    def members_query(status: str, order_by):
+        return (
+            select(MemberRetention, Member.name)
+            .join(Member, MemberRetention.member_id == Member.id)
+            .where(*scope, MemberRetention.status == status)
+            .order_by(order_by)
+            .limit(settings.retention_list_limit)
+        )
+
+    at_risk = await db.execute(
+        members_query("at_risk", MemberRetention.latest_expiry_date)
+    )
+    report.at_risk_members = [_retention_member(row) for row in at_risk]
+    churned = await db.execute(
+        members_query("churned", MemberRetention.latest_expiry_date.desc())
+    )
+    report.churned_members = [_retention_member(row) for row in churned]
+    return report
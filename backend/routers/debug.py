@@ -0,0 +1,21 @@
+from typing import Annotated, List
+
+from fastapi import APIRouter, Depends, Query
+
+from models.database import User
+from models.schemas import TraceEntry
+from services.auth import require_owner
+from services.connection_hold import ReleasingRoute
+from services.tracing import trace_buffer
+
+router = APIRouter(route_class=ReleasingRoute)
+
+
+@router.get("/traces", response_model=List[TraceEntry])
+async def list_traces(
+    current_user: Annotated[User, Depends(require_owner)],
+    limit: int = Query(default=50, ge=1, le=500),
+    min_duration_ms: float = Query(default=0, ge=0),
+):
+    """Recently sampled requests made by this gym's users, newest first."""
+    return trace_buffer.recent(current_user.gym_id, limit, min_duration_ms)
@@ -0,0 +1,67 @@
+from typing import Annotated, List
+
+from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from models.database import Gym, User
+from models.schemas import GymCreate, GymResponse, Token
+from services.auth import create_access_token, get_current_user, require_owner
+from services.branches import branch_gyms, link_branch
+from services.connection_hold import ReleasingRoute, get_db
+
+router = APIRouter(route_class=ReleasingRoute)
+
+
+@router.get("", response_model=List[GymResponse])
+async def list_gyms(
+    current_user: Annotated[User, Depends(get_current_user)],
+    db: AsyncSession = Depends(get_db),
+):
+    return await branch_gyms(db, current_user)
+
+
+@router.post("", response_model=GymResponse, status_code=status.HTTP_201_CREATED)
+async def create_gym(
+    payload: GymCreate,
+    current_user: Annotated[User, Depends(require_owner)],
+    db: AsyncSession = Depends(get_db),
+):
+    gym = Gym(
+        name=payload.name,
+        type=payload.type,
+        address=payload.address,
+        phone=payload.phone,
+    )
+    db.add(gym)
+    await db.flush()
+    await link_branch(db, current_user.id, current_user.gym_id)
+    await link_branch(db, current_user.id, gym.id)
+    await db.commit()
+    await db.refresh(gym)
+    return gym
+
+
+@router.post("/{gym_id}/switch", response_model=Token)
+async def switch_gym(
+    gym_id: int,
+    current_user: Annotated[User, Depends(require_owner)],
+    db: AsyncSession = Depends(get_db),
+):
+    """Return a token that acts on branch ``gym_id``.
+
+    Only requests made with the new token switch; the owner's other tokens and
+    tabs stay on their own branch, and login still starts at the home branch.
+    """
+    if gym_id not in {gym.id for gym in await branch_gyms(db, current_user)}:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Gym not found"
+        )
+
+    token = create_access_token(
+        {
+            "sub": str(current_user.id),
+            "gym_id": str(gym_id),
+            "role": current_user.role.value,
+        }
+    )
+    return Token(access_token=token)
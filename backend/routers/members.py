@@ -1,21 +1,54 @@
-from typing import Annotated, List
+import asyncio
+from datetime import date, datetime
+from itertools import chain
+from typing import Annotated, List, Optional, Tuple
 
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy import select
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
+from fastapi.responses import JSONResponse
+from sqlalchemy import or_, select, tuple_
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import selectinload
+from sqlalchemy.orm import noload, selectinload
+from sqlalchemy.orm.attributes import set_committed_value
 
-from models.database import Member, MemberPackage, Session, User, UserRole, get_db
+from models.database import (
+    Member,
+    MemberPackage,
+    MemberPackageArchive,
+    Session,
+    SessionArchive,
+    User,
+    UserRole,
+    async_session_maker,
+)
 from models.schemas import (
+    ListFormat,
     MemberCreate,
+    MemberDetailResponse,
     MemberPackageResponse,
+    MemberPackageSummary,
     MemberResponse,
+    MemberSort,
     MemberUpdate,
     SessionResponse,
+    SortOrder,
 )
 from services.auth import get_current_user
+from services.columnar import to_columnar
+from services.connection_hold import ReleasingRoute, get_db
+from services.invalidation import publish_change
+
+router = APIRouter(route_class=ReleasingRoute)
 
-router = APIRouter()
+
+# Sort keys map to columns kept current by services.member_stats, so filtering
+# and ordering the list never joins packages or sessions.
+_SORT_COLUMNS = {
+    "name": Member.name,
+    "sessions_remaining": Member.sessions_remaining,
+    "last_visit": Member.last_visit_at,
+    "next_session": Member.next_session_at,
+    "created_at": Member.created_at,
+}
 
 
 def _member_query(gym_id: int, user: User):
@@ -29,13 +62,95 @@ def _member_query(gym_id: int, user: User):
     return query
 
 
+def _filter_members(
+    query,
+    has_active_package: Optional[bool],
+    has_upcoming_session: Optional[bool],
+    sort: Optional[MemberSort],
+    order: SortOrder,
+):
+    if has_active_package is not None:
+        active = Member.active_package_until >= date.today()
+        if has_active_package:
+            query = query.where(active)
+        else:
+            query = query.where(or_(Member.active_package_until.is_(None), ~active))
+    if has_upcoming_session is not None:
+        # Sessions that have already started are cleared by the repair pass.
+        upcoming = Member.next_session_at >= datetime.now()
+        if has_upcoming_session:
+            query = query.where(upcoming)
+        else:
+            query = query.where(or_(Member.next_session_at.is_(None), ~upcoming))
+    if sort:
+        column = _SORT_COLUMNS[sort]
+        direction = column.desc() if order == "desc" else column.asc()
+        tiebreak = Member.id.desc() if order == "desc" else Member.id.asc()
+        query = query.order_by(direction.nulls_last(), tiebreak)
+    return query
+
+
+# Session history cursors are "<scheduled_at ISO>_<id>" of the last row served;
+# the next page continues strictly before it in (scheduled_at, id) order.
+
+
+def _encode_cursor(session) -> str:
+    return f"{session.scheduled_at.isoformat()}_{session.id}"
+
+
+def _decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    try:
+        scheduled_at, session_id = cursor.rsplit("_", 1)
+        return datetime.fromisoformat(scheduled_at), int(session_id)
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor"
+        )
+
+
+def _session_page_query(
+    model, member_id: int, cursor: Optional[str], limit: Optional[int]
+):
+    query = (
+        select(model)
+        .where(model.member_id == member_id)
+        .order_by(model.scheduled_at.desc(), model.id.desc())
+    )
+    if cursor:
+        query = query.where(
+            tuple_(model.scheduled_at, model.id) < tuple_(*_decode_cursor(cursor))
+        )
+    if limit:
+        # One extra row tells us whether another page exists.
+        query = query.limit(limit + 1)
+    return query
+
+
 @router.get("", response_model=List[MemberResponse])
 async def list_members(
     current_user: Annotated[User, Depends(get_current_user)],
     db: AsyncSession = Depends(get_db),
+    response_format: ListFormat = Query(default="json", alias="format"),
+    has_active_package: Optional[bool] = None,
+    has_upcoming_session: Optional[bool] = None,
+    sort: Optional[MemberSort] = None,
+    order: SortOrder = "asc",
 ):
-    result = await db.execute(_member_query(current_user.gym_id, current_user))
-    return result.scalars().all()
+    query = _filter_members(
+        _member_query(current_user.gym_id, current_user),
+        has_active_package,
+        has_upcoming_session,
+        sort,
+        order,
+    )
+    result = await db.execute(query)
+    members = result.scalars().all()
+    if response_format == "columnar":
+        rows = [
+            MemberResponse.model_validate(m).model_dump(mode="json") for m in members
+        ]
+        return JSONResponse(to_columnar(rows, side_tables=("trainer",)))
+    return members
 
 
 @router.post("", response_model=MemberResponse, status_code=status.HTTP_201_CREATED)
@@ -67,6 +182,7 @@ async def create_member(
         goals=payload.goals,
     )
     db.add(member)
+    await publish_change(db, current_user.gym_id, "member")
     await db.commit()
     result = await db.execute(
         select(Member)
@@ -136,6 +252,7 @@ async def update_member(
     for field, value in payload.model_dump(exclude_unset=True).items():
         setattr(member, field, value)
 
+    await publish_change(db, current_user.gym_id, "member", member.id)
     await db.commit()
     result = await db.execute(
         select(Member)
@@ -167,14 +284,19 @@ async def deactivate_member(
         )
 
     member.is_active = False
+    await publish_change(db, current_user.gym_id, "member", member.id)
     await db.commit()
 
 
 @router.get("/{member_id}/sessions", response_model=List[SessionResponse])
 async def get_member_sessions(
     member_id: int,
+    response: Response,
     current_user: Annotated[User, Depends(get_current_user)],
     db: AsyncSession = Depends(get_db),
+    include_archived: bool = Query(default=False),
+    cursor: Optional[str] = Query(default=None),
+    limit: Optional[int] = Query(default=None, ge=1, le=200),
 ):
     member_result = await db.execute(
         select(Member).where(
@@ -192,12 +314,24 @@ async def get_member_sessions(
         )
 
     result = await db.execute(
-        select(Session)
-        .where(Session.member_id == member_id)
-        .options(selectinload(Session.trainer))
-        .order_by(Session.scheduled_at.desc())
+        _session_page_query(Session, member_id, cursor, limit).options(
+            selectinload(Session.member), selectinload(Session.trainer)
+        )
     )
-    return result.scalars().all()
+    sessions = list(result.scalars().all())
+    if include_archived:
+        archived = await db.execute(
+            _session_page_query(SessionArchive, member_id, cursor, limit).options(
+                selectinload(SessionArchive.member),
+                selectinload(SessionArchive.trainer),
+            )
+        )
+        sessions.extend(archived.scalars().all())
+        sessions.sort(key=lambda s: (s.scheduled_at, s.id), reverse=True)
+    if limit and len(sessions) > limit:
+        sessions = sessions[:limit]
+        response.headers["X-Next-Cursor"] = _encode_cursor(sessions[-1])
+    return sessions
 
 
 @router.get("/{member_id}/packages", response_model=List[MemberPackageResponse])
@@ -205,6 +339,7 @@ async def get_member_packages(
     member_id: int,
     current_user: Annotated[User, Depends(get_current_user)],
     db: AsyncSession = Depends(get_db),
+    include_archived: bool = Query(default=False),
 ):
     member_result = await db.execute(
         select(Member).where(
@@ -230,4 +365,88 @@ async def get_member_packages(
         )
         .order_by(MemberPackage.created_at.desc())
     )
-    return result.scalars().all()
+    packages = list(result.scalars().all())
+    if include_archived:
+        archived = await db.execute(
+            select(MemberPackageArchive)
+            .where(MemberPackageArchive.member_id == member_id)
+            .options(
+                selectinload(MemberPackageArchive.member),
+                selectinload(MemberPackageArchive.package),
+            )
+        )
+        packages.extend(archived.scalars().all())
+        packages.sort(key=lambda mp: mp.created_at, reverse=True)
+    return packages
+
+
+@router.get("/{member_id}/detail", response_model=MemberDetailResponse)
+async def get_member_detail(
+    member_id: int,
+    current_user: Annotated[User, Depends(get_current_user)],
+    db: AsyncSession = Depends(get_db),
+    sessions_limit: int = Query(default=20, ge=1, le=200),
+):
+    result = await db.execute(
+        select(Member)
+        .where(Member.id == member_id, Member.gym_id == current_user.gym_id)
+        .options(selectinload(Member.trainer), noload(Member.member_packages))
+    )
+    member = result.scalar_one_or_none()
+    if not member:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Member not found"
+        )
+    if current_user.role == UserRole.trainer and member.trainer_id != current_user.id:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN, detail="Access denied"
+        )
+
+    # An AsyncSession cannot run statements concurrently, so each independent
+    # load gets its own pooled connection.
+    async def load_packages() -> List[MemberPackage]:
+        async with async_session_maker() as session:
+            packages = await session.execute(
+                select(MemberPackage)
+                .where(MemberPackage.member_id == member_id)
+                .options(
+                    selectinload(MemberPackage.package),
+                    noload(MemberPackage.member),
+                )
+                .order_by(MemberPackage.created_at.desc())
+            )
+            return list(packages.scalars().all())
+
+    async def load_sessions() -> List[Session]:
+        async with async_session_maker() as session:
+            sessions = await session.execute(
+                _session_page_query(Session, member_id, None, sessions_limit).options(
+                    selectinload(Session.trainer), noload(Session.member)
+                )
+            )
+            return list(sessions.scalars().all())
+
+    packages, sessions = await asyncio.gather(load_packages(), load_sessions())
+    # Every row belongs to the member already loaded above; attach it rather
+    # than load it again, so the nested ``member`` matches the other endpoints.
+    for row in chain(packages, sessions):
+        set_committed_value(row, "member", member)
+
+    sessions_cursor = None
+    if len(sessions) > sessions_limit:
+        sessions = sessions[:sessions_limit]
+        sessions_cursor = _encode_cursor(sessions[-1])
+
+    member_response = MemberResponse.model_validate(member).model_copy(
+        update={
+            "member_packages": [
+                MemberPackageSummary.model_validate(mp) for mp in packages
+            ]
+        }
+    )
+    return MemberDetailResponse(
+        member=member_response,
+        packages=[MemberPackageResponse.model_validate(mp) for mp in packages],
+        recent_sessions=[SessionResponse.model_validate(s) for s in sessions],
+        sessions_cursor=sessions_cursor,
+    )
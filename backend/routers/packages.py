@@ -4,11 +4,19 @@ from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from models.database import Package, User, get_db
+from config import settings
+from models.database import Package, User
 from models.schemas import PackageCreate, PackageResponse, PackageUpdate
 from services.auth import get_current_user, require_owner
+from services.cache import registry
+from services.connection_hold import ReleasingRoute, get_db
+from services.invalidation import publish_change
 
-router = APIRouter()
+router = APIRouter(route_class=ReleasingRoute)
+
+_packages_cache = registry.create(
+    "packages", settings.cache_ttl_seconds, depends_on=("package",)
+)
 
 
 @router.get("", response_model=List[PackageResponse])
@@ -16,12 +24,19 @@ async def list_packages(
     current_user: Annotated[User, Depends(get_current_user)],
     db: AsyncSession = Depends(get_db),
 ):
+    cache_key = (current_user.gym_id,)
+    cached = _packages_cache.get(cache_key)
+    if cached is not None:
+        return cached
+
     result = await db.execute(
         select(Package).where(
             Package.gym_id == current_user.gym_id, Package.is_active == True
         )
     )
-    return result.scalars().all()
+    packages = [PackageResponse.model_validate(p) for p in result.scalars().all()]
+    _packages_cache.set(cache_key, packages)
+    return packages
 
 
 @router.post("", response_model=PackageResponse, status_code=status.HTTP_201_CREATED)
@@ -39,6 +54,7 @@ async def create_package(
         validity_days=payload.validity_days,
     )
     db.add(package)
+    await publish_change(db, current_user.gym_id, "package")
     await db.commit()
     await db.refresh(package)
     return package
@@ -65,6 +81,7 @@ async def update_package(
     for field, value in payload.model_dump(exclude_unset=True).items():
         setattr(package, field, value)
 
+    await publish_change(db, current_user.gym_id, "package", package.id)
     await db.commit()
     await db.refresh(package)
     return package
@@ -88,4 +105,5 @@ async def delete_package(
         )
 
     package.is_active = False
+    await publish_change(db, current_user.gym_id, "package", package.id)
     await db.commit()
@@ -1,27 +1,142 @@
-from datetime import timedelta
-from typing import Annotated, List
+from datetime import date, datetime, timedelta
+from typing import Annotated, Any, List, Optional, Tuple
+from urllib.parse import quote, unquote
 
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy import select
+from fastapi import (
+    APIRouter,
+    Depends,
+    File,
+    Header,
+    HTTPException,
+    Query,
+    Response,
+    UploadFile,
+    status,
+)
+from fastapi.responses import JSONResponse
+from sqlalchemy import func, select, tuple_, update
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import contains_eager, selectinload
+from starlette.concurrency import run_in_threadpool
 
-from models.database import Member, MemberPackage, Package, User, UserRole, get_db
+from models.database import (
+    DeferredRevenueSnapshot,
+    Member,
+    MemberPackage,
+    Package,
+    PaymentMethod,
+    PaymentStatus,
+    User,
+    UserRole,
+)
 from models.schemas import (
+    DeferredRevenueLine,
+    DeferredRevenuePoint,
+    DeferredRevenueReport,
+    ListFormat,
     MemberPackageCreate,
     MemberPackageResponse,
     MemberPackageUpdate,
+    PaymentSort,
+    ReconciliationAmbiguous,
+    ReconciliationLine,
+    ReconciliationMatch,
+    ReconciliationResult,
+    SortOrder,
 )
+from services import audit, idempotency
 from services.auth import get_current_user
+from services.columnar import to_columnar
+from services.connection_hold import ReleasingRoute, get_db
+from services.invalidation import publish_change
+from services.reconciliation import (
+    PendingTransfer,
+    StatementError,
+    match_statement,
+    parse_statement,
+)
+from services.revenue import liability_sum, outstanding_packages
+
+router = APIRouter(route_class=ReleasingRoute)
+
+_SORT_COLUMNS = {
+    "created_at": MemberPackage.created_at,
+    "start_date": MemberPackage.start_date,
+    "expiry_date": MemberPackage.expiry_date,
+    "price_paid": MemberPackage.price_paid,
+    "member_name": Member.name,
+}
 
-router = APIRouter()
+# List cursors are "<sort value>_<id>" of the last row served, percent-encoded
+# since member names are not latin-1 and headers must be; the next page
+# continues strictly after it in (sort column, id) order.
+_CURSOR_VALUES = {
+    "created_at": datetime.fromisoformat,
+    "start_date": date.fromisoformat,
+    "expiry_date": date.fromisoformat,
+    "price_paid": int,
+    "member_name": str,
+}
+
+
+def _encode_cursor(payment: MemberPackage, sort: str) -> str:
+    value = payment.member.name if sort == "member_name" else getattr(payment, sort)
+    if isinstance(value, (date, datetime)):
+        value = value.isoformat()
+    return quote(f"{value}_{payment.id}")
+
+
+def _decode_cursor(cursor: str, sort: str) -> Tuple[Any, int]:
+    try:
+        value, payment_id = unquote(cursor).rsplit("_", 1)
+        return _CURSOR_VALUES[sort](value), int(payment_id)
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor"
+        )
+
+
+def _date_range(column, date_from: Optional[date], date_to: Optional[date]):
+    """Inclusive bounds; a datetime column takes the whole of ``date_to``."""
+    conditions = []
+    if date_from:
+        conditions.append(column >= date_from)
+    if date_to:
+        if column is MemberPackage.created_at:
+            conditions.append(column < date_to + timedelta(days=1))
+        else:
+            conditions.append(column <= date_to)
+    return conditions
 
 
 @router.get("", response_model=List[MemberPackageResponse])
 async def list_payments(
+    response: Response,
     current_user: Annotated[User, Depends(get_current_user)],
     db: AsyncSession = Depends(get_db),
+    response_format: ListFormat = Query(default="json", alias="format"),
+    payment_status: Optional[List[PaymentStatus]] = Query(default=None),
+    payment_method: Optional[List[PaymentMethod]] = Query(default=None),
+    member_id: Optional[int] = None,
+    package_id: Optional[int] = None,
+    created_from: Optional[date] = None,
+    created_to: Optional[date] = None,
+    start_from: Optional[date] = None,
+    start_to: Optional[date] = None,
+    expiry_from: Optional[date] = None,
+    expiry_to: Optional[date] = None,
+    sort: PaymentSort = "created_at",
+    order: SortOrder = "desc",
+    cursor: Optional[str] = Query(default=None),
+    limit: Optional[int] = Query(default=None, ge=1, le=200),
 ):
+    """Payments in the gym, filtered and sorted in the database.
+
+    ``payment_status`` and ``payment_method`` may be repeated, e.g.
+    ``?payment_status=pending&payment_status=overdue`` for outstanding balances.
+    With ``limit`` the list is paged: ``X-Next-Cursor`` is set while more rows
+    remain and is passed back as ``cursor`` with the same filters and sort.
+    """
     query = (
         select(MemberPackage)
         .join(Member, MemberPackage.member_id == Member.id)
@@ -30,13 +145,51 @@ async def list_payments(
             contains_eager(MemberPackage.member),
             selectinload(MemberPackage.package),
         )
-        .order_by(MemberPackage.created_at.desc())
     )
     if current_user.role == UserRole.trainer:
         query = query.where(Member.trainer_id == current_user.id)
+    if payment_status:
+        query = query.where(MemberPackage.payment_status.in_(payment_status))
+    if payment_method:
+        query = query.where(MemberPackage.payment_method.in_(payment_method))
+    if member_id is not None:
+        query = query.where(MemberPackage.member_id == member_id)
+    if package_id is not None:
+        query = query.where(MemberPackage.package_id == package_id)
+    query = query.where(
+        *_date_range(MemberPackage.created_at, created_from, created_to),
+        *_date_range(MemberPackage.start_date, start_from, start_to),
+        *_date_range(MemberPackage.expiry_date, expiry_from, expiry_to),
+    )
+    column = _SORT_COLUMNS[sort]
+    key = tuple_(column, MemberPackage.id)
+    if order == "desc":
+        query = query.order_by(column.desc(), MemberPackage.id.desc())
+    else:
+        query = query.order_by(column.asc(), MemberPackage.id.asc())
+    if cursor:
+        after = tuple_(*_decode_cursor(cursor, sort))
+        query = query.where(key < after if order == "desc" else key > after)
+    if limit:
+        query = query.limit(limit + 1)
 
     result = await db.execute(query)
-    return result.scalars().all()
+    payments = result.scalars().all()
+    page_headers = {}
+    if limit and len(payments) > limit:
+        payments = payments[:limit]
+        page_headers["X-Next-Cursor"] = _encode_cursor(payments[-1], sort)
+    response.headers.update(page_headers)
+    if response_format == "columnar":
+        rows = [
+            MemberPackageResponse.model_validate(mp).model_dump(mode="json")
+            for mp in payments
+        ]
+        return JSONResponse(
+            to_columnar(rows, side_tables=("member", "package")),
+            headers=page_headers,
+        )
+    return payments
 
 
 @router.post(
@@ -46,7 +199,14 @@ async def create_payment(
     payload: MemberPackageCreate,
     current_user: Annotated[User, Depends(get_current_user)],
     db: AsyncSession = Depends(get_db),
+    idempotency_key: Optional[str] = Header(default=None, alias="Idempotency-Key"),
 ):
+    replay = await idempotency.claim(
+        db, current_user, idempotency_key, "POST /payments", payload
+    )
+    if replay is not None:
+        return replay
+
     member_result = await db.execute(
         select(Member).where(
             Member.id == payload.member_id,
@@ -88,7 +248,7 @@ async def create_payment(
         notes=payload.notes,
     )
     db.add(mp)
-    await db.commit()
+    await db.flush()
     result = await db.execute(
         select(MemberPackage)
         .where(MemberPackage.id == mp.id)
@@ -97,7 +257,197 @@ async def create_payment(
             selectinload(MemberPackage.package),
         )
     )
-    return result.scalar_one()
+    response = MemberPackageResponse.model_validate(result.scalar_one())
+    await idempotency.remember(
+        db, current_user, idempotency_key, response, status.HTTP_201_CREATED
+    )
+    await publish_change(db, current_user.gym_id, "member_package")
+    await db.commit()
+    return response
+
+
+@router.post("/reconcile", response_model=ReconciliationResult)
+async def reconcile_transfers(
+    current_user: Annotated[User, Depends(get_current_user)],
+    db: AsyncSession = Depends(get_db),
+    statement: UploadFile = File(...),
+    window_days: int = Query(default=7, ge=0, le=60),
+    dry_run: bool = Query(default=False),
+):
+    if current_user.role != UserRole.owner:
+        raise HTTPException(status_code=403, detail="Owner only")
+
+    # Parsing and matching are CPU-bound; keep them off the event loop.
+    raw = await statement.read()
+    try:
+        lines, invalid_lines = await run_in_threadpool(parse_statement, raw)
+    except StatementError as exc:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc))
+
+    pending_result = await db.execute(
+        select(
+            MemberPackage.id,
+            Member.name,
+            MemberPackage.price_paid,
+            MemberPackage.created_at,
+            MemberPackage.start_date,
+        )
+        .join(Member, MemberPackage.member_id == Member.id)
+        .where(
+            Member.gym_id == current_user.gym_id,
+            MemberPackage.payment_method == PaymentMethod.transfer,
+            MemberPackage.payment_status == PaymentStatus.pending,
+        )
+    )
+    pending = [
+        PendingTransfer(
+            member_package_id=mp_id,
+            member_name=member_name,
+            amount=price_paid,
+            reference_dates=(created_at.date(), start_date),
+        )
+        for mp_id, member_name, price_paid, created_at, start_date in pending_result
+    ]
+    result = await run_in_threadpool(match_statement, lines, pending, window_days)
+
+    if result.matched and not dry_run:
+        matched_ids = [transfer.member_package_id for _, transfer in result.matched]
+        updated = await db.execute(
+            update(MemberPackage)
+            .where(
+                MemberPackage.id.in_(matched_ids),
+                MemberPackage.payment_status == PaymentStatus.pending,
+            )
+            .values(payment_status=PaymentStatus.paid)
+            .returning(MemberPackage.id)
+            .execution_options(synchronize_session=False)
+        )
+        for mp_id in updated.scalars():
+            audit.record_change(
+                db,
+                "member_package",
+                mp_id,
+                "payment_status",
+                PaymentStatus.pending,
+                PaymentStatus.paid,
+            )
+        await publish_change(db, current_user.gym_id, "member_package")
+        await db.commit()
+
+    def line_fields(line):
+        return {
+            "line": line.line,
+            "transfer_date": line.transfer_date,
+            "amount": line.amount,
+            "payer_name": line.payer_name,
+        }
+
+    return ReconciliationResult(
+        dry_run=dry_run,
+        matched=[
+            ReconciliationMatch(
+                **line_fields(line),
+                member_package_id=transfer.member_package_id,
+                member_name=transfer.member_name,
+            )
+            for line, transfer in result.matched
+        ],
+        ambiguous=[
+            ReconciliationAmbiguous(
+                **line_fields(line),
+                candidate_ids=[t.member_package_id for t in candidates],
+            )
+            for line, candidates in result.ambiguous
+        ],
+        unmatched=[
+            ReconciliationLine(**line_fields(line)) for line in result.unmatched
+        ],
+        invalid_lines=invalid_lines,
+    )
+
+
+@router.get("/deferred-revenue", response_model=DeferredRevenueReport)
+async def deferred_revenue(
+    current_user: Annotated[User, Depends(get_current_user)],
+    db: AsyncSession = Depends(get_db),
+):
+    if current_user.role != UserRole.owner:
+        raise HTTPException(status_code=403, detail="Owner only")
+
+    today = date.today()
+    trainer = User.__table__.alias("trainer")
+    liability = func.round(liability_sum()).label("liability")
+    # One pass over the packages: GROUPING SETS yields the per-package rows, the
+    # per-trainer rows and the gym total together; grouping() tells them apart.
+    query = outstanding_packages(
+        select(
+            func.grouping(Package.id, Member.trainer_id).label("level"),
+            Package.id.label("package_id"),
+            Package.name.label("package_name"),
+            Member.trainer_id,
+            trainer.c.name.label("trainer_name"),
+            liability,
+            func.coalesce(func.sum(MemberPackage.sessions_remaining), 0).label(
+                "sessions_remaining"
+            ),
+            func.count(MemberPackage.id).label("packages"),
+        ),
+        today,
+    )
+    query = (
+        query.join(Package, MemberPackage.package_id == Package.id)
+        .outerjoin(trainer, Member.trainer_id == trainer.c.id)
+        .where(Member.gym_id == current_user.gym_id)
+        .group_by(
+            func.grouping_sets(
+                tuple_(Package.id, Package.name),
+                tuple_(Member.trainer_id, trainer.c.name),
+                tuple_(),
+            )
+        )
+        .order_by(liability.desc())
+    )
+
+    report = DeferredRevenueReport(
+        as_of=today, liability=0, sessions_remaining=0, packages=0
+    )
+    for row in await db.execute(query):
+        # level is a bitmask of the columns rolled up: 1 = trainer, 2 = package.
+        if row.level == 3:
+            report.liability = int(row.liability)
+            report.sessions_remaining = row.sessions_remaining
+            report.packages = row.packages
+            continue
+        by_package = row.level == 1
+        line = DeferredRevenueLine(
+            id=row.package_id if by_package else row.trainer_id,
+            name=row.package_name if by_package else row.trainer_name,
+            liability=int(row.liability),
+            sessions_remaining=row.sessions_remaining,
+            packages=row.packages,
+        )
+        (report.by_package if by_package else report.by_trainer).append(line)
+    return report
+
+
+@router.get("/deferred-revenue/history", response_model=List[DeferredRevenuePoint])
+async def deferred_revenue_history(
+    current_user: Annotated[User, Depends(get_current_user)],
+    db: AsyncSession = Depends(get_db),
+    days: int = Query(default=90, ge=1, le=730),
+):
+    if current_user.role != UserRole.owner:
+        raise HTTPException(status_code=403, detail="Owner only")
+
+    result = await db.execute(
+        select(DeferredRevenueSnapshot)
+        .where(
+            DeferredRevenueSnapshot.gym_id == current_user.gym_id,
+            DeferredRevenueSnapshot.snapshot_date > date.today() - timedelta(days=days),
+        )
+        .order_by(DeferredRevenueSnapshot.snapshot_date)
+    )
+    return result.scalars().all()
 
 
 @router.get("/{payment_id}", response_model=MemberPackageResponse)
@@ -150,6 +500,7 @@ async def delete_payment(
         )
 
     await db.delete(mp)
+    await publish_change(db, current_user.gym_id, "member_package", mp.id)
     await db.commit()
 
 
@@ -187,6 +538,7 @@ async def update_payment(
     for field, value in payload.model_dump(exclude_unset=True).items():
         setattr(mp, field, value)
 
+    await publish_change(db, current_user.gym_id, "member_package", mp.id)
     await db.commit()
     result = await db.execute(
         select(MemberPackage)
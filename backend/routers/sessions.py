@@ -1,8 +1,8 @@
-from datetime import date, datetime, time
-from typing import Annotated, List, Optional
+from datetime import date, datetime, time, timedelta
+from typing import Annotated, Dict, List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, Query, status
-from sqlalchemy import select
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, status
+from sqlalchemy import Integer, case, cast, column, func, select, update, values
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 
@@ -13,12 +13,24 @@ from models.database import (
     SessionStatus,
     User,
     UserRole,
-    get_db,
 )
-from models.schemas import SessionCreate, SessionResponse, SessionUpdate
+from models.schemas import (
+    CalendarDay,
+    CalendarResponse,
+    CalendarSession,
+    PackageBalance,
+    SessionBulkResult,
+    SessionBulkUpdate,
+    SessionCreate,
+    SessionResponse,
+    SessionUpdate,
+)
+from services import audit, idempotency, member_stats
 from services.auth import get_current_user
+from services.connection_hold import ReleasingRoute, get_db
+from services.invalidation import publish_change
 
-router = APIRouter()
+router = APIRouter(route_class=ReleasingRoute)
 
 
 @router.get("", response_model=List[SessionResponse])
@@ -45,12 +57,92 @@ async def list_sessions(
     return result.scalars().all()
 
 
+@router.get("/calendar", response_model=CalendarResponse)
+async def get_calendar(
+    current_user: Annotated[User, Depends(get_current_user)],
+    db: AsyncSession = Depends(get_db),
+    date_from: date = Query(alias="from"),
+    date_to: date = Query(alias="to"),
+    trainer_id: Optional[int] = Query(default=None),
+):
+    if date_to < date_from:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="'to' must not be before 'from'",
+        )
+    if (date_to - date_from).days > 62:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Range cannot exceed 62 days",
+        )
+    if current_user.role == UserRole.trainer:
+        trainer_id = current_user.id
+
+    # Plain column rows with both names joined in: one statement, no ORM
+    # objects and no per-relationship follow-up queries.
+    query = (
+        select(
+            Session.id,
+            Session.member_id,
+            Session.trainer_id,
+            Session.member_package_id,
+            Session.scheduled_at,
+            Session.duration_minutes,
+            Session.status,
+            Member.name.label("member_name"),
+            User.name.label("trainer_name"),
+        )
+        .join(Member, Session.member_id == Member.id)
+        .join(User, Session.trainer_id == User.id)
+        .where(
+            Member.gym_id == current_user.gym_id,
+            Session.scheduled_at >= datetime.combine(date_from, time.min),
+            Session.scheduled_at
+            < datetime.combine(date_to + timedelta(days=1), time.min),
+        )
+        .order_by(Session.scheduled_at, Session.id)
+    )
+    if trainer_id is not None:
+        query = query.where(Session.trainer_id == trainer_id)
+
+    members: Dict[int, str] = {}
+    trainers: Dict[int, str] = {}
+    days: Dict[date, List[CalendarSession]] = {}
+    for row in await db.execute(query):
+        members[row.member_id] = row.member_name
+        trainers[row.trainer_id] = row.trainer_name
+        days.setdefault(row.scheduled_at.date(), []).append(
+            CalendarSession(
+                id=row.id,
+                member_id=row.member_id,
+                trainer_id=row.trainer_id,
+                member_package_id=row.member_package_id,
+                scheduled_at=row.scheduled_at,
+                duration_minutes=row.duration_minutes,
+                status=row.status,
+            )
+        )
+
+    return CalendarResponse(
+        members=members,
+        trainers=trainers,
+        days=[CalendarDay(date=day, sessions=items) for day, items in days.items()],
+    )
+
+
 @router.post("", response_model=SessionResponse, status_code=status.HTTP_201_CREATED)
 async def create_session(
     payload: SessionCreate,
     current_user: Annotated[User, Depends(get_current_user)],
     db: AsyncSession = Depends(get_db),
+    idempotency_key: Optional[str] = Header(default=None, alias="Idempotency-Key"),
 ):
+    replay = await idempotency.claim(
+        db, current_user, idempotency_key, "POST /sessions", payload
+    )
+    if replay is not None:
+        return replay
+
     member_result = await db.execute(
         select(Member).where(
             Member.id == payload.member_id,
@@ -96,13 +188,157 @@ async def create_session(
         notes=payload.notes,
     )
     db.add(session)
-    await db.commit()
+    await db.flush()
     result = await db.execute(
         select(Session)
         .where(Session.id == session.id)
         .options(selectinload(Session.member), selectinload(Session.trainer))
     )
-    return result.scalar_one()
+    response = SessionResponse.model_validate(result.scalar_one())
+    await idempotency.remember(
+        db, current_user, idempotency_key, response, status.HTTP_201_CREATED
+    )
+    await publish_change(db, current_user.gym_id, "session")
+    await db.commit()
+    return response
+
+
+@router.patch("/bulk", response_model=SessionBulkResult)
+async def bulk_update_status(
+    payload: SessionBulkUpdate,
+    current_user: Annotated[User, Depends(get_current_user)],
+    db: AsyncSession = Depends(get_db),
+):
+    requested = {change.id: change.status for change in payload.updates}
+    if len(requested) != len(payload.updates):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Each session may appear only once",
+        )
+
+    # One query for access and current state; the rows stay locked until
+    # commit so a concurrent update_session cannot double-count a package.
+    result = await db.execute(
+        select(
+            Session.id,
+            Session.member_id,
+            Session.trainer_id,
+            Session.member_package_id,
+            Session.status,
+        )
+        .join(Member, Session.member_id == Member.id)
+        .where(Session.id.in_(requested), Member.gym_id == current_user.gym_id)
+        .with_for_update(of=Session)
+    )
+    rows = result.all()
+    missing = set(requested) - {row.id for row in rows}
+    if missing:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Sessions not found: {sorted(missing)}",
+        )
+    if current_user.role == UserRole.trainer and any(
+        row.trainer_id != current_user.id for row in rows
+    ):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN, detail="Access denied"
+        )
+
+    changed = [row for row in rows if requested[row.id] != row.status]
+    # Same rules as update_session: completing uses a session, un-completing
+    # gives it back. Tallied per package for a single UPDATE below.
+    used: Dict[int, int] = {}
+    restored: Dict[int, int] = {}
+    for row in changed:
+        if not row.member_package_id:
+            continue
+        if requested[row.id] == SessionStatus.completed:
+            used[row.member_package_id] = used.get(row.member_package_id, 0) + 1
+        elif row.status == SessionStatus.completed:
+            restored[row.member_package_id] = restored.get(row.member_package_id, 0) + 1
+
+    balances: List[PackageBalance] = []
+    if changed:
+        await db.execute(
+            update(Session)
+            .where(Session.id.in_([row.id for row in changed]))
+            .values(
+                status=cast(
+                    case(
+                        {row.id: requested[row.id].value for row in changed},
+                        value=Session.id,
+                    ),
+                    Session.status.type,
+                )
+            )
+            .execution_options(synchronize_session=False)
+        )
+        for row in changed:
+            audit.record_change(
+                db, "session", row.id, "status", row.status, requested[row.id]
+            )
+        member_stats.touch(db, {row.member_id for row in changed})
+        await publish_change(db, current_user.gym_id, "session")
+
+    package_ids = sorted(used.keys() | restored.keys())
+    if package_ids:
+        deltas = values(
+            column("id", Integer),
+            column("restored", Integer),
+            column("used", Integer),
+            name="deltas",
+        ).data(
+            [
+                (mp_id, restored.get(mp_id, 0), used.get(mp_id, 0))
+                for mp_id in package_ids
+            ]
+        )
+        # Restores are applied before uses, and like update_session a package
+        # never drops below zero. ``previous`` exposes the pre-update balance
+        # to RETURNING for the audit log.
+        packages = MemberPackage.__table__
+        previous = packages.alias("previous")
+        updated = await db.execute(
+            update(packages)
+            .where(packages.c.id == deltas.c.id, previous.c.id == deltas.c.id)
+            .values(
+                sessions_remaining=func.greatest(
+                    packages.c.sessions_remaining + deltas.c.restored - deltas.c.used,
+                    0,
+                )
+            )
+            .returning(
+                packages.c.id,
+                previous.c.sessions_remaining,
+                packages.c.sessions_remaining,
+            )
+        )
+        for mp_id, old_remaining, new_remaining in updated.all():
+            if old_remaining != new_remaining:
+                audit.record_change(
+                    db,
+                    "member_package",
+                    mp_id,
+                    "sessions_remaining",
+                    old_remaining,
+                    new_remaining,
+                )
+            balances.append(
+                PackageBalance(
+                    member_package_id=mp_id, sessions_remaining=new_remaining
+                )
+            )
+        await publish_change(db, current_user.gym_id, "member_package")
+
+    await db.commit()
+    changed_ids = {row.id for row in changed}
+    return SessionBulkResult(
+        updated=[change for change in payload.updates if change.id in changed_ids],
+        unchanged=[
+            change.id for change in payload.updates if change.id not in changed_ids
+        ],
+        packages=balances,
+    )
 
 
 @router.put("/{session_id}", response_model=SessionResponse)
@@ -164,6 +400,11 @@ async def update_session(
             if mp:
                 mp.sessions_remaining += 1
 
+    await publish_change(db, current_user.gym_id, "session", session.id)
+    if session.member_package_id:
+        await publish_change(
+            db, current_user.gym_id, "member_package", session.member_package_id
+        )
     await db.commit()
     result = await db.execute(
         select(Session)
@@ -203,4 +444,9 @@ async def delete_session(
             mp.sessions_remaining += 1
 
     await db.delete(session)
+    await publish_change(db, current_user.gym_id, "session", session.id)
+    if session.member_package_id:
+        await publish_change(
+            db, current_user.gym_id, "member_package", session.member_package_id
+        )
     await db.commit()
@@ -1,14 +1,39 @@
-from typing import Annotated, List
+from datetime import date, datetime, time, timedelta
+from typing import Annotated, Dict, List, Literal, Optional, Tuple
 
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy import select
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy import delete, func, literal_column, or_, select, tuple_
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from models.database import User, UserRole, get_db
-from models.schemas import TrainerCreate, TrainerUpdate, UserResponse
+from config import settings
+from models.database import (
+    Member,
+    Session,
+    SessionStatus,
+    TrainerWorkingHours,
+    User,
+    UserRole,
+)
+from models.schemas import (
+    AvailabilitySlot,
+    TrainerCreate,
+    TrainerReport,
+    TrainerReportBucket,
+    TrainerUpdate,
+    UserResponse,
+    WorkingHoursEntry,
+)
 from services.auth import get_current_user, get_password_hash
+from services.availability import free_slots, working_windows
+from services.cache import registry
+from services.connection_hold import ReleasingRoute, get_db
+from services.invalidation import publish_change
 
-router = APIRouter()
+router = APIRouter(route_class=ReleasingRoute)
+
+_report_cache = registry.create(
+    "trainer_report", settings.cache_ttl_seconds, depends_on=("session", "user")
+)
 
 
 @router.get("", response_model=List[UserResponse])
@@ -25,6 +50,116 @@ async def list_trainers(
     return result.scalars().all()
 
 
+@router.get("/report", response_model=List[TrainerReport])
+async def get_trainer_report(
+    current_user: Annotated[User, Depends(get_current_user)],
+    db: AsyncSession = Depends(get_db),
+    date_from: date = Query(alias="from"),
+    date_to: date = Query(alias="to"),
+    bucket: Literal["day", "week", "month"] = "month",
+):
+    if current_user.role != UserRole.owner:
+        raise HTTPException(status_code=403, detail="Owner only")
+    if date_to < date_from:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="'to' must not be before 'from'",
+        )
+
+    cache_key = (current_user.gym_id, date_from, date_to, bucket)
+    cached = _report_cache.get(cache_key)
+    if cached is not None:
+        return cached
+
+    range_start = datetime.combine(date_from, time.min)
+    range_end = datetime.combine(date_to + timedelta(days=1), time.min)
+
+    # bucket is whitelisted above; inlining it keeps the date_trunc expression
+    # textually identical between SELECT and GROUP BY.
+    period = func.date_trunc(literal_column(f"'{bucket}'"), Session.scheduled_at)
+
+    def status_count(session_status: SessionStatus):
+        return func.count(Session.id).filter(Session.status == session_status)
+
+    query = (
+        select(
+            Session.trainer_id,
+            User.name,
+            period.label("period_start"),
+            func.grouping(period).label("is_total"),
+            status_count(SessionStatus.scheduled),
+            status_count(SessionStatus.completed),
+            status_count(SessionStatus.no_show),
+            status_count(SessionStatus.cancelled),
+            func.count(func.distinct(Session.member_id)),
+            func.coalesce(
+                func.sum(Session.duration_minutes).filter(
+                    Session.status != SessionStatus.cancelled
+                ),
+                0,
+            ),
+        )
+        .join(User, Session.trainer_id == User.id)
+        .where(
+            User.gym_id == current_user.gym_id,
+            Session.scheduled_at >= range_start,
+            Session.scheduled_at < range_end,
+        )
+        .group_by(
+            func.grouping_sets(
+                tuple_(Session.trainer_id, User.name),
+                tuple_(Session.trainer_id, User.name, period),
+            )
+        )
+        .order_by(User.name, Session.trainer_id, period)
+    )
+    rows = (await db.execute(query)).all()
+
+    reports: Dict[int, TrainerReport] = {}
+    buckets: Dict[int, List[TrainerReportBucket]] = {}
+    for row in rows:
+        (
+            trainer_id,
+            trainer_name,
+            period_start,
+            is_total,
+            scheduled,
+            completed,
+            no_show,
+            cancelled,
+            distinct_members,
+            minutes,
+        ) = row
+        if is_total:
+            reports[trainer_id] = TrainerReport(
+                trainer_id=trainer_id,
+                trainer_name=trainer_name,
+                scheduled=scheduled,
+                completed=completed,
+                no_show=no_show,
+                cancelled=cancelled,
+                distinct_members=distinct_members,
+                utilization_hours=round(minutes / 60, 2),
+            )
+        else:
+            buckets.setdefault(trainer_id, []).append(
+                TrainerReportBucket(
+                    period_start=period_start,
+                    scheduled=scheduled,
+                    completed=completed,
+                    no_show=no_show,
+                    cancelled=cancelled,
+                    utilization_hours=round(minutes / 60, 2),
+                )
+            )
+    for trainer_id, report in reports.items():
+        report.buckets = buckets.get(trainer_id, [])
+
+    result = list(reports.values())
+    _report_cache.set(cache_key, result)
+    return result
+
+
 @router.post("", response_model=UserResponse, status_code=status.HTTP_201_CREATED)
 async def create_trainer(
     payload: TrainerCreate,
@@ -50,6 +185,7 @@ async def create_trainer(
         role=UserRole.trainer,
     )
     db.add(trainer)
+    await publish_change(db, current_user.gym_id, "user")
     await db.commit()
     await db.refresh(trainer)
     return trainer
@@ -83,6 +219,7 @@ async def update_trainer(
     if payload.is_active is not None:
         trainer.is_active = payload.is_active
 
+    await publish_change(db, current_user.gym_id, "user", trainer.id)
     await db.commit()
     await db.refresh(trainer)
     return trainer
@@ -109,4 +246,126 @@ async def deactivate_trainer(
         raise HTTPException(status_code=404, detail="Trainer not found")
 
     trainer.is_active = False
+    await publish_change(db, current_user.gym_id, "user", trainer.id)
+    await db.commit()
+
+
+async def _get_gym_trainer(db: AsyncSession, trainer_id: int, gym_id: int) -> User:
+    result = await db.execute(
+        select(User).where(User.id == trainer_id, User.gym_id == gym_id)
+    )
+    trainer = result.scalar_one_or_none()
+    if not trainer:
+        raise HTTPException(status_code=404, detail="Trainer not found")
+    return trainer
+
+
+@router.get("/{trainer_id}/working-hours", response_model=List[WorkingHoursEntry])
+async def get_working_hours(
+    trainer_id: int,
+    current_user: Annotated[User, Depends(get_current_user)],
+    db: AsyncSession = Depends(get_db),
+):
+    await _get_gym_trainer(db, trainer_id, current_user.gym_id)
+    result = await db.execute(
+        select(TrainerWorkingHours)
+        .where(TrainerWorkingHours.trainer_id == trainer_id)
+        .order_by(TrainerWorkingHours.weekday, TrainerWorkingHours.start_time)
+    )
+    return result.scalars().all()
+
+
+@router.put("/{trainer_id}/working-hours", response_model=List[WorkingHoursEntry])
+async def set_working_hours(
+    trainer_id: int,
+    payload: List[WorkingHoursEntry],
+    current_user: Annotated[User, Depends(get_current_user)],
+    db: AsyncSession = Depends(get_db),
+):
+    if current_user.role != UserRole.owner and current_user.id != trainer_id:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN, detail="Access denied"
+        )
+    await _get_gym_trainer(db, trainer_id, current_user.gym_id)
+
+    await db.execute(
+        delete(TrainerWorkingHours).where(TrainerWorkingHours.trainer_id == trainer_id)
+    )
+    db.add_all(
+        TrainerWorkingHours(trainer_id=trainer_id, **entry.model_dump())
+        for entry in payload
+    )
     await db.commit()
+    return sorted(payload, key=lambda entry: (entry.weekday, entry.start_time))
+
+
+@router.get("/{trainer_id}/availability", response_model=List[AvailabilitySlot])
+async def get_availability(
+    trainer_id: int,
+    current_user: Annotated[User, Depends(get_current_user)],
+    db: AsyncSession = Depends(get_db),
+    date_from: date = Query(alias="from"),
+    date_to: date = Query(alias="to"),
+    duration: int = Query(default=60, gt=0, le=24 * 60),
+    member_id: Optional[int] = Query(default=None),
+):
+    if date_to < date_from:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="'to' must not be before 'from'",
+        )
+    if (date_to - date_from).days > 62:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Range cannot exceed 62 days",
+        )
+    await _get_gym_trainer(db, trainer_id, current_user.gym_id)
+    if member_id is not None:
+        member = await db.execute(
+            select(Member.id).where(
+                Member.id == member_id, Member.gym_id == current_user.gym_id
+            )
+        )
+        if member.scalar_one_or_none() is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND, detail="Member not found"
+            )
+
+    hours_result = await db.execute(
+        select(
+            TrainerWorkingHours.weekday,
+            TrainerWorkingHours.start_time,
+            TrainerWorkingHours.end_time,
+        ).where(TrainerWorkingHours.trainer_id == trainer_id)
+    )
+    hours: Dict[int, List[Tuple[time, time]]] = {}
+    for weekday, start_time, end_time in hours_result:
+        hours.setdefault(weekday, []).append((start_time, end_time))
+    if not hours:
+        default = (settings.default_work_start, settings.default_work_end)
+        hours = {weekday: [default] for weekday in range(7)}
+
+    # One range query on the (trainer_id | member_id, scheduled_at) indexes.
+    # Start a day early so sessions running past midnight still block time.
+    range_start = datetime.combine(date_from - timedelta(days=1), time.min)
+    range_end = datetime.combine(date_to + timedelta(days=1), time.min)
+    participant = Session.trainer_id == trainer_id
+    if member_id is not None:
+        participant = or_(participant, Session.member_id == member_id)
+    sessions_result = await db.execute(
+        select(Session.scheduled_at, Session.duration_minutes).where(
+            participant,
+            Session.scheduled_at >= range_start,
+            Session.scheduled_at < range_end,
+            Session.status != SessionStatus.cancelled,
+        )
+    )
+    busy = [
+        (scheduled_at, scheduled_at + timedelta(minutes=minutes))
+        for scheduled_at, minutes in sessions_result
+    ]
+
+    slots = free_slots(
+        working_windows(date_from, date_to, hours), busy, timedelta(minutes=duration)
+    )
+    return [AvailabilitySlot(start=start, end=end) for start, end in slots]
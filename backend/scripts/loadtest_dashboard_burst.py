@@ -0,0 +1,89 @@
+"""Burst load test for the coalesced dashboard reads.
+
+Fires ``--concurrency`` identical requests at each dashboard endpoint at once,
+first with single-flight disabled and then enabled, and reports how many SQL
+statements reached the database. Needs a reachable database (DATABASE_URL)
+containing the given user::
+
+    cd backend && python -m scripts.loadtest_dashboard_burst --user-id 1
+"""
+
+import argparse
+import asyncio
+import time
+
+import httpx
+from sqlalchemy import event, select
+
+from config import settings
+from main import app
+from models.database import User, async_session_maker, engine
+from services.auth import create_access_token
+from services.cache import registry
+
+ENDPOINTS = ["/dashboard", "/dashboard/today", "/dashboard/expiring"]
+
+
+class StatementCounter:
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, *args, **kwargs) -> None:
+        self.count += 1
+
+
+async def _token_for(user_id: int) -> str:
+    async with async_session_maker() as db:
+        user = (await db.execute(select(User).where(User.id == user_id))).scalar_one()
+    return create_access_token(
+        {"sub": str(user.id), "gym_id": str(user.gym_id), "role": user.role.value}
+    )
+
+
+async def _burst(client: httpx.AsyncClient, path: str, concurrency: int) -> float:
+    started = time.perf_counter()
+    responses = await asyncio.gather(*(client.get(path) for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    statuses = {r.status_code for r in responses}
+    if statuses != {200}:
+        raise RuntimeError(f"{path}: unexpected statuses {statuses}")
+    return elapsed
+
+
+async def main(user_id: int, concurrency: int) -> None:
+    # The burst deliberately exceeds the per-user limits.
+    settings.admission_enabled = False
+    token = await _token_for(user_id)
+    counter = StatementCounter()
+    event.listen(engine.sync_engine, "before_cursor_execute", counter)
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(
+        transport=transport,
+        base_url="http://loadtest",
+        headers={"Authorization": f"Bearer {token}"},
+    ) as client:
+        print(f"{'endpoint':<22}{'singleflight':>14}{'statements':>12}{'seconds':>10}")
+        for enabled in (False, True):
+            settings.singleflight_enabled = enabled
+            for path in ENDPOINTS:
+                registry.clear_all()
+                counter.count = 0
+                elapsed = await _burst(client, path, concurrency)
+                print(
+                    f"{path:<22}{'on' if enabled else 'off':>14}"
+                    f"{counter.count:>12}{elapsed:>10.3f}"
+                )
+    print(
+        f"\n{concurrency} requests per burst; every request also runs one "
+        "get_current_user lookup, which is not coalesced."
+    )
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--user-id", type=int, required=True)
+    parser.add_argument("--concurrency", type=int, default=50)
+    args = parser.parse_args()
+    asyncio.run(main(args.user_id, args.concurrency))
@@ -0,0 +1,109 @@
+"""Compare list payload sizes and encode cost for JSON vs the columnar format.
+
+Builds synthetic ``GET /payments`` rows (no database needed) and reports the
+raw, gzip and brotli sizes of each encoding::
+
+    cd backend && python -m scripts.measure_payload --rows 2000
+"""
+
+import argparse
+import gzip
+import json
+import random
+import time
+from datetime import date, datetime, timedelta
+
+from config import settings
+from services.columnar import to_columnar
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+def synthetic_payments(count: int, seed: int = 7) -> list:
+    rng = random.Random(seed)
+    members = [
+        {
+            "id": i,
+            "name": f"Member {i}",
+            "phone": f"010-{rng.randint(1000, 9999)}-{rng.randint(1000, 9999)}",
+            "email": f"member{i}@example.com",
+        }
+        for i in range(1, max(2, count // 4))
+    ]
+    packages = [
+        {
+            "id": i,
+            "gym_id": 1,
+            "name": f"PT {sessions} sessions",
+            "description": None,
+            "total_sessions": sessions,
+            "price": sessions * 55000,
+            "validity_days": sessions * 7,
+            "is_active": True,
+            "created_at": "2025-01-01T09:00:00",
+        }
+        for i, sessions in enumerate((10, 20, 30, 50), start=1)
+    ]
+    rows = []
+    for i in range(1, count + 1):
+        member = rng.choice(members)
+        package = rng.choice(packages)
+        start = date(2025, 1, 1) + timedelta(days=rng.randint(0, 365))
+        rows.append(
+            {
+                "id": i,
+                "member_id": member["id"],
+                "package_id": package["id"],
+                "sessions_total": package["total_sessions"],
+                "sessions_remaining": rng.randint(0, package["total_sessions"]),
+                "price_paid": package["price"],
+                "payment_method": rng.choice(["cash", "card", "transfer"]),
+                "payment_status": rng.choice(["paid", "paid", "paid", "pending"]),
+                "start_date": start.isoformat(),
+                "expiry_date": (
+                    start + timedelta(days=package["validity_days"])
+                ).isoformat(),
+                "notes": None,
+                "created_at": datetime(2025, 1, 1, 9).isoformat(),
+                "member": dict(member),
+                "package": dict(package),
+            }
+        )
+    return rows
+
+
+def _encode(label: str, build) -> None:
+    started = time.perf_counter()
+    body = json.dumps(build(), separators=(",", ":")).encode()
+    encode_ms = (time.perf_counter() - started) * 1000
+
+    sizes = [f"raw {len(body):>9,d}"]
+    started = time.perf_counter()
+    sizes.append(
+        f"gzip {len(gzip.compress(body, settings.compression_gzip_level)):>8,d}"
+    )
+    gzip_ms = (time.perf_counter() - started) * 1000
+    timings = f"encode {encode_ms:6.1f} ms  gzip {gzip_ms:6.1f} ms"
+    if brotli is not None:
+        started = time.perf_counter()
+        compressed = brotli.compress(body, quality=settings.compression_brotli_quality)
+        brotli_ms = (time.perf_counter() - started) * 1000
+        sizes.append(f"br {len(compressed):>8,d}")
+        timings += f"  br {brotli_ms:6.1f} ms"
+    print(f"{label:<9} {'  '.join(sizes)}   {timings}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=2000)
+    args = parser.parse_args()
+
+    rows = synthetic_payments(args.rows)
+    _encode("json", lambda: rows)
+    _encode(
+        "columnar",
+        lambda: to_columnar([dict(r) for r in rows], side_tables=("member", "package")),
+    )
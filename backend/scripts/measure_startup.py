@@ -0,0 +1,63 @@
+"""Measure worker cold start: app import time and lifespan startup time.
+
+Each import is timed in a fresh interpreter, which is what a newly autoscaled
+worker pays. The lifespan step needs a reachable, migrated database::
+
+    cd backend && python -m scripts.measure_startup --runs 5
+"""
+
+import argparse
+import asyncio
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+_IMPORT_PROBE = (
+    "import time; started = time.perf_counter(); import main; "
+    "print(time.perf_counter() - started)"
+)
+
+
+def measure_import(runs: int) -> list:
+    timings = []
+    for _ in range(runs):
+        output = subprocess.run(
+            [sys.executable, "-c", _IMPORT_PROBE],
+            cwd=BACKEND_DIR,
+            check=True,
+            capture_output=True,
+            text=True,
+        ).stdout
+        timings.append(float(output.strip().splitlines()[-1]))
+    return timings
+
+
+async def measure_lifespan() -> float:
+    from main import app
+
+    started = time.perf_counter()
+    async with app.router.lifespan_context(app):
+        elapsed = time.perf_counter() - started
+    return elapsed
+
+
+def _report(label: str, timings: list) -> None:
+    print(
+        f"{label:<10} median {statistics.median(timings) * 1000:8.1f} ms"
+        f"   min {min(timings) * 1000:8.1f} ms   max {max(timings) * 1000:8.1f} ms"
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--skip-lifespan", action="store_true")
+    args = parser.parse_args()
+
+    _report("import", measure_import(args.runs))
+    if not args.skip_lifespan:
+        _report("lifespan", [asyncio.run(measure_lifespan())])
@@ -0,0 +1,497 @@
+"""Fill a dev/staging database with realistic synthetic gyms.
+
+Generates gyms with an owner, trainers, packages, members with goals, chains
+of member packages (renewals, mixed payment statuses) and months of sessions,
+then bulk-loads them with COPY. Rows are appended after the current max ids,
+so the script can be run against a database that already has data. The same
+``--seed`` and ``--today`` produce the same rows up to that id offset: loaded
+into an empty database, the data is identical on every run::
+
+    cd backend && alembic upgrade head
+    python -m scripts.seed_synthetic --preset medium --seed 42
+
+Every seeded user can log in with the password ``password123``.
+"""
+
+import argparse
+import asyncio
+import random
+import time
+from dataclasses import dataclass
+from datetime import date, datetime
+from datetime import time as dt_time
+from datetime import timedelta
+from typing import Dict, List, Tuple
+
+import asyncpg
+
+from config import settings
+from models.database import engine
+from services.member_stats import repair_drift
+from services.partitions import create_month_partition, is_partitioned
+
+PASSWORD = "password123"
+# bcrypt hash of PASSWORD with a fixed salt, so reruns write the same rows and
+# seeding skips a deliberately slow hash.
+PASSWORD_HASH = "$2b$12$oWYCsEKM635OqsN9yfALAOesfoXDZD3yXqh9A2Gq8q.S8OkWlydiC"
+
+
+@dataclass(frozen=True)
+class Preset:
+    gyms: int
+    trainers_per_gym: int
+    members_per_gym: int
+    months: int
+
+
+PRESETS = {
+    "tiny": Preset(gyms=1, trainers_per_gym=3, members_per_gym=50, months=3),
+    "small": Preset(gyms=2, trainers_per_gym=5, members_per_gym=500, months=12),
+    "medium": Preset(gyms=10, trainers_per_gym=10, members_per_gym=3000, months=18),
+    "large": Preset(gyms=40, trainers_per_gym=15, members_per_gym=10000, months=24),
+}
+
+COLUMNS = {
+    "gyms": ["id", "name", "type", "address", "phone", "created_at", "is_active"],
+    "users": [
+        "id",
+        "gym_id",
+        "email",
+        "hashed_password",
+        "name",
+        "role",
+        "phone",
+        "is_active",
+        "created_at",
+    ],
+    "packages": [
+        "id",
+        "gym_id",
+        "name",
+        "description",
+        "total_sessions",
+        "price",
+        "validity_days",
+        "is_active",
+        "created_at",
+    ],
+    "members": [
+        "id",
+        "gym_id",
+        "trainer_id",
+        "name",
+        "email",
+        "phone",
+        "birth_date",
+        "notes",
+        "goals",
+        "is_active",
+        "created_at",
+    ],
+    "member_packages": [
+        "id",
+        "member_id",
+        "package_id",
+        "sessions_total",
+        "sessions_remaining",
+        "price_paid",
+        "payment_method",
+        "payment_status",
+        "start_date",
+        "expiry_date",
+        "notes",
+        "created_at",
+    ],
+    "sessions": [
+        "id",
+        "member_id",
+        "trainer_id",
+        "member_package_id",
+        "scheduled_at",
+        "duration_minutes",
+        "status",
+        "notes",
+        "created_at",
+    ],
+}
+
+SURNAMES = ["김", "이", "박", "최", "정", "강", "조", "윤", "장", "임", "한", "오"]
+GIVEN_NAMES = [
+    "민준",
+    "서연",
+    "도윤",
+    "지우",
+    "하준",
+    "서윤",
+    "은우",
+    "지민",
+    "시우",
+    "수아",
+    "예준",
+    "하은",
+    "유진",
+    "현우",
+    "지호",
+    "채원",
+]
+GOALS = [
+    "체중 감량",
+    "근력 향상",
+    "체형 교정",
+    "재활",
+    "바디프로필",
+    "체력 증진",
+    "다이어트",
+    "자세 교정",
+]
+# (sessions, price per session in KRW)
+PACKAGE_SHAPES = [(10, 70000), (20, 65000), (30, 60000), (50, 55000)]
+
+
+class IdAllocator:
+    def __init__(self, start: Dict[str, int]):
+        self.last = dict(start)
+
+    def next(self, table: str) -> int:
+        self.last[table] += 1
+        return self.last[table]
+
+
+class GymGenerator:
+    def __init__(
+        self,
+        rng: random.Random,
+        ids: IdAllocator,
+        preset: Preset,
+        today: date,
+        password_hash: str,
+    ):
+        self.rng = rng
+        self.ids = ids
+        self.preset = preset
+        self.today = today
+        self.window_start = today - timedelta(days=preset.months * 30)
+        self.password_hash = password_hash
+
+    def _name(self) -> str:
+        return self.rng.choice(SURNAMES) + self.rng.choice(GIVEN_NAMES)
+
+    def _phone(self) -> str:
+        rng = self.rng
+        return f"010-{rng.randint(1000, 9999)}-{rng.randint(1000, 9999)}"
+
+    def _at(self, day: date) -> datetime:
+        hour = self.rng.randint(6, 21)
+        return datetime.combine(day, dt_time(hour, self.rng.choice((0, 30))))
+
+    def generate(self) -> Dict[str, List[Tuple]]:
+        rng = self.rng
+        rows: Dict[str, List[Tuple]] = {table: [] for table in COLUMNS}
+        opened = datetime.combine(self.window_start, dt_time(9)) - timedelta(days=30)
+
+        gym_id = self.ids.next("gyms")
+        rows["gyms"].append(
+            (
+                gym_id,
+                f"Kinetica Fitness {gym_id}",
+                rng.choice(("gym", "gym", "personal_studio")),
+                f"서울시 {rng.choice(['강남구', '마포구', '송파구', '성동구'])}",
+                self._phone(),
+                opened,
+                True,
+            )
+        )
+
+        owner_id = self.ids.next("users")
+        rows["users"].append(
+            (
+                owner_id,
+                gym_id,
+                f"owner{owner_id}@seed.kinetica.dev",
+                self.password_hash,
+                self._name(),
+                "owner",
+                self._phone(),
+                True,
+                opened,
+            )
+        )
+        trainer_ids = []
+        for _ in range(self.preset.trainers_per_gym):
+            trainer_id = self.ids.next("users")
+            trainer_ids.append(trainer_id)
+            rows["users"].append(
+                (
+                    trainer_id,
+                    gym_id,
+                    f"trainer{trainer_id}@seed.kinetica.dev",
+                    self.password_hash,
+                    self._name(),
+                    "trainer",
+                    self._phone(),
+                    rng.random() > 0.05,
+                    opened,
+                )
+            )
+
+        packages = []
+        for sessions, unit_price in PACKAGE_SHAPES:
+            package_id = self.ids.next("packages")
+            validity_days = sessions * 7
+            packages.append(
+                (package_id, sessions, sessions * unit_price, validity_days)
+            )
+            rows["packages"].append(
+                (
+                    package_id,
+                    gym_id,
+                    f"PT {sessions}회",
+                    None,
+                    sessions,
+                    sessions * unit_price,
+                    validity_days,
+                    True,
+                    opened,
+                )
+            )
+
+        for _ in range(self.preset.members_per_gym):
+            self._member(rows, gym_id, trainer_ids, packages)
+        return rows
+
+    def _member(self, rows, gym_id: int, trainer_ids: List[int], packages) -> None:
+        rng = self.rng
+        member_id = self.ids.next("members")
+        trainer_id = rng.choice(trainer_ids) if rng.random() > 0.1 else None
+        joined = self.window_start + timedelta(
+            days=rng.randint(0, max(1, (self.today - self.window_start).days - 7))
+        )
+        last_expiry = self._package_chain(
+            rows, member_id, trainer_id or rng.choice(trainer_ids), joined, packages
+        )
+        rows["members"].append(
+            (
+                member_id,
+                gym_id,
+                trainer_id,
+                self._name(),
+                f"member{member_id}@seed.kinetica.dev" if rng.random() > 0.3 else None,
+                self._phone(),
+                date(rng.randint(1960, 2006), rng.randint(1, 12), rng.randint(1, 28)),
+                None,
+                rng.sample(GOALS, rng.randint(0, 3)),
+                # Long-lapsed members are often deactivated by staff.
+                not (
+                    last_expiry < self.today - timedelta(days=90) and rng.random() < 0.5
+                ),
+                datetime.combine(joined, dt_time(10)),
+            )
+        )
+
+    def _package_chain(
+        self, rows, member_id: int, trainer_id: int, start: date, packages
+    ) -> date:
+        rng = self.rng
+        expiry = start
+        while start <= self.today:
+            package_id, sessions_total, price, validity_days = rng.choice(packages)
+            expiry = start + timedelta(days=validity_days)
+            current = expiry >= self.today
+            if current:
+                elapsed = (self.today - start).days / validity_days
+                used = min(
+                    sessions_total,
+                    int(sessions_total * elapsed * rng.uniform(0.6, 1.2)),
+                )
+            else:
+                # Most finished packages are used up; some sessions are forfeited.
+                used = sessions_total - (rng.randint(1, 3) if rng.random() < 0.2 else 0)
+
+            if current:
+                status = rng.choices(("paid", "pending", "overdue"), (85, 10, 5))[0]
+            else:
+                status = rng.choices(("paid", "overdue"), (97, 3))[0]
+            mp_id = self.ids.next("member_packages")
+            rows["member_packages"].append(
+                (
+                    mp_id,
+                    member_id,
+                    package_id,
+                    sessions_total,
+                    sessions_total - used,
+                    price if rng.random() > 0.2 else int(price * 0.9),
+                    rng.choices(("card", "transfer", "cash"), (60, 25, 15))[0],
+                    status,
+                    start,
+                    expiry,
+                    None,
+                    datetime.combine(start, dt_time(10)),
+                )
+            )
+            last_use = self._sessions(
+                rows, member_id, trainer_id, mp_id, start, expiry, used, current
+            )
+
+            if rng.random() > 0.7:
+                break  # no renewal: this member churns
+            # Renew around the time the sessions ran out, sometimes after a gap.
+            gap = rng.choices(
+                (rng.randint(0, 7), rng.randint(8, 30), rng.randint(31, 120)),
+                (60, 30, 10),
+            )[0]
+            start = last_use + timedelta(days=gap)
+        return expiry
+
+    def _sessions(
+        self,
+        rows,
+        member_id: int,
+        trainer_id: int,
+        mp_id: int,
+        start: date,
+        expiry: date,
+        used: int,
+        current: bool,
+    ) -> date:
+        rng = self.rng
+        span = max(1, (min(expiry, self.today) - start).days)
+        # Completed sessions are exactly the ones counted off the package.
+        statuses = ["completed"] * used
+        statuses += ["no_show"] * int(used * rng.uniform(0, 0.08))
+        statuses += ["cancelled"] * int(used * rng.uniform(0.03, 0.12))
+        last_use = start
+        for status in statuses:
+            day = start + timedelta(days=rng.randint(0, span - 1))
+            last_use = max(last_use, day)
+            scheduled_at = self._at(day)
+            rows["sessions"].append(
+                (
+                    self.ids.next("sessions"),
+                    member_id,
+                    trainer_id,
+                    mp_id,
+                    scheduled_at,
+                    rng.choice((50, 60, 60, 60, 90)),
+                    status,
+                    None,
+                    scheduled_at - timedelta(days=rng.randint(1, 7)),
+                )
+            )
+        if current:
+            for _ in range(rng.randint(0, 3)):
+                scheduled_at = self._at(self.today + timedelta(days=rng.randint(0, 14)))
+                rows["sessions"].append(
+                    (
+                        self.ids.next("sessions"),
+                        member_id,
+                        trainer_id,
+                        mp_id,
+                        scheduled_at,
+                        60,
+                        "scheduled",
+                        None,
+                        datetime.combine(self.today, dt_time(9)),
+                    )
+                )
+        return last_use
+
+
+def _next_month(month: date) -> date:
+    return (month.replace(day=1) + timedelta(days=32)).replace(day=1)
+
+
+async def ensure_month_partitions(first_month: date, last_month: date) -> None:
+    # Create monthly partitions up front so COPY does not pile history into
+    # the default partition.
+    async with engine.begin() as conn:
+        if not await is_partitioned(conn):
+            return
+        month = first_month.replace(day=1)
+        while month <= last_month:
+            await create_month_partition(conn, month)
+            month = _next_month(month)
+
+
+def asyncpg_dsn() -> str:
+    return settings.database_url.replace("postgresql+asyncpg://", "postgresql://", 1)
+
+
+async def current_ids(conn: asyncpg.Connection) -> IdAllocator:
+    return IdAllocator(
+        {
+            table: await conn.fetchval(f"SELECT COALESCE(MAX(id), 0) FROM {table}")
+            for table in COLUMNS
+        }
+    )
+
+
+async def copy_gym(conn: asyncpg.Connection, rows: Dict[str, List[Tuple]]) -> None:
+    # One transaction per gym keeps a failed run from leaving half a gym.
+    async with conn.transaction():
+        for table, columns in COLUMNS.items():
+            await conn.copy_records_to_table(
+                table, records=rows[table], columns=columns
+            )
+
+
+async def finish_load(conn: asyncpg.Connection) -> None:
+    for table in COLUMNS:
+        await conn.execute(
+            f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), "
+            f"(SELECT COALESCE(MAX(id), 0) + 1 FROM {table}), false)"
+        )
+    await conn.execute(f"ANALYZE {', '.join(COLUMNS)}")
+
+
+async def seed(preset: Preset, seed_value: int, today: date) -> None:
+    rng = random.Random(seed_value)
+    window_start = today - timedelta(days=preset.months * 30)
+    await ensure_month_partitions(window_start, _next_month(today))
+    await engine.dispose()
+
+    conn = await asyncpg.connect(asyncpg_dsn())
+    try:
+        generator = GymGenerator(
+            rng, await current_ids(conn), preset, today, PASSWORD_HASH
+        )
+        totals = {table: 0 for table in COLUMNS}
+        copy_seconds = 0.0
+        started = time.perf_counter()
+        for gym_number in range(1, preset.gyms + 1):
+            rows = generator.generate()
+            copy_started = time.perf_counter()
+            await copy_gym(conn, rows)
+            copy_seconds += time.perf_counter() - copy_started
+            for table in COLUMNS:
+                totals[table] += len(rows[table])
+            print(f"gym {gym_number}/{preset.gyms}: {len(rows['sessions']):,} sessions")
+        await finish_load(conn)
+    finally:
+        await conn.close()
+    # COPY bypasses the ORM hooks, so fill the member status columns in one pass.
+    await repair_drift()
+    await engine.dispose()
+
+    elapsed = time.perf_counter() - started
+    total_rows = sum(totals.values())
+    for table, count in totals.items():
+        print(f"{table:<16} {count:>12,d}")
+    print(
+        f"{total_rows:,} rows in {elapsed:.1f}s "
+        f"({total_rows / max(copy_seconds, 1e-9) * 60:,.0f} rows/min in COPY)"
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--preset", choices=sorted(PRESETS), default="small")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument(
+        "--today",
+        type=date.fromisoformat,
+        default=date.today(),
+        help="anchor date for generated history (YYYY-MM-DD); pin it, with "
+        "--seed, to regenerate the same data",
+    )
+    args = parser.parse_args()
+    asyncio.run(seed(PRESETS[args.preset], args.seed, args.today))
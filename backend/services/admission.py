@@ -0,0 +1,186 @@
+import logging
+import math
+import time
+from collections import Counter, defaultdict
+from typing import Dict, Hashable, Optional, Tuple
+
+from fastapi import HTTPException
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from config import settings
+from services.auth import verify_token
+from services.tracing import span
+
+logger = logging.getLogger(__name__)
+
+# How often idle buckets are dropped. A bucket that has refilled to capacity
+# behaves exactly like a new one, so dropping it loses nothing.
+_SWEEP_INTERVAL_SECONDS = 60.0
+
+
+class TokenBucket:
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated_at = time.monotonic()
+
+    def is_full(self, now: float) -> bool:
+        return self.tokens + (now - self.updated_at) * self.rate >= self.capacity
+
+    def wait(self) -> float:
+        """Return 0 if a token is available, else the seconds until one frees."""
+        now = time.monotonic()
+        self.tokens = min(
+            self.capacity, self.tokens + (now - self.updated_at) * self.rate
+        )
+        self.updated_at = now
+        if self.tokens >= 1:
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+    def take(self) -> None:
+        """Consume the token that :meth:`wait` found available."""
+        self.tokens -= 1
+
+
+class AdmissionController:
+    def __init__(self):
+        self._buckets: Dict[Tuple[str, Hashable], TokenBucket] = {}
+        self._in_flight: Dict[int, int] = defaultdict(int)
+        self.rejections: Dict[int, Counter] = defaultdict(Counter)
+        self._swept_at = time.monotonic()
+
+    def _sweep(self) -> None:
+        now = time.monotonic()
+        if now - self._swept_at < _SWEEP_INTERVAL_SECONDS:
+            return
+        self._swept_at = now
+        idle = [key for key, bucket in self._buckets.items() if bucket.is_full(now)]
+        for key in idle:
+            del self._buckets[key]
+
+    def _bucket(self, kind: str, key: Hashable) -> TokenBucket:
+        bucket = self._buckets.get((kind, key))
+        if bucket is None:
+            if kind == "gym":
+                bucket = TokenBucket(
+                    settings.rate_limit_gym_per_second, settings.rate_limit_gym_burst
+                )
+            else:
+                bucket = TokenBucket(
+                    settings.rate_limit_user_per_second,
+                    settings.rate_limit_user_burst,
+                )
+            self._buckets[(kind, key)] = bucket
+        return bucket
+
+    def admit(self, gym_id: int, user_id: int) -> Optional[Tuple[str, float]]:
+        """Return None when admitted, else (reason, retry_after_seconds)."""
+        self._sweep()
+        # Every limit is checked before any is charged, so a request turned
+        # away by one of them does not use up the caller's other budgets.
+        user_bucket = self._bucket("user", user_id)
+        gym_bucket = self._bucket("gym", gym_id)
+        wait = user_bucket.wait()
+        if wait:
+            return self._reject(gym_id, "user_rate", wait)
+        wait = gym_bucket.wait()
+        if wait:
+            return self._reject(gym_id, "gym_rate", wait)
+        if self._in_flight[gym_id] >= settings.gym_max_concurrent_requests:
+            return self._reject(gym_id, "gym_concurrency", 1.0)
+        user_bucket.take()
+        gym_bucket.take()
+        self._in_flight[gym_id] += 1
+        return None
+
+    def release(self, gym_id: int) -> None:
+        self._in_flight[gym_id] -= 1
+        if self._in_flight[gym_id] <= 0:
+            del self._in_flight[gym_id]
+
+    def _reject(self, gym_id: int, reason: str, wait: float) -> Tuple[str, float]:
+        self.rejections[gym_id][reason] += 1
+        return reason, wait
+
+    def stats(self, gym_id: int) -> Dict[str, int]:
+        return {
+            **self.rejections.get(gym_id, {}),
+            "in_flight": self._in_flight.get(gym_id, 0),
+        }
+
+
+admission = AdmissionController()
+
+
+class AdmissionMiddleware:
+    """Per-gym and per-user rate limits plus a per-gym in-flight cap.
+
+    Runs before any DB session is opened, so a tenant hammering the API is
+    turned away with 429 instead of queueing on the shared connection pool.
+    Requests without a valid bearer token are passed through and rejected by
+    the auth dependency as usual.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not settings.admission_enabled:
+            await self.app(scope, receive, send)
+            return
+
+        with span("admission"):
+            token = _bearer_token(scope)
+            token_data = None
+            if token:
+                try:
+                    token_data = verify_token(token)
+                except HTTPException:
+                    pass
+        if token_data is None:
+            await self.app(scope, receive, send)
+            return
+
+        rejected = admission.admit(token_data.gym_id, token_data.user_id)
+        if rejected is not None:
+            reason, wait = rejected
+            logger.warning(
+                "Rejected request from gym %s user %s (%s)",
+                token_data.gym_id,
+                token_data.user_id,
+                reason,
+            )
+            await _send_429(send, max(1, math.ceil(wait)))
+            return
+
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            admission.release(token_data.gym_id)
+
+
+def _bearer_token(scope: Scope) -> Optional[str]:
+    for name, value in scope["headers"]:
+        if name == b"authorization":
+            scheme, _, token = value.decode("latin-1").partition(" ")
+            if scheme.lower() == "bearer" and token:
+                return token
+    return None
+
+
+async def _send_429(send: Send, retry_after: int) -> None:
+    body = b'{"detail":"Too many requests"}'
+    await send(
+        {
+            "type": "http.response.start",
+            "status": 429,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                (b"retry-after", str(retry_after).encode()),
+            ],
+        }
+    )
+    await send({"type": "http.response.body", "body": body})
@@ -0,0 +1,120 @@
+"""Move cold sessions and member packages into archive tables.
+
+Run periodically (e.g. nightly from cron)::
+
+    python -m services.archive [--older-than-days N] [--batch-size N]
+"""
+
+import argparse
+import asyncio
+import logging
+from datetime import datetime, timedelta
+from typing import Dict, Optional
+
+from sqlalchemy import text
+
+from config import settings
+from models.database import MemberPackage, Session, engine
+
+logger = logging.getLogger(__name__)
+
+
+def _columns(table) -> str:
+    return ", ".join(c.name for c in table.columns)
+
+
+# Each statement selects one batch, deletes it from the hot table and inserts
+# the deleted rows into the archive table, all in a single round trip.
+# SKIP LOCKED lets the job run next to normal traffic without blocking on rows
+# that are being edited.
+
+_ARCHIVE_SESSIONS = text(
+    f"""
+    WITH batch AS (
+        SELECT id, scheduled_at FROM sessions
+        WHERE status IN ('completed', 'cancelled') AND scheduled_at < :cutoff
+        ORDER BY scheduled_at
+        LIMIT :batch_size
+        FOR UPDATE SKIP LOCKED
+    ), moved AS (
+        DELETE FROM sessions s USING batch b
+        WHERE s.id = b.id AND s.scheduled_at = b.scheduled_at
+        RETURNING s.*
+    )
+    INSERT INTO sessions_archive ({_columns(Session.__table__)}, archived_at)
+    SELECT {_columns(Session.__table__)}, now() FROM moved
+    """
+)
+
+# Only fully paid packages move, so outstanding balances always stay visible.
+# Packages still referenced by a hot session wait until that session is
+# archived first.
+_ARCHIVE_MEMBER_PACKAGES = text(
+    f"""
+    WITH batch AS (
+        SELECT mp.id FROM member_packages mp
+        WHERE mp.payment_status = 'paid'
+          AND (
+            (mp.sessions_remaining = 0 AND mp.created_at < :cutoff)
+            OR mp.expiry_date < :cutoff_date
+          )
+          AND NOT EXISTS (
+            SELECT 1 FROM sessions s WHERE s.member_package_id = mp.id
+          )
+        ORDER BY mp.id
+        LIMIT :batch_size
+        FOR UPDATE SKIP LOCKED
+    ), moved AS (
+        DELETE FROM member_packages mp USING batch b
+        WHERE mp.id = b.id
+        RETURNING mp.*
+    )
+    INSERT INTO member_packages_archive
+        ({_columns(MemberPackage.__table__)}, archived_at)
+    SELECT {_columns(MemberPackage.__table__)}, now() FROM moved
+    """
+)
+
+
+async def _drain(statement, params: Dict, batch_size: int) -> int:
+    total = 0
+    while True:
+        # One short transaction per batch keeps row locks and WAL bursts small.
+        async with engine.begin() as conn:
+            result = await conn.execute(statement, {**params, "batch_size": batch_size})
+        moved = result.rowcount or 0
+        total += moved
+        if moved < batch_size:
+            return total
+
+
+async def run_archive(
+    older_than_days: Optional[int] = None, batch_size: Optional[int] = None
+) -> Dict[str, int]:
+    older_than_days = older_than_days or settings.archive_after_days
+    batch_size = batch_size or settings.archive_batch_size
+    cutoff = datetime.utcnow() - timedelta(days=older_than_days)
+    params = {"cutoff": cutoff, "cutoff_date": cutoff.date()}
+
+    sessions_moved = await _drain(_ARCHIVE_SESSIONS, params, batch_size)
+    packages_moved = await _drain(_ARCHIVE_MEMBER_PACKAGES, params, batch_size)
+    logger.info(
+        "Archived %d sessions and %d member packages older than %d days",
+        sessions_moved,
+        packages_moved,
+        older_than_days,
+    )
+    return {"sessions": sessions_moved, "member_packages": packages_moved}
+
+
+async def _main(args: argparse.Namespace) -> None:
+    await run_archive(args.older_than_days, args.batch_size)
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description="Archive cold sessions/packages")
+    parser.add_argument("--older-than-days", type=int, default=None)
+    parser.add_argument("--batch-size", type=int, default=None)
+    asyncio.run(_main(parser.parse_args()))
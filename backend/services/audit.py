@@ -0,0 +1,193 @@
+"""Write-behind audit log for payment and session changes.
+
+Changes to the tracked columns are picked up from the ORM flush, held on the
+session until the transaction commits and then handed to an in-memory queue.
+A background task writes the queue out in multi-row INSERTs, so request
+handlers never wait on the audit table.
+
+The queue is bounded by ``audit_queue_max_entries``. If the database stays
+unreachable long enough to fill it, further entries are dropped with a logged
+warning and counted in :meth:`AuditWriter.stats`, shown at ``/health/audit``.
+"""
+
+import asyncio
+import logging
+from collections import deque
+from datetime import datetime
+from typing import Any, Deque, Dict, List, Optional
+
+from sqlalchemy import event, insert, inspect
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session as OrmSession
+
+from config import settings
+from models.database import AuditLog, MemberPackage, Session, User, engine
+
+logger = logging.getLogger(__name__)
+
+_ACTOR_KEY = "audit_actor"
+_PENDING_KEY = "pending_audit_entries"
+
+# model -> (entity name, audited columns)
+TRACKED = {
+    MemberPackage: ("member_package", ("payment_status", "sessions_remaining")),
+    Session: ("session", ("status",)),
+}
+
+
+def _as_text(value: Any) -> Optional[str]:
+    if value is None:
+        return None
+    return str(getattr(value, "value", value))
+
+
+def set_actor(db: AsyncSession, user: User) -> None:
+    """Attribute changes flushed by this session to ``user``."""
+    db.info[_ACTOR_KEY] = (user.gym_id, user.id)
+
+
+def record_change(
+    db: AsyncSession,
+    entity: str,
+    entity_id: int,
+    field: str,
+    old_value: Any,
+    new_value: Any,
+) -> None:
+    """Audit a change the ORM cannot see, e.g. from a bulk UPDATE statement."""
+    _record(db.sync_session, entity, entity_id, field, old_value, new_value)
+
+
+def _record(
+    session: OrmSession,
+    entity: str,
+    entity_id: int,
+    field: str,
+    old_value: Any,
+    new_value: Any,
+) -> None:
+    actor = session.info.get(_ACTOR_KEY)
+    if actor is None:
+        return  # scripts and background jobs are not audited
+    gym_id, user_id = actor
+    session.info.setdefault(_PENDING_KEY, []).append(
+        {
+            "gym_id": gym_id,
+            "user_id": user_id,
+            "entity": entity,
+            "entity_id": entity_id,
+            "field": field,
+            "old_value": _as_text(old_value),
+            "new_value": _as_text(new_value),
+            "changed_at": datetime.utcnow(),
+        }
+    )
+
+
+@event.listens_for(OrmSession, "before_flush")
+def _collect_changes(session: OrmSession, flush_context, instances) -> None:
+    if _ACTOR_KEY not in session.info:
+        return
+    for obj in session.dirty:
+        tracked = TRACKED.get(type(obj))
+        if tracked is None:
+            continue
+        entity, fields = tracked
+        state = inspect(obj)
+        for field in fields:
+            history = state.attrs[field].history
+            if not history.has_changes():
+                continue
+            old_value = history.deleted[0] if history.deleted else None
+            new_value = history.added[0] if history.added else None
+            if old_value != new_value:
+                _record(session, entity, obj.id, field, old_value, new_value)
+
+
+@event.listens_for(OrmSession, "after_commit")
+def _enqueue_after_commit(session: OrmSession) -> None:
+    entries = session.info.pop(_PENDING_KEY, None)
+    if entries:
+        audit_writer.enqueue(entries)
+
+
+@event.listens_for(OrmSession, "after_rollback")
+def _discard_after_rollback(session: OrmSession) -> None:
+    session.info.pop(_PENDING_KEY, None)
+
+
+class AuditWriter:
+    def __init__(self):
+        self._queue: Deque[Dict[str, Any]] = deque()
+        self._wakeup = asyncio.Event()
+        self.dropped = 0
+
+    def enqueue(self, entries: List[Dict[str, Any]]) -> None:
+        # Runs in the after_commit hook, which cannot await a write of its own.
+        room = max(settings.audit_queue_max_entries - len(self._queue), 0)
+        if len(entries) > room:
+            self.dropped += len(entries) - room
+            logger.warning(
+                "Audit queue full (%d entries); dropped %d, %d in total",
+                len(self._queue),
+                len(entries) - room,
+                self.dropped,
+            )
+            entries = entries[:room]
+        self._queue.extend(entries)
+        if len(self._queue) >= settings.audit_batch_size:
+            self._wakeup.set()
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "queued": len(self._queue),
+            "max_queued": settings.audit_queue_max_entries,
+            "dropped": self.dropped,
+        }
+
+    async def flush(self) -> int:
+        """Write everything queued so far; failed batches are put back."""
+        written = 0
+        while self._queue:
+            batch = [
+                self._queue.popleft()
+                for _ in range(min(settings.audit_batch_size, len(self._queue)))
+            ]
+            try:
+                async with engine.begin() as conn:
+                    await conn.execute(insert(AuditLog).values(batch))
+            except BaseException:
+                # Kept even past the bound: these were admitted already, so the
+                # queue exceeds it by at most one batch.
+                self._queue.extendleft(reversed(batch))
+                raise
+            written += len(batch)
+        return written
+
+    async def run_forever(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(
+                    self._wakeup.wait(), settings.audit_flush_interval_seconds
+                )
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            try:
+                await self.flush()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception(
+                    "Audit flush failed; %d entries kept for retry", len(self._queue)
+                )
+
+    async def drain(self) -> None:
+        """Flush what is left at shutdown, logging anything that is lost."""
+        try:
+            await self.flush()
+        except Exception:
+            logger.exception("Dropping %d unflushed audit entries", len(self._queue))
+
+
+audit_writer = AuditWriter()
@@ -1,28 +1,41 @@
 from datetime import datetime, timedelta, timezone
+from functools import lru_cache
 from typing import Annotated
 
 import jwt
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from jwt.exceptions import InvalidTokenError
-from passlib.context import CryptContext
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm.attributes import set_committed_value
 
 from config import settings
-from models.database import User, get_db
+from models.database import User
 from models.schemas import TokenData, UserRole
+from services import audit, tracing
+from services.branches import is_branch
+from services.connection_hold import get_db
+from services.tracing import span
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/login")
 
 
+@lru_cache(maxsize=1)
+def _pwd_context():
+    # passlib is slow to import and only needed by login/registration, so it is
+    # loaded on first use rather than at worker startup.
+    from passlib.context import CryptContext
+
+    return CryptContext(schemes=["bcrypt"], deprecated="auto")
+
+
 def get_password_hash(password: str) -> str:
-    return pwd_context.hash(password)
+    return _pwd_context().hash(password)
 
 
 def verify_password(plain: str, hashed: str) -> bool:
-    return pwd_context.verify(plain, hashed)
+    return _pwd_context().verify(plain, hashed)
 
 
 def create_access_token(data: dict) -> str:
@@ -58,16 +71,32 @@ async def get_current_user(
     token: Annotated[str, Depends(oauth2_scheme)],
     db: AsyncSession = Depends(get_db),
 ) -> User:
-    token_data = verify_token(token)
-    result = await db.execute(
-        select(User).where(User.id == token_data.user_id, User.is_active == True)
-    )
-    user = result.scalar_one_or_none()
+    with span("auth.verify_token"):
+        token_data = verify_token(token)
+    with span("auth.load_user"):
+        result = await db.execute(
+            select(User).where(User.id == token_data.user_id, User.is_active == True)
+        )
+        user = result.scalar_one_or_none()
     if user is None:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="User not found or inactive",
         )
+    if token_data.gym_id != user.gym_id:
+        # An owner's token for another branch acts on that branch, so each
+        # token or tab stays on the branch it was issued for.
+        if user.role != UserRole.owner or not await is_branch(
+            db, user.id, token_data.gym_id
+        ):
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Gym not available to this user",
+            )
+        # Without history, so the request's commit never writes it back.
+        set_committed_value(user, "gym_id", token_data.gym_id)
+    audit.set_actor(db, user)
+    tracing.set_gym(user.gym_id)
     return user
 
 
@@ -0,0 +1,57 @@
+from datetime import date, datetime, time, timedelta
+from typing import Dict, Iterable, List, Tuple
+
+Interval = Tuple[datetime, datetime]
+
+
+def working_windows(
+    date_from: date, date_to: date, hours: Dict[int, List[Tuple[time, time]]]
+) -> List[Interval]:
+    """Expand weekly working hours into concrete, sorted, disjoint windows."""
+    windows: List[Interval] = []
+    day = date_from
+    while day <= date_to:
+        for start, end in sorted(hours.get(day.weekday(), [])):
+            windows.append((datetime.combine(day, start), datetime.combine(day, end)))
+        day += timedelta(days=1)
+    # Overlapping entries for the same day would otherwise yield duplicate slots.
+    return merge_intervals(windows)
+
+
+def merge_intervals(intervals: Iterable[Interval]) -> List[Interval]:
+    merged: List[Interval] = []
+    for start, end in sorted(intervals):
+        if merged and start <= merged[-1][1]:
+            if end > merged[-1][1]:
+                merged[-1] = (merged[-1][0], end)
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def free_slots(
+    windows: List[Interval], busy: Iterable[Interval], min_length: timedelta
+) -> List[Interval]:
+    """Sweep sorted working windows against merged busy intervals.
+
+    Both lists are walked once, so the cost is O(windows + busy) after the
+    initial sort. Only gaps of at least ``min_length`` are returned.
+    """
+    busy_merged = merge_intervals(busy)
+    slots: List[Interval] = []
+    i = 0
+    for window_start, window_end in windows:
+        cursor = window_start
+        # Skip busy intervals that end before this window starts.
+        while i < len(busy_merged) and busy_merged[i][1] <= window_start:
+            i += 1
+        j = i
+        while j < len(busy_merged) and busy_merged[j][0] < window_end:
+            busy_start, busy_end = busy_merged[j]
+            if busy_start - cursor >= min_length:
+                slots.append((cursor, busy_start))
+            cursor = max(cursor, busy_end)
+            j += 1
+        if window_end - cursor >= min_length:
+            slots.append((cursor, window_end))
+    return slots
@@ -0,0 +1,41 @@
+"""Gyms an owner manages across branches (see models.database.OwnerGym).
+
+The branch a request acts on is the ``gym_id`` claim of its token, checked
+against these links in ``services.auth.get_current_user``. ``User.gym_id`` is
+only the home branch that login starts from.
+"""
+
+from typing import List
+
+from sqlalchemy import or_, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from models.database import Gym, OwnerGym, User, UserRole
+
+
+async def branch_gyms(db: AsyncSession, user: User) -> List[Gym]:
+    """The user's current gym plus, for owners, every linked branch."""
+    query = select(Gym).where(Gym.id == user.gym_id)
+    if user.role == UserRole.owner:
+        linked = select(OwnerGym.gym_id).where(OwnerGym.user_id == user.id)
+        query = select(Gym).where(or_(Gym.id == user.gym_id, Gym.id.in_(linked)))
+    result = await db.execute(query.order_by(Gym.id))
+    return list(result.scalars().all())
+
+
+async def is_branch(db: AsyncSession, user_id: int, gym_id: int) -> bool:
+    linked = await db.execute(
+        select(OwnerGym.id).where(
+            OwnerGym.user_id == user_id, OwnerGym.gym_id == gym_id
+        )
+    )
+    return linked.first() is not None
+
+
+async def link_branch(db: AsyncSession, user_id: int, gym_id: int) -> None:
+    await db.execute(
+        insert(OwnerGym)
+        .values(user_id=user_id, gym_id=gym_id)
+        .on_conflict_do_nothing(index_elements=["user_id", "gym_id"])
+    )
@@ -0,0 +1,122 @@
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Iterable, List, Optional, Tuple
+
+from config import settings
+
+_MISSING = object()
+
+
+class TTLCache:
+    """In-process LRU cache whose keys start with the owning ``gym_id``.
+
+    Entries expire after ``ttl_seconds``. While the invalidation listener is
+    down, entries older than ``settings.cache_degraded_ttl_seconds`` are also
+    treated as stale, which bounds how long another worker's write can go
+    unnoticed.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        ttl_seconds: float,
+        depends_on: Iterable[str],
+        maxsize: int = 1024,
+        keyed_by_id: bool = False,
+    ):
+        self.name = name
+        self.ttl_seconds = ttl_seconds
+        self.depends_on = frozenset(depends_on)
+        self.maxsize = maxsize
+        # When True the second key element is the entity id, so an event for a
+        # single row evicts a single key instead of the whole gym.
+        self.keyed_by_id = keyed_by_id
+        self._data: "OrderedDict[Tuple[Hashable, ...], Tuple[float, Any]]" = (
+            OrderedDict()
+        )
+        self._generations: Dict[Hashable, int] = {}
+        self._clears = 0
+
+    def get(self, key: Tuple[Hashable, ...], default: Any = None) -> Any:
+        entry = self._data.get(key, _MISSING)
+        if entry is _MISSING:
+            return default
+        stored_at, value = entry
+        age = time.monotonic() - stored_at
+        max_age = self.ttl_seconds
+        if not registry.listener_healthy:
+            max_age = min(max_age, settings.cache_degraded_ttl_seconds)
+        if age > max_age:
+            self._data.pop(key, None)
+            return default
+        self._data.move_to_end(key)
+        return value
+
+    def generation(self, gym_id: Hashable) -> Tuple[int, int]:
+        """Changes whenever ``gym_id``'s entries are evicted or the cache cleared.
+
+        Read it before loading a value and pass it to :meth:`set`, so a value
+        loaded while an invalidation arrived is not stored.
+        """
+        return self._clears, self._generations.get(gym_id, 0)
+
+    def set(
+        self,
+        key: Tuple[Hashable, ...],
+        value: Any,
+        generation: Optional[Tuple[int, int]] = None,
+    ) -> None:
+        if generation is not None and generation != self.generation(key[0]):
+            return
+        self._data[key] = (time.monotonic(), value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def evict(self, gym_id: int, entity_id: Optional[int] = None) -> None:
+        self._generations[gym_id] = self._generations.get(gym_id, 0) + 1
+        if self.keyed_by_id and entity_id is not None:
+            self._data.pop((gym_id, entity_id), None)
+            return
+        for key in [k for k in self._data if k[0] == gym_id]:
+            del self._data[key]
+
+    def clear(self) -> None:
+        self._clears += 1
+        self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class CacheRegistry:
+    def __init__(self):
+        self._caches: Dict[str, TTLCache] = {}
+        self.listener_healthy = False
+
+    def create(
+        self,
+        name: str,
+        ttl_seconds: float,
+        depends_on: Iterable[str],
+        maxsize: int = 1024,
+        keyed_by_id: bool = False,
+    ) -> TTLCache:
+        cache = TTLCache(name, ttl_seconds, depends_on, maxsize, keyed_by_id)
+        self._caches[name] = cache
+        return cache
+
+    def caches(self) -> List[TTLCache]:
+        return list(self._caches.values())
+
+    def invalidate(self, gym_id: int, entity: str, entity_id: Optional[int]) -> None:
+        for cache in self._caches.values():
+            if entity in cache.depends_on:
+                cache.evict(gym_id, entity_id)
+
+    def clear_all(self) -> None:
+        for cache in self._caches.values():
+            cache.clear()
+
+
+registry = CacheRegistry()
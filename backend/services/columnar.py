@@ -0,0 +1,26 @@
+from typing import Any, Dict, List, Sequence
+
+
+def to_columnar(rows: List[Dict[str, Any]], side_tables: Sequence[str] = ()) -> dict:
+    """Re-shape serialized list rows into columns plus de-duplicated side tables.
+
+    Each key named in ``side_tables`` holds a nested object with an ``id``; it is
+    moved into ``tables[key][id]`` so every distinct object is sent once, and the
+    row keeps only the matching ``<key>_id`` column it already has. The rows are
+    consumed in place.
+    """
+    tables: Dict[str, Dict[str, Any]] = {name: {} for name in side_tables}
+    columns: Dict[str, List[Any]] = {}
+    for row in rows:
+        for name in side_tables:
+            nested = row.pop(name, None)
+            if nested is not None:
+                tables[name][str(nested["id"])] = nested
+        for key, value in row.items():
+            columns.setdefault(key, []).append(value)
+    return {
+        "format": "columnar",
+        "count": len(rows),
+        "columns": columns,
+        "tables": tables,
+    }
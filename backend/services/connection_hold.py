@@ -0,0 +1,131 @@
+"""Early connection release and per-route connection hold times.
+
+Routers take their session from ``get_db`` and use ``ReleasingRoute``, which
+closes the request's DB session as soon as the handler returns. The pooled
+connection goes back before the response is validated, serialized and
+compressed rather than after it has been sent.
+
+Hold time is measured from the moment a session's transaction takes a
+connection until that transaction ends, and is reported per route to owners
+at ``/health/connections``.
+"""
+
+import functools
+import logging
+import time
+from collections import defaultdict
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Optional
+
+from fastapi import Request
+from fastapi.routing import APIRoute
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session as OrmSession
+
+from config import settings
+from models.database import async_session_maker
+from services.tracing import span
+
+logger = logging.getLogger(__name__)
+
+_ACQUIRED_KEY = "connection_acquired_at"
+
+# The request's session, so ReleasingRoute can hand its connection back
+# before the response is serialized.
+_request_session: ContextVar[Optional[AsyncSession]] = ContextVar(
+    "request_session", default=None
+)
+
+
+async def get_db(request: Request):
+    # AsyncSession checks a connection out of the pool on its first statement,
+    # not here, and returns it when the transaction ends.
+    async with async_session_maker() as session:
+        route = request.scope.get("route")
+        session.info["route"] = (
+            f"{request.method} {route.path}" if route else request.url.path
+        )
+        _request_session.set(session)
+        try:
+            yield session
+        finally:
+            _request_session.set(None)
+            await session.close()
+
+
+async def release_request_session() -> None:
+    """Close the current request's session, returning its connection to the pool.
+
+    Loaded attributes stay readable (``expire_on_commit=False``), so the
+    response can still be serialized from the detached objects.
+    """
+    session = _request_session.get()
+    if session is not None:
+        await session.close()
+
+
+class HoldStats:
+    def __init__(self):
+        self._checkouts: Dict[str, int] = defaultdict(int)
+        self._total: Dict[str, float] = defaultdict(float)
+        self._max: Dict[str, float] = defaultdict(float)
+
+    def record(self, route: str, seconds: float) -> None:
+        self._checkouts[route] += 1
+        self._total[route] += seconds
+        self._max[route] = max(self._max[route], seconds)
+        if seconds * 1000 >= settings.connection_hold_warn_ms:
+            logger.warning("%s held a DB connection for %.1f ms", route, seconds * 1000)
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        return {
+            route: {
+                "checkouts": checkouts,
+                "avg_ms": round(self._total[route] / checkouts * 1000, 2),
+                "max_ms": round(self._max[route] * 1000, 2),
+                "total_ms": round(self._total[route] * 1000, 2),
+            }
+            for route, checkouts in sorted(self._checkouts.items())
+        }
+
+
+hold_stats = HoldStats()
+
+
+@event.listens_for(OrmSession, "after_begin")
+def _connection_acquired(session: OrmSession, transaction, connection) -> None:
+    session.info.setdefault(_ACQUIRED_KEY, time.perf_counter())
+
+
+@event.listens_for(OrmSession, "after_transaction_end")
+def _connection_released(session: OrmSession, transaction) -> None:
+    if transaction.parent is not None:
+        return  # savepoints and subtransactions keep the connection
+    acquired_at = session.info.pop(_ACQUIRED_KEY, None)
+    route = session.info.get("route")
+    if acquired_at is not None and route is not None:
+        hold_stats.record(route, time.perf_counter() - acquired_at)
+
+
+def _release_after(endpoint: Callable[..., Any]) -> Callable[..., Any]:
+    if getattr(endpoint, "_releases_session", False):
+        return endpoint  # include_router rebuilds routes from wrapped endpoints
+
+    @functools.wraps(endpoint)
+    async def wrapper(*args, **kwargs):
+        with span("handler"):
+            try:
+                return await endpoint(*args, **kwargs)
+            finally:
+                await release_request_session()
+
+    wrapper._releases_session = True
+    return wrapper
+
+
+class ReleasingRoute(APIRoute):
+    """APIRoute that hands the DB connection back when the handler returns."""
+
+    def __init__(self, path: str, endpoint: Callable[..., Any], **kwargs) -> None:
+        super().__init__(path, _release_after(endpoint), **kwargs)
@@ -0,0 +1,184 @@
+"""Idempotency-Key support for retried POSTs.
+
+Handlers call :func:`claim` before doing any work and :func:`remember` once the
+response is known, then commit once so the write and its stored response land
+together::
+
+    replay = await idempotency.claim(db, user, key, "POST /payments", payload)
+    if replay is not None:
+        return replay
+    ...
+    await db.flush()
+    await idempotency.remember(db, user, key, response, 201)
+    await db.commit()
+"""
+
+import asyncio
+import hashlib
+import logging
+import time
+from datetime import datetime, timedelta
+from typing import Optional
+
+from fastapi import HTTPException, status
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+from sqlalchemy import select, text, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from config import settings
+from models.database import IdempotencyKey, User, engine
+
+logger = logging.getLogger(__name__)
+
+_POLL_SECONDS = 0.1
+
+_PURGE_EXPIRED = text(
+    """
+    DELETE FROM idempotency_keys WHERE id IN (
+        SELECT id FROM idempotency_keys
+        WHERE expires_at < :now
+        ORDER BY expires_at
+        LIMIT :batch_size
+        FOR UPDATE SKIP LOCKED
+    )
+    """
+)
+
+
+def _request_hash(endpoint: str, payload: BaseModel) -> str:
+    return hashlib.sha256(
+        f"{endpoint}\n{payload.model_dump_json()}".encode()
+    ).hexdigest()
+
+
+async def claim(
+    db: AsyncSession,
+    user: User,
+    key: Optional[str],
+    endpoint: str,
+    payload: BaseModel,
+) -> Optional[JSONResponse]:
+    """Reserve ``key`` for this request, or return the stored response to replay.
+
+    The reservation is part of the caller's transaction: it commits with the
+    write and disappears if the handler fails, so a retry after an error runs
+    again. While the first request is in flight, a duplicate blocks here on the
+    unique index and then waits for the stored response.
+    """
+    if key is None:
+        return None
+    if not key or len(key) > 255:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Idempotency-Key must be 1-255 characters",
+        )
+
+    request_hash = _request_hash(endpoint, payload)
+    deadline = time.monotonic() + settings.idempotency_wait_seconds
+    while True:
+        now = datetime.utcnow()
+        # An expired row is taken over as if it were not there.
+        stmt = insert(IdempotencyKey).values(
+            user_id=user.id,
+            key=key,
+            request_hash=request_hash,
+            created_at=now,
+            expires_at=now + timedelta(seconds=settings.idempotency_ttl_seconds),
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[IdempotencyKey.user_id, IdempotencyKey.key],
+            set_={
+                "request_hash": stmt.excluded.request_hash,
+                "status_code": None,
+                "response_body": None,
+                "created_at": stmt.excluded.created_at,
+                "expires_at": stmt.excluded.expires_at,
+            },
+            where=IdempotencyKey.expires_at < now,
+        ).returning(IdempotencyKey.id)
+        if (await db.execute(stmt)).scalar_one_or_none() is not None:
+            return None
+
+        stored = (
+            await db.execute(
+                select(
+                    IdempotencyKey.request_hash,
+                    IdempotencyKey.status_code,
+                    IdempotencyKey.response_body,
+                ).where(IdempotencyKey.user_id == user.id, IdempotencyKey.key == key)
+            )
+        ).one_or_none()
+        # Nothing was written; end the transaction so the connection goes back
+        # to the pool while we wait. (A rollback would expire current_user.)
+        await db.commit()
+        if stored is None:
+            continue  # purged between the two statements
+        if stored.request_hash != request_hash:
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                detail="Idempotency-Key was already used for a different request",
+            )
+        if stored.status_code is not None:
+            return JSONResponse(
+                status_code=stored.status_code,
+                content=stored.response_body,
+                headers={"Idempotent-Replayed": "true"},
+            )
+        if time.monotonic() >= deadline:
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="A request with this Idempotency-Key is still in progress",
+            )
+        await asyncio.sleep(_POLL_SECONDS)
+
+
+async def remember(
+    db: AsyncSession,
+    user: User,
+    key: Optional[str],
+    response: BaseModel,
+    status_code: int,
+) -> None:
+    """Store the response in the caller's transaction; the caller commits.
+
+    Committing the write first and the response separately would leave a key
+    with no response if the process died in between, and every retry would
+    then wait and get 409 until the key expired.
+    """
+    if key is None:
+        return
+    await db.execute(
+        update(IdempotencyKey)
+        .where(IdempotencyKey.user_id == user.id, IdempotencyKey.key == key)
+        .values(status_code=status_code, response_body=response.model_dump(mode="json"))
+    )
+
+
+async def purge_expired(batch_size: Optional[int] = None) -> int:
+    batch_size = batch_size or settings.idempotency_purge_batch_size
+    total = 0
+    while True:
+        async with engine.begin() as conn:
+            result = await conn.execute(
+                _PURGE_EXPIRED,
+                {"now": datetime.utcnow(), "batch_size": batch_size},
+            )
+        deleted = result.rowcount or 0
+        total += deleted
+        if deleted < batch_size:
+            return total
+
+
+async def purge_expired_forever() -> None:
+    while True:
+        try:
+            deleted = await purge_expired()
+            if deleted:
+                logger.info("Purged %d expired idempotency keys", deleted)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            logger.exception("idempotency key purge failed")
+        await asyncio.sleep(settings.idempotency_purge_interval_seconds)
@@ -0,0 +1,93 @@
+import asyncio
+import json
+import logging
+from typing import List, Optional, Tuple
+
+import asyncpg
+from sqlalchemy import event, text
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session as OrmSession
+
+from config import settings
+from services.cache import registry
+
+logger = logging.getLogger(__name__)
+
+ChangeEvent = Tuple[int, str, Optional[int]]
+
+_PENDING_KEY = "pending_invalidations"
+
+
+def _asyncpg_dsn(database_url: str) -> str:
+    return database_url.replace("postgresql+asyncpg://", "postgresql://", 1)
+
+
+async def publish_change(
+    db: AsyncSession, gym_id: int, entity: str, entity_id: Optional[int] = None
+) -> None:
+    """Queue a change event on the current transaction.
+
+    ``pg_notify`` is transactional: other workers only receive the message once
+    the surrounding transaction commits, and never if it rolls back. The local
+    worker evicts its own caches from the ``after_commit`` hook below so it
+    does not depend on its listener being up.
+    """
+    payload = json.dumps({"gym_id": gym_id, "entity": entity, "id": entity_id})
+    await db.execute(
+        text("SELECT pg_notify(:channel, :payload)"),
+        {"channel": settings.invalidation_channel, "payload": payload},
+    )
+    db.info.setdefault(_PENDING_KEY, []).append((gym_id, entity, entity_id))
+
+
+@event.listens_for(OrmSession, "after_commit")
+def _evict_after_commit(session: OrmSession) -> None:
+    pending: List[ChangeEvent] = session.info.pop(_PENDING_KEY, [])
+    for gym_id, entity, entity_id in pending:
+        registry.invalidate(gym_id, entity, entity_id)
+
+
+@event.listens_for(OrmSession, "after_rollback")
+def _discard_after_rollback(session: OrmSession) -> None:
+    session.info.pop(_PENDING_KEY, None)
+
+
+def _on_notification(connection, pid, channel, payload: str) -> None:
+    try:
+        data = json.loads(payload)
+        registry.invalidate(int(data["gym_id"]), data["entity"], data.get("id"))
+    except (ValueError, KeyError, TypeError):
+        logger.warning("Ignoring malformed invalidation payload: %r", payload)
+
+
+async def listen_forever() -> None:
+    """Keep a LISTEN connection open, reconnecting with backoff on failure.
+
+    While disconnected ``registry.listener_healthy`` is False, so caches fall
+    back to the short degraded TTL. On every (re)connect the caches are
+    cleared because notifications sent while we were away are lost.
+    """
+    backoff = settings.invalidation_reconnect_min_seconds
+    while True:
+        conn = None
+        try:
+            conn = await asyncpg.connect(_asyncpg_dsn(settings.database_url))
+            closed = asyncio.Event()
+            conn.add_termination_listener(lambda _conn: closed.set())
+            await conn.add_listener(settings.invalidation_channel, _on_notification)
+            registry.clear_all()
+            registry.listener_healthy = True
+            backoff = settings.invalidation_reconnect_min_seconds
+            logger.info("Cache invalidation listener connected")
+            await closed.wait()
+            logger.warning("Cache invalidation listener connection closed")
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            logger.exception("Cache invalidation listener failed")
+        finally:
+            registry.listener_healthy = False
+            if conn is not None and not conn.is_closed():
+                await conn.close()
+        await asyncio.sleep(backoff)
+        backoff = min(backoff * 2, settings.invalidation_reconnect_max_seconds)
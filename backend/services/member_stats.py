@@ -0,0 +1,208 @@
+"""Denormalized member status columns used to filter and sort the member list.
+
+``members.active_package_until``, ``sessions_remaining``, ``last_visit_at`` and
+``next_session_at`` are recomputed in the same transaction as any change to
+the member's packages or sessions: changed rows are picked up from the ORM
+flush, bulk statements call :func:`touch`, and one UPDATE refreshes every
+touched member just before commit.
+
+Two of the values also age with the clock (a package expires, the next session
+starts), and writes outside the app (archiving, seeding, manual SQL) bypass the
+hook, so a periodic pass recomputes every gym and repairs whatever drifted::
+
+    python -m services.member_stats
+"""
+
+import asyncio
+import logging
+from datetime import datetime
+from itertools import chain
+from typing import Iterable, Optional
+
+from sqlalchemy import event, inspect, text
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session as OrmSession
+
+from config import settings
+from models.database import MemberPackage, Session, engine
+
+logger = logging.getLogger(__name__)
+
+REPAIR_LOCK_ID = 7_362_002
+
+_TOUCHED_KEY = "member_stats_touched"
+
+
+def _refresh(scope: str):
+    # Set-based for whatever members ``scope`` selects; only rows whose values
+    # actually changed are written, so the rowcount is the amount of drift.
+    return text(
+        f"""
+        WITH scope AS (
+            SELECT id FROM members WHERE {scope}
+        ), packages AS (
+            SELECT
+                mp.member_id,
+                MAX(mp.expiry_date) FILTER (WHERE mp.sessions_remaining > 0)
+                    AS active_package_until,
+                SUM(mp.sessions_remaining) FILTER (WHERE mp.expiry_date >= :today)
+                    AS sessions_remaining
+            FROM member_packages mp
+            JOIN scope ON scope.id = mp.member_id
+            GROUP BY mp.member_id
+        ), visits AS (
+            SELECT
+                s.member_id,
+                MAX(s.scheduled_at) FILTER (WHERE s.status = 'completed')
+                    AS last_visit_at,
+                MIN(s.scheduled_at)
+                    FILTER (WHERE s.status = 'scheduled' AND s.scheduled_at >= :now)
+                    AS next_session_at
+            FROM (
+                SELECT member_id, scheduled_at, status FROM sessions
+                UNION ALL
+                SELECT member_id, scheduled_at, status FROM sessions_archive
+            ) s
+            JOIN scope ON scope.id = s.member_id
+            GROUP BY s.member_id
+        ), fresh AS (
+            SELECT
+                scope.id,
+                p.active_package_until,
+                COALESCE(p.sessions_remaining, 0) AS sessions_remaining,
+                v.last_visit_at,
+                v.next_session_at
+            FROM scope
+            LEFT JOIN packages p ON p.member_id = scope.id
+            LEFT JOIN visits v ON v.member_id = scope.id
+        )
+        UPDATE members m
+        SET active_package_until = f.active_package_until,
+            sessions_remaining = f.sessions_remaining,
+            last_visit_at = f.last_visit_at,
+            next_session_at = f.next_session_at
+        FROM fresh f
+        WHERE m.id = f.id
+          AND (
+            m.active_package_until, m.sessions_remaining,
+            m.last_visit_at, m.next_session_at
+          ) IS DISTINCT FROM (
+            f.active_package_until, f.sessions_remaining,
+            f.last_visit_at, f.next_session_at
+          )
+        """
+    )
+
+
+_REFRESH_MEMBERS = _refresh("id = ANY(:member_ids)")
+_REFRESH_GYM = _refresh("gym_id = :gym_id")
+
+
+def _params(now: Optional[datetime] = None) -> dict:
+    # Local time, like sessions.scheduled_at, expiry dates and the dashboard.
+    now = now or datetime.now()
+    return {"now": now, "today": now.date()}
+
+
+def touch(db: AsyncSession, member_ids: Iterable[int]) -> None:
+    """Refresh these members at commit, for changes the ORM flush cannot see."""
+    db.info.setdefault(_TOUCHED_KEY, set()).update(member_ids)
+
+
+# Edits to other columns (payment status, notes, ...) leave the stats alone.
+_SOURCE_COLUMNS = {
+    MemberPackage: ("member_id", "sessions_remaining", "expiry_date"),
+    Session: ("member_id", "status", "scheduled_at"),
+}
+
+
+def _affects_stats(obj) -> bool:
+    state = inspect(obj)
+    return any(
+        state.attrs[name].history.has_changes() for name in _SOURCE_COLUMNS[type(obj)]
+    )
+
+
+@event.listens_for(OrmSession, "before_flush")
+def _collect_members(session: OrmSession, flush_context, instances) -> None:
+    touched = session.info.setdefault(_TOUCHED_KEY, set())
+    for obj in chain(session.new, session.deleted):
+        if type(obj) in _SOURCE_COLUMNS:
+            touched.add(obj.member_id)
+    for obj in session.dirty:
+        if type(obj) in _SOURCE_COLUMNS and _affects_stats(obj):
+            touched.add(obj.member_id)
+            # A package or session moved to another member changes both.
+            previous = inspect(obj).attrs.member_id.history.deleted
+            touched.update(member_id for member_id in previous if member_id)
+
+
+@event.listens_for(OrmSession, "before_commit")
+def _refresh_touched(session: OrmSession) -> None:
+    # Flush first: the commit's own flush runs after this hook.
+    session.flush()
+    member_ids = session.info.pop(_TOUCHED_KEY, None)
+    if member_ids:
+        session.execute(
+            _REFRESH_MEMBERS, {**_params(), "member_ids": sorted(member_ids)}
+        )
+
+
+@event.listens_for(OrmSession, "after_rollback")
+def _discard_after_rollback(session: OrmSession) -> None:
+    session.info.pop(_TOUCHED_KEY, None)
+
+
+async def repair_drift(now: Optional[datetime] = None) -> int:
+    """Recompute every gym's members, one short transaction per gym."""
+    params = _params(now)
+    async with engine.connect() as conn:
+        gym_ids = (
+            await conn.execute(text("SELECT id FROM gyms ORDER BY id"))
+        ).scalars()
+        gym_ids = list(gym_ids)
+    repaired = 0
+    for gym_id in gym_ids:
+        async with engine.begin() as conn:
+            result = await conn.execute(_REFRESH_GYM, {**params, "gym_id": gym_id})
+        repaired += result.rowcount or 0
+    if repaired:
+        logger.info("Repaired member stats for %d members", repaired)
+    return repaired
+
+
+async def repair_forever() -> None:
+    while True:
+        try:
+            # A session-level lock, held across the per-gym transactions, keeps
+            # other workers from repeating the pass.
+            async with engine.connect() as conn:
+                locked = await conn.execute(
+                    text("SELECT pg_try_advisory_lock(:lock_id)"),
+                    {"lock_id": REPAIR_LOCK_ID},
+                )
+                await conn.commit()
+                if locked.scalar():
+                    try:
+                        await repair_drift()
+                    finally:
+                        await conn.execute(
+                            text("SELECT pg_advisory_unlock(:lock_id)"),
+                            {"lock_id": REPAIR_LOCK_ID},
+                        )
+                        await conn.commit()
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            logger.exception("member stats repair failed")
+        await asyncio.sleep(settings.member_stats_repair_interval_seconds)
+
+
+async def _main() -> None:
+    await repair_drift()
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(_main())
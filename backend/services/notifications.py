@@ -0,0 +1,391 @@
+"""Expiry and session reminders.
+
+Two processes, both outside the API workers so reminder volume never competes
+with request handling::
+
+    python -m services.notifications enqueue   # from cron, e.g. hourly
+    python -m services.notifications work      # long-running sender
+
+``enqueue`` turns expiring packages and upcoming sessions into rows of the
+notifications table with one INSERT ... SELECT each; the (member, kind, ref)
+unique constraint drops anything already queued. ``work`` claims pending rows
+in batches, at most ``notification_gym_per_minute`` per gym, and hands them to
+the configured sender.
+
+Session times and expiry dates are local wall-clock values, as everywhere else
+in the app (see the dashboard), so they are compared with ``datetime.now()``.
+The queue's own timestamps (created, claimed, sent) are UTC like other
+bookkeeping columns.
+"""
+
+import argparse
+import asyncio
+import importlib
+import json
+import logging
+import math
+from dataclasses import asdict, dataclass
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Optional, Protocol, Tuple
+
+from sqlalchemy import text
+
+from config import settings
+from models.database import engine
+
+logger = logging.getLogger(__name__)
+
+PACKAGE_EXPIRING = "package_expiring"
+SESSION_UPCOMING = "session_upcoming"
+
+# Email when the member has one, otherwise SMS; members with neither are skipped.
+_CONTACT = """
+    CASE WHEN NULLIF(m.email, '') IS NOT NULL THEN 'email' ELSE 'sms' END,
+    COALESCE(NULLIF(m.email, ''), NULLIF(m.phone, ''))
+"""
+
+_ENQUEUE_EXPIRING = text(
+    f"""
+    INSERT INTO notifications (
+        gym_id, member_id, kind, ref_id, channel, recipient, payload,
+        status, attempts, created_at
+    )
+    SELECT
+        m.gym_id, m.id, '{PACKAGE_EXPIRING}', mp.id, {_CONTACT},
+        json_build_object(
+            'member_name', m.name,
+            'package_name', p.name,
+            'expiry_date', mp.expiry_date,
+            'sessions_remaining', mp.sessions_remaining
+        ),
+        'pending', 0, :now
+    FROM member_packages mp
+    JOIN members m ON m.id = mp.member_id
+    JOIN packages p ON p.id = mp.package_id
+    WHERE m.is_active
+      AND mp.expiry_date BETWEEN :today AND :expiry_until
+      AND mp.sessions_remaining > 0
+      AND COALESCE(NULLIF(m.email, ''), NULLIF(m.phone, '')) IS NOT NULL
+    ON CONFLICT (member_id, kind, ref_id) DO NOTHING
+    """
+)
+
+_ENQUEUE_SESSIONS = text(
+    f"""
+    INSERT INTO notifications (
+        gym_id, member_id, kind, ref_id, channel, recipient, payload,
+        status, attempts, created_at
+    )
+    SELECT
+        m.gym_id, m.id, '{SESSION_UPCOMING}', s.id, {_CONTACT},
+        json_build_object(
+            'member_name', m.name,
+            'trainer_name', u.name,
+            'scheduled_at', s.scheduled_at,
+            'duration_minutes', s.duration_minutes
+        ),
+        'pending', 0, :now
+    FROM sessions s
+    JOIN members m ON m.id = s.member_id
+    JOIN users u ON u.id = s.trainer_id
+    WHERE s.status = 'scheduled'
+      AND s.scheduled_at >= :local_now
+      AND s.scheduled_at < :session_until
+      AND m.is_active
+      AND COALESCE(NULLIF(m.email, ''), NULLIF(m.phone, '')) IS NOT NULL
+    ON CONFLICT (member_id, kind, ref_id) DO NOTHING
+    """
+)
+
+# Reminders that no longer apply: the member was deactivated, or the session
+# was cancelled, completed or has already started.
+_CANCEL_STALE = text(
+    f"""
+    UPDATE notifications n SET status = 'cancelled'
+    WHERE n.status = 'pending'
+      AND (
+        NOT EXISTS (SELECT 1 FROM members m WHERE m.id = n.member_id AND m.is_active)
+        OR (
+          n.kind = '{SESSION_UPCOMING}'
+          AND NOT EXISTS (
+            SELECT 1 FROM sessions s
+            WHERE s.id = n.ref_id
+              AND s.status = 'scheduled'
+              AND s.scheduled_at > :local_now
+          )
+        )
+      )
+    """
+)
+
+# Rows left in 'sending' by a worker that died count as a failed attempt; once
+# they are out of attempts they are failed instead of being claimed again.
+_FAIL_ABANDONED = text(
+    """
+    UPDATE notifications
+    SET status = 'failed', last_error = 'claimed but never settled'
+    WHERE status = 'sending'
+      AND claimed_at < :stale_before
+      AND attempts >= :max_attempts
+    """
+)
+
+# Ranking by position within each gym and taking the lowest ranks first sends
+# gyms round-robin, so one gym's backlog cannot starve the others. Abandoned
+# 'sending' rows with attempts left are picked up again after the claim timeout.
+_CLAIM_BATCH = text(
+    """
+    WITH ranked AS (
+        SELECT id, ROW_NUMBER() OVER (PARTITION BY gym_id ORDER BY id) AS rank
+        FROM notifications
+        WHERE status = 'pending'
+           OR (
+             status = 'sending'
+             AND claimed_at < :stale_before
+             AND attempts < :max_attempts
+           )
+    ), batch AS (
+        SELECT n.id FROM notifications n
+        JOIN ranked r ON r.id = n.id
+        WHERE r.rank <= :per_gym
+        ORDER BY r.rank, n.id
+        LIMIT :batch_size
+        FOR UPDATE OF n SKIP LOCKED
+    )
+    UPDATE notifications n
+    SET status = 'sending', claimed_at = :now, attempts = n.attempts + 1
+    FROM batch
+    WHERE n.id = batch.id
+    RETURNING n.id, n.gym_id, n.kind, n.channel, n.recipient, n.payload
+    """
+)
+
+_MARK_SENT = text(
+    """
+    UPDATE notifications SET status = 'sent', sent_at = :now, last_error = NULL
+    WHERE id = ANY(:ids)
+    """
+)
+
+_MARK_FAILED = text(
+    """
+    UPDATE notifications
+    SET status = CASE WHEN attempts >= :max_attempts THEN 'failed' ELSE 'pending' END,
+        last_error = :error
+    WHERE id = :id
+    """
+)
+
+
+@dataclass
+class Message:
+    id: int
+    gym_id: int
+    kind: str
+    channel: str
+    recipient: str
+    subject: str
+    body: str
+
+
+class Sender(Protocol):
+    async def send(self, messages: List[Message]) -> Dict[int, str]:
+        """Deliver ``messages``; return an error text for each id that failed."""
+
+
+class LogSender:
+    """Development sink: writes each message to the log."""
+
+    async def send(self, messages: List[Message]) -> Dict[int, str]:
+        for message in messages:
+            logger.info(
+                "[%s to %s] %s", message.channel, message.recipient, message.subject
+            )
+        return {}
+
+
+class FileSender:
+    """Development sink: appends each message to a JSON-lines file."""
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or settings.notification_file_path
+
+    def _write(self, messages: List[Message]) -> None:
+        with open(self.path, "a", encoding="utf-8") as sink:
+            for message in messages:
+                sink.write(json.dumps(asdict(message), ensure_ascii=False) + "\n")
+
+    async def send(self, messages: List[Message]) -> Dict[int, str]:
+        await asyncio.to_thread(self._write, messages)
+        return {}
+
+
+_SENDERS = {"log": LogSender, "file": FileSender}
+
+
+def load_sender(name: Optional[str] = None) -> Sender:
+    """Build the sender named in settings: "log", "file" or "module:attribute"."""
+    name = name or settings.notification_sender
+    if name in _SENDERS:
+        return _SENDERS[name]()
+    module_name, _, attribute = name.partition(":")
+    return getattr(importlib.import_module(module_name), attribute)()
+
+
+def render(kind: str, payload: Dict) -> Tuple[str, str]:
+    if kind == PACKAGE_EXPIRING:
+        subject = f"Your {payload['package_name']} package expires soon"
+        body = (
+            f"Hi {payload['member_name']}, your {payload['package_name']} package "
+            f"expires on {payload['expiry_date']} with "
+            f"{payload['sessions_remaining']} sessions left."
+        )
+        return subject, body
+    starts = datetime.fromisoformat(payload["scheduled_at"]).strftime("%Y-%m-%d %H:%M")
+    subject = f"Session reminder: {starts}"
+    body = (
+        f"Hi {payload['member_name']}, your {payload['duration_minutes']}-minute "
+        f"session with {payload['trainer_name']} starts at {starts}."
+    )
+    return subject, body
+
+
+async def enqueue_reminders(now: Optional[datetime] = None) -> Dict[str, int]:
+    """Queue reminders due at ``now``, a local time (default: the current one)."""
+    now = now or datetime.now()
+    today = now.date()
+    params = {
+        "now": datetime.utcnow(),
+        "local_now": now,
+        "today": today,
+        "expiry_until": today + timedelta(days=settings.notification_expiry_days),
+        "session_until": now + timedelta(hours=settings.notification_session_hours),
+    }
+    async with engine.begin() as conn:
+        expiring = await conn.execute(_ENQUEUE_EXPIRING, params)
+        sessions = await conn.execute(_ENQUEUE_SESSIONS, params)
+    queued = {
+        PACKAGE_EXPIRING: expiring.rowcount or 0,
+        SESSION_UPCOMING: sessions.rowcount or 0,
+    }
+    logger.info(
+        "Queued %d expiry and %d session reminders",
+        queued[PACKAGE_EXPIRING],
+        queued[SESSION_UPCOMING],
+    )
+    return queued
+
+
+def _per_gym_limit() -> int:
+    per_cycle = settings.notification_gym_per_minute
+    per_cycle *= settings.notification_interval_seconds / 60
+    return max(1, math.floor(per_cycle))
+
+
+async def send_batch(sender: Sender) -> int:
+    """Claim, send and settle one batch; return how many messages were sent."""
+    now = datetime.utcnow()
+    stale_before = now - timedelta(seconds=settings.notification_claim_timeout_seconds)
+    async with engine.begin() as conn:
+        await conn.execute(_CANCEL_STALE, {"local_now": datetime.now()})
+        await conn.execute(
+            _FAIL_ABANDONED,
+            {
+                "stale_before": stale_before,
+                "max_attempts": settings.notification_max_attempts,
+            },
+        )
+        claimed = await conn.execute(
+            _CLAIM_BATCH,
+            {
+                "now": now,
+                "stale_before": stale_before,
+                "max_attempts": settings.notification_max_attempts,
+                "per_gym": _per_gym_limit(),
+                "batch_size": settings.notification_batch_size,
+            },
+        )
+        rows = claimed.all()
+    if not rows:
+        return 0
+
+    messages = []
+    for row in rows:
+        payload = (
+            row.payload if isinstance(row.payload, dict) else json.loads(row.payload)
+        )
+        subject, body = render(row.kind, payload)
+        messages.append(
+            Message(
+                row.id, row.gym_id, row.kind, row.channel, row.recipient, subject, body
+            )
+        )
+    try:
+        errors = await sender.send(messages)
+    except Exception as exc:
+        logger.exception("Notification sender failed")
+        errors = {message.id: repr(exc) for message in messages}
+
+    sent_ids = [message.id for message in messages if message.id not in errors]
+    async with engine.begin() as conn:
+        if sent_ids:
+            await conn.execute(_MARK_SENT, {"now": datetime.utcnow(), "ids": sent_ids})
+        if errors:
+            await conn.execute(
+                _MARK_FAILED,
+                [
+                    {
+                        "id": message_id,
+                        "error": error[:1000],
+                        "max_attempts": settings.notification_max_attempts,
+                    }
+                    for message_id, error in errors.items()
+                ],
+            )
+    if errors:
+        logger.warning("%d notifications failed to send", len(errors))
+    return len(sent_ids)
+
+
+async def send_forever(sender: Optional[Sender] = None) -> None:
+    sender = sender or load_sender()
+    while True:
+        try:
+            sent = await send_batch(sender)
+            if sent:
+                logger.info("Sent %d notifications", sent)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            logger.exception("notification batch failed")
+        # A fixed pause per batch is what turns the per-gym batch share into a
+        # per-minute rate.
+        await asyncio.sleep(settings.notification_interval_seconds)
+
+
+async def _main(args: argparse.Namespace) -> None:
+    try:
+        if args.command == "enqueue":
+            now = None
+            if args.date:
+                now = datetime.combine(
+                    date.fromisoformat(args.date), datetime.min.time()
+                )
+            await enqueue_reminders(now)
+        elif args.once:
+            await send_batch(load_sender())
+        else:
+            await send_forever()
+    finally:
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description="Expiry and session reminders")
+    subcommands = parser.add_subparsers(dest="command", required=True)
+    enqueue = subcommands.add_parser("enqueue", help="queue due reminders")
+    enqueue.add_argument("--date", default=None, help="YYYY-MM-DD, default now")
+    work = subcommands.add_parser("work", help="send queued reminders")
+    work.add_argument("--once", action="store_true", help="send one batch and exit")
+    asyncio.run(_main(parser.parse_args()))
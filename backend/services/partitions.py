@@ -0,0 +1,165 @@
+"""Monthly range partitions for the ``sessions`` table.
+
+The partitioned table itself is created by migration 0002. Usage::
+
+    python -m services.partitions ensure         # create upcoming months
+    python -m services.partitions detach 2025-01 # detach an old month
+"""
+
+import argparse
+import asyncio
+import logging
+from datetime import date
+from typing import Optional
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+from config import settings
+from models.database import engine
+
+logger = logging.getLogger(__name__)
+
+PARENT_TABLE = "sessions"
+DEFAULT_PARTITION = "sessions_default"
+# Arbitrary constant shared by all workers so only one runs maintenance at once.
+MAINTENANCE_LOCK_ID = 7_362_001
+
+
+def _month_start(d: date) -> date:
+    return d.replace(day=1)
+
+
+def _add_months(d: date, months: int) -> date:
+    years, month_index = divmod(d.month - 1 + months, 12)
+    return date(d.year + years, month_index + 1, 1)
+
+
+def partition_name(month: date) -> str:
+    return f"sessions_y{month.year:04d}m{month.month:02d}"
+
+
+async def _table_exists(conn: AsyncConnection, name: str) -> bool:
+    result = await conn.execute(
+        text("SELECT to_regclass(:name) IS NOT NULL"), {"name": name}
+    )
+    return bool(result.scalar())
+
+
+async def is_partitioned(conn: AsyncConnection) -> bool:
+    result = await conn.execute(
+        text("SELECT relkind::text FROM pg_class WHERE oid = to_regclass(:name)"),
+        {"name": PARENT_TABLE},
+    )
+    return result.scalar() == "p"
+
+
+async def create_month_partition(conn: AsyncConnection, month: date) -> bool:
+    """Create the partition holding ``month``; returns False if it exists.
+
+    Rows that already landed in the default partition for that month are moved
+    into the new table before it is attached, otherwise the ATTACH would fail.
+    """
+    start = _month_start(month)
+    end = _add_months(start, 1)
+    name = partition_name(start)
+    if await _table_exists(conn, name):
+        return False
+
+    bounds = {"start": start, "end": end}
+    await conn.execute(
+        text(
+            f"CREATE TABLE {name} "
+            f"(LIKE {PARENT_TABLE} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)"
+        )
+    )
+    if await _table_exists(conn, DEFAULT_PARTITION):
+        await conn.execute(
+            text(
+                f"WITH moved AS (DELETE FROM {DEFAULT_PARTITION} "
+                "WHERE scheduled_at >= :start AND scheduled_at < :end "
+                f"RETURNING *) INSERT INTO {name} SELECT * FROM moved"
+            ),
+            bounds,
+        )
+    await conn.execute(
+        text(
+            f"ALTER TABLE {PARENT_TABLE} ATTACH PARTITION {name} "
+            f"FOR VALUES FROM ('{start.isoformat()}') TO ('{end.isoformat()}')"
+        )
+    )
+    logger.info("Created sessions partition %s", name)
+    return True
+
+
+async def ensure_session_partitions(
+    conn: AsyncConnection, months_ahead: Optional[int] = None
+) -> bool:
+    """Make sure the current and the next ``months_ahead`` months exist."""
+    if not await is_partitioned(conn):
+        logger.warning("sessions is not partitioned; run `alembic upgrade head`")
+        return False
+    if months_ahead is None:
+        months_ahead = settings.session_partition_months_ahead
+
+    this_month = _month_start(date.today())
+    for offset in range(months_ahead + 1):
+        await create_month_partition(conn, _add_months(this_month, offset))
+    await conn.execute(
+        text(
+            f"CREATE TABLE IF NOT EXISTS {DEFAULT_PARTITION} "
+            f"PARTITION OF {PARENT_TABLE} DEFAULT"
+        )
+    )
+    return True
+
+
+async def detach_month_partition(conn: AsyncConnection, month: date) -> str:
+    """Detach a month so it can be archived or dropped without touching the rest.
+
+    Detaching is a metadata-only operation; the month's rows stay in a
+    standalone table of the same name.
+    """
+    name = partition_name(_month_start(month))
+    await conn.execute(text(f"ALTER TABLE {PARENT_TABLE} DETACH PARTITION {name}"))
+    logger.info("Detached sessions partition %s", name)
+    return name
+
+
+async def maintain_partitions_forever() -> None:
+    """Runs off the startup path, so workers become ready without doing DDL."""
+    while True:
+        try:
+            async with engine.begin() as conn:
+                locked = await conn.execute(
+                    text("SELECT pg_try_advisory_xact_lock(:lock_id)"),
+                    {"lock_id": MAINTENANCE_LOCK_ID},
+                )
+                if locked.scalar():
+                    await ensure_session_partitions(conn)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            logger.exception("sessions partition maintenance failed")
+        await asyncio.sleep(settings.partition_maintenance_interval_seconds)
+
+
+async def _main(args: argparse.Namespace) -> None:
+    async with engine.begin() as conn:
+        if args.command == "ensure":
+            await ensure_session_partitions(conn, args.months_ahead)
+        elif args.command == "detach":
+            year, month = (int(part) for part in args.month.split("-"))
+            await detach_month_partition(conn, date(year, month, 1))
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description="Manage sessions partitions")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    ensure_parser = subparsers.add_parser("ensure")
+    ensure_parser.add_argument("--months-ahead", type=int, default=None)
+    detach_parser = subparsers.add_parser("detach")
+    detach_parser.add_argument("month", help="YYYY-MM")
+    asyncio.run(_main(parser.parse_args()))
@@ -0,0 +1,200 @@
+import csv
+import io
+import re
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from typing import Dict, Iterable, List, Set, Tuple
+
+# Header aliases seen in bank exports (English and Korean).
+_DATE_HEADERS = {"date", "transaction_date", "거래일", "거래일자", "거래일시"}
+_AMOUNT_HEADERS = {"amount", "deposit", "credit", "입금액", "입금", "금액"}
+_NAME_HEADERS = {
+    "name",
+    "payer",
+    "payer_name",
+    "depositor",
+    "입금자",
+    "입금자명",
+    "적요",
+}
+_DATE_FORMATS = ("%Y-%m-%d", "%Y.%m.%d", "%Y/%m/%d", "%Y%m%d")
+# Currency symbols, codes and thousands separators around an amount.
+_AMOUNT_NOISE = re.compile(r"\s|,|₩|\$|원|KRW", re.IGNORECASE)
+_AMOUNT = re.compile(r"[+-]?\d+(\.\d+)?")
+_WHITESPACE = re.compile(r"\s+")
+
+
+class StatementError(ValueError):
+    pass
+
+
+@dataclass
+class StatementLine:
+    line: int
+    transfer_date: date
+    amount: int
+    payer_name: str
+
+
+@dataclass
+class PendingTransfer:
+    member_package_id: int
+    member_name: str
+    amount: int
+    reference_dates: Tuple[date, ...]
+
+
+@dataclass
+class MatchResult:
+    matched: List[Tuple[StatementLine, PendingTransfer]] = field(default_factory=list)
+    ambiguous: List[Tuple[StatementLine, List[PendingTransfer]]] = field(
+        default_factory=list
+    )
+    unmatched: List[StatementLine] = field(default_factory=list)
+
+
+def normalize_name(name: str) -> str:
+    return _WHITESPACE.sub("", name).casefold()
+
+
+def _decode(raw: bytes) -> str:
+    # Korean banks still commonly export CP949.
+    for encoding in ("utf-8-sig", "cp949"):
+        try:
+            return raw.decode(encoding)
+        except UnicodeDecodeError:
+            continue
+    raise StatementError("Statement must be UTF-8 or CP949 encoded")
+
+
+def _pick_column(headers: Iterable[str], aliases: Set[str], label: str) -> str:
+    for header in headers:
+        if header.strip().lower() in aliases:
+            return header
+    raise StatementError(f"Statement has no {label} column")
+
+
+def _parse_date(value: str) -> date:
+    value = value.strip()[:10]
+    for fmt in _DATE_FORMATS:
+        try:
+            return datetime.strptime(value, fmt).date()
+        except ValueError:
+            continue
+    raise ValueError(value)
+
+
+def _parse_amount(value: str) -> int:
+    """Whole won from an amount cell; blank cells (withdrawal rows) are 0.
+
+    "₩1,234,000", "1234000.00" and "KRW 1,234,000" all give 1234000. Anything
+    else, including fractional amounts, raises ValueError.
+    """
+    value = value.strip()
+    if not value:
+        return 0
+    negative = value.startswith("(") and value.endswith(")")
+    cleaned = _AMOUNT_NOISE.sub("", value.strip("()") if negative else value)
+    if not _AMOUNT.fullmatch(cleaned):
+        raise ValueError(value)
+    amount = Decimal(cleaned)
+    if amount != amount.to_integral_value():
+        raise ValueError(value)
+    return -int(amount) if negative else int(amount)
+
+
+def parse_statement(raw: bytes) -> Tuple[List[StatementLine], List[int]]:
+    """Parse a CSV statement into deposit lines.
+
+    Returns the parsed lines and the line numbers that could not be parsed.
+    Non-positive amounts (withdrawals) are skipped.
+    """
+    reader = csv.DictReader(io.StringIO(_decode(raw)))
+    if not reader.fieldnames:
+        raise StatementError("Statement is empty")
+    date_col = _pick_column(reader.fieldnames, _DATE_HEADERS, "date")
+    amount_col = _pick_column(reader.fieldnames, _AMOUNT_HEADERS, "amount")
+    name_col = _pick_column(reader.fieldnames, _NAME_HEADERS, "payer name")
+
+    lines: List[StatementLine] = []
+    invalid: List[int] = []
+    # Line 1 is the header.
+    for line_number, row in enumerate(reader, start=2):
+        try:
+            amount = _parse_amount(row[amount_col] or "")
+            if amount <= 0:
+                continue
+            lines.append(
+                StatementLine(
+                    line=line_number,
+                    transfer_date=_parse_date(row[date_col] or ""),
+                    amount=amount,
+                    payer_name=(row[name_col] or "").strip(),
+                )
+            )
+        except (ValueError, TypeError):
+            invalid.append(line_number)
+    return lines, invalid
+
+
+def match_statement(
+    lines: List[StatementLine],
+    pending: List[PendingTransfer],
+    window_days: int,
+) -> MatchResult:
+    """Match statement lines to pending transfers in O(lines + pending).
+
+    A line matches confidently only when exactly one unclaimed pending payment
+    has the same amount, the same normalized payer name, and a reference date
+    within ``window_days``. Lines with candidates that fail that test are
+    returned as ambiguous for manual review.
+    """
+    window = timedelta(days=window_days)
+    by_amount_day: Dict[Tuple[int, date], List[PendingTransfer]] = {}
+    by_amount_name: Dict[Tuple[int, str], List[PendingTransfer]] = {}
+    for transfer in pending:
+        for reference_date in transfer.reference_dates:
+            key = (transfer.amount, reference_date)
+            by_amount_day.setdefault(key, []).append(transfer)
+        key = (transfer.amount, normalize_name(transfer.member_name))
+        by_amount_name.setdefault(key, []).append(transfer)
+
+    claimed: Set[int] = set()
+
+    def in_window(line: StatementLine, candidates: List[PendingTransfer]):
+        return [
+            t
+            for t in candidates
+            if t.member_package_id not in claimed
+            and any(abs(line.transfer_date - d) <= window for d in t.reference_dates)
+        ]
+
+    def same_amount_in_window(line: StatementLine) -> List[PendingTransfer]:
+        # Probe one hash bucket per day instead of scanning every payment with
+        # this amount; common package prices would otherwise make it quadratic.
+        found: Dict[int, PendingTransfer] = {}
+        for offset in range(-window_days, window_days + 1):
+            day = line.transfer_date + timedelta(days=offset)
+            for t in by_amount_day.get((line.amount, day), ()):
+                if t.member_package_id not in claimed:
+                    found[t.member_package_id] = t
+        return list(found.values())
+
+    result = MatchResult()
+    for line in lines:
+        exact = in_window(
+            line,
+            by_amount_name.get((line.amount, normalize_name(line.payer_name)), []),
+        )
+        if len(exact) == 1:
+            claimed.add(exact[0].member_package_id)
+            result.matched.append((line, exact[0]))
+            continue
+
+        candidates = exact or same_amount_in_window(line)
+        if candidates:
+            result.ambiguous.append((line, candidates))
+        else:
+            result.unmatched.append(line)
+    return result
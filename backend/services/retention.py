@@ -0,0 +1,141 @@
+"""Rebuild the per-member churn/renewal snapshot read by /dashboard/retention.
+
+Run nightly (e.g. from cron)::
+
+    python -m services.retention
+"""
+
+import asyncio
+import logging
+from datetime import date, datetime, time, timedelta
+from typing import Optional
+
+from sqlalchemy import text
+
+from config import settings
+from models.database import engine
+
+logger = logging.getLogger(__name__)
+
+# One pass over member_packages (plus archived ones, so renewal history
+# survives archiving) and one over recent completed sessions. LAG pairs every
+# package with the member's previous one, which gives days-to-renewal per
+# package without a self-join; the latest package decides the member's status.
+_REBUILD_SNAPSHOT = text(
+    """
+    WITH packages AS (
+        SELECT id, member_id, start_date, expiry_date, sessions_remaining
+        FROM member_packages
+        UNION ALL
+        SELECT id, member_id, start_date, expiry_date, sessions_remaining
+        FROM member_packages_archive
+    ), ordered AS (
+        SELECT
+            member_id,
+            expiry_date,
+            sessions_remaining,
+            start_date - LAG(expiry_date) OVER w AS days_to_renewal,
+            ROW_NUMBER() OVER w_desc AS recency
+        FROM packages
+        WINDOW
+            w AS (PARTITION BY member_id ORDER BY start_date, id),
+            w_desc AS (PARTITION BY member_id ORDER BY start_date DESC, id DESC)
+    ), renewals AS (
+        SELECT
+            member_id,
+            COUNT(*) AS packages_count,
+            COUNT(days_to_renewal) AS renewals_count,
+            MAX(days_to_renewal) FILTER (WHERE recency = 1) AS last_days_to_renewal,
+            AVG(days_to_renewal) AS avg_days_to_renewal
+        FROM ordered
+        GROUP BY member_id
+    ), latest AS (
+        SELECT member_id, expiry_date, sessions_remaining
+        FROM ordered
+        WHERE recency = 1
+    ), attendance AS (
+        SELECT
+            member_id,
+            COUNT(*) FILTER (WHERE scheduled_at >= :recent_start) AS recent_sessions,
+            COUNT(*) FILTER (WHERE scheduled_at < :recent_start) AS previous_sessions
+        FROM sessions
+        WHERE status = 'completed'
+          AND scheduled_at >= :previous_start
+          AND scheduled_at < :now
+        GROUP BY member_id
+    ), scored AS (
+        SELECT
+            m.id AS member_id,
+            m.gym_id,
+            m.trainer_id,
+            r.packages_count,
+            r.renewals_count,
+            r.last_days_to_renewal,
+            r.avg_days_to_renewal,
+            l.expiry_date AS latest_expiry_date,
+            l.sessions_remaining,
+            COALESCE(a.recent_sessions, 0) AS recent_sessions,
+            COALESCE(a.previous_sessions, 0) AS previous_sessions,
+            l.sessions_remaining <= :low_sessions AS low_sessions,
+            l.expiry_date <= :near_expiry_date AS near_expiry,
+            COALESCE(a.recent_sessions, 0) < COALESCE(a.previous_sessions, 0)
+                AS falling_attendance,
+            l.expiry_date < :today OR l.sessions_remaining = 0 AS churned
+        FROM members m
+        JOIN renewals r ON r.member_id = m.id
+        JOIN latest l ON l.member_id = m.id
+        LEFT JOIN attendance a ON a.member_id = m.id
+        WHERE m.is_active
+    )
+    INSERT INTO member_retention (
+        member_id, gym_id, trainer_id, status, packages_count, renewals_count,
+        last_days_to_renewal, avg_days_to_renewal, latest_expiry_date,
+        sessions_remaining, recent_sessions, previous_sessions,
+        low_sessions, near_expiry, falling_attendance, computed_at
+    )
+    SELECT
+        member_id, gym_id, trainer_id,
+        CASE
+            WHEN churned THEN 'churned'
+            WHEN low_sessions OR near_expiry OR falling_attendance THEN 'at_risk'
+            ELSE 'active'
+        END,
+        packages_count, renewals_count,
+        last_days_to_renewal, avg_days_to_renewal, latest_expiry_date,
+        sessions_remaining, recent_sessions, previous_sessions,
+        low_sessions, near_expiry, falling_attendance, :now
+    FROM scored
+    """
+)
+
+
+async def rebuild_snapshot(today: Optional[date] = None) -> int:
+    today = today or date.today()
+    now = datetime.combine(today, time.min)
+    window = timedelta(days=settings.retention_attendance_window_days)
+    params = {
+        "today": today,
+        "now": now,
+        "recent_start": now - window,
+        "previous_start": now - 2 * window,
+        "low_sessions": settings.retention_low_sessions,
+        "near_expiry_date": today + timedelta(days=settings.retention_expiry_days),
+    }
+    # Replace the snapshot in one transaction; readers keep seeing the previous
+    # one until it commits.
+    async with engine.begin() as conn:
+        await conn.execute(text("DELETE FROM member_retention"))
+        result = await conn.execute(_REBUILD_SNAPSHOT, params)
+    rows = result.rowcount or 0
+    logger.info("Rebuilt member retention snapshot for %d members", rows)
+    return rows
+
+
+async def _main() -> None:
+    await rebuild_snapshot()
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(_main())
@@ -0,0 +1,110 @@
+"""Deferred revenue: paid sessions that have not been used yet.
+
+Each package's liability is ``sessions_remaining * price_paid / sessions_total``.
+Run the daily snapshot from cron so the trend can be charted without
+rescanning packages::
+
+    python -m services.revenue [--date YYYY-MM-DD]
+"""
+
+import argparse
+import asyncio
+import logging
+from datetime import date
+from typing import Optional
+
+from sqlalchemy import Date, Numeric, cast, func, literal, select
+from sqlalchemy.dialects.postgresql import insert
+
+from models.database import (
+    DeferredRevenueSnapshot,
+    Gym,
+    Member,
+    MemberPackage,
+    PaymentStatus,
+    engine,
+)
+
+logger = logging.getLogger(__name__)
+
+
+def liability_sum():
+    per_package = (
+        MemberPackage.sessions_remaining
+        * cast(MemberPackage.price_paid, Numeric)
+        / func.nullif(MemberPackage.sessions_total, 0)
+    )
+    return func.coalesce(func.sum(per_package), 0)
+
+
+def outstanding_packages(query, today: date):
+    """Restrict ``query`` to paid, unexpired packages with sessions left.
+
+    Sessions on expired packages are forfeited, so they are no longer owed.
+    """
+    query = query.select_from(MemberPackage).join(
+        Member, MemberPackage.member_id == Member.id
+    )
+    return query.where(
+        MemberPackage.payment_status == PaymentStatus.paid,
+        MemberPackage.sessions_remaining > 0,
+        MemberPackage.expiry_date >= today,
+    )
+
+
+async def take_snapshot(today: Optional[date] = None) -> int:
+    """Upsert one row per gym for ``today``; re-running a day overwrites it.
+
+    Gyms with nothing outstanding get a zero row, so a liability that has been
+    used up replaces the day's earlier figure instead of outliving it.
+    """
+    today = today or date.today()
+    totals = (
+        outstanding_packages(
+            select(
+                Member.gym_id,
+                func.round(liability_sum()).label("liability"),
+                func.sum(MemberPackage.sessions_remaining).label("sessions_remaining"),
+                func.count(MemberPackage.id).label("packages"),
+            ),
+            today,
+        )
+        .group_by(Member.gym_id)
+        .subquery()
+    )
+    rows = select(
+        Gym.id,
+        cast(literal(today), Date),
+        func.coalesce(totals.c.liability, 0),
+        func.coalesce(totals.c.sessions_remaining, 0),
+        func.coalesce(totals.c.packages, 0),
+    ).outerjoin(totals, totals.c.gym_id == Gym.id)
+    stmt = insert(DeferredRevenueSnapshot).from_select(
+        ["gym_id", "snapshot_date", "liability", "sessions_remaining", "packages"],
+        rows,
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["gym_id", "snapshot_date"],
+        set_={
+            "liability": stmt.excluded.liability,
+            "sessions_remaining": stmt.excluded.sessions_remaining,
+            "packages": stmt.excluded.packages,
+        },
+    )
+    async with engine.begin() as conn:
+        result = await conn.execute(stmt)
+    gyms = result.rowcount or 0
+    logger.info("Stored deferred revenue snapshot for %d gyms on %s", gyms, today)
+    return gyms
+
+
+async def _main(args: argparse.Namespace) -> None:
+    await take_snapshot(date.fromisoformat(args.date) if args.date else None)
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description="Snapshot deferred revenue")
+    parser.add_argument("--date", default=None, help="YYYY-MM-DD, default today")
+    asyncio.run(_main(parser.parse_args()))
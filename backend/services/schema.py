@@ -0,0 +1,46 @@
+from functools import lru_cache
+from pathlib import Path
+from typing import Optional
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+ALEMBIC_INI = Path(__file__).resolve().parent.parent / "alembic.ini"
+
+
+class SchemaVersionMismatch(RuntimeError):
+    pass
+
+
+@lru_cache(maxsize=1)
+def expected_revision() -> Optional[str]:
+    # Alembic is only needed for this one lookup, so keep it off the import path.
+    from alembic.config import Config
+    from alembic.script import ScriptDirectory
+
+    return ScriptDirectory.from_config(Config(str(ALEMBIC_INI))).get_current_head()
+
+
+async def current_revision(conn: AsyncConnection) -> Optional[str]:
+    exists = await conn.execute(text("SELECT to_regclass('alembic_version')"))
+    if exists.scalar() is None:
+        return None
+    result = await conn.execute(text("SELECT version_num FROM alembic_version"))
+    return result.scalar()
+
+
+async def check_schema_version(conn: AsyncConnection) -> str:
+    """Refuse to serve traffic against a database that is not at head.
+
+    Workers never run DDL themselves; apply migrations once per deploy with
+    ``alembic upgrade head``.
+    """
+    expected = expected_revision()
+    current = await current_revision(conn)
+    if current != expected:
+        raise SchemaVersionMismatch(
+            f"Database schema is at {current or 'no revision'}, expected {expected}."
+            " Run `alembic upgrade head` (or `alembic stamp 0001` first for a"
+            " database created before migrations)."
+        )
+    return current
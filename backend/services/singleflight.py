@@ -0,0 +1,36 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable, TypeVar
+
+from config import settings
+
+T = TypeVar("T")
+
+
+class SingleFlight:
+    """Coalesce identical concurrent calls into one in-flight execution.
+
+    The first caller for a key starts ``fn`` as a task; callers arriving while
+    it runs await the same task. The shared result is handed to every caller,
+    so it should be treated as read-only. A caller that disconnects does not
+    cancel the work for the others.
+    """
+
+    def __init__(self):
+        self._calls: Dict[Hashable, "asyncio.Task[Any]"] = {}
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[T]]) -> T:
+        if not settings.singleflight_enabled:
+            return await fn()
+
+        task = self._calls.get(key)
+        if task is None:
+            task = asyncio.ensure_future(fn())
+            self._calls[key] = task
+            task.add_done_callback(lambda _task: self._calls.pop(key, None))
+        return await asyncio.shield(task)
+
+    def in_flight(self) -> int:
+        return len(self._calls)
+
+
+singleflight = SingleFlight()
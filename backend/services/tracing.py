@@ -0,0 +1,240 @@
+"""Lightweight per-request tracing.
+
+``TracingMiddleware`` gives every request a trace ID, echoed in the
+``X-Trace-Id`` response header (an incoming one is reused so a caller can
+follow a request across services). A ``trace_sample_rate`` share of requests
+also records spans:
+
+- ``admission`` and ``auth.*`` for token checks and the current-user lookup
+- ``sql`` for each statement the request runs
+- ``handler`` for the endpoint body, from ``ReleasingRoute``
+- ``serialize`` from the handler's return until the response starts, which
+  covers response-model validation, JSON rendering and compression
+
+Finished traces go to an in-memory ring buffer, shown per gym at
+``/debug/traces``, and are appended to ``trace_file_path`` when that is set.
+"""
+
+import asyncio
+import json
+import logging
+import random
+import re
+import threading
+import time
+import uuid
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
+from typing import Any, Deque, Dict, Iterator, List, Optional, Set
+
+from sqlalchemy import event
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from config import settings
+from models.database import engine
+
+logger = logging.getLogger(__name__)
+
+TRACE_HEADER = "X-Trace-Id"
+
+_TRACE_ID = re.compile(r"^[0-9A-Za-z-]{8,64}$")
+
+
+@dataclass
+class Span:
+    name: str
+    start_ms: float
+    duration_ms: float = 0.0
+    detail: Optional[str] = None
+
+
+@dataclass
+class Trace:
+    trace_id: str
+    method: str
+    path: str
+    started_at: datetime
+    route: Optional[str] = None
+    gym_id: Optional[int] = None
+    status_code: Optional[int] = None
+    duration_ms: float = 0.0
+    spans: List[Span] = field(default_factory=list)
+    _started: float = field(default_factory=time.perf_counter, repr=False)
+
+    def offset_ms(self, at: Optional[float] = None) -> float:
+        return round(((at or time.perf_counter()) - self._started) * 1000, 3)
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = asdict(self)
+        del data["_started"]
+        data["started_at"] = self.started_at.isoformat()
+        return data
+
+
+_current: ContextVar[Optional[Trace]] = ContextVar("current_trace", default=None)
+
+
+def set_gym(gym_id: int) -> None:
+    """Attribute the current trace to a gym so its owner can see it."""
+    trace = _current.get()
+    if trace is not None:
+        trace.gym_id = gym_id
+
+
+@contextmanager
+def span(name: str, detail: Optional[str] = None) -> Iterator[None]:
+    """Time the block as a span of the current trace; a no-op when unsampled."""
+    trace = _current.get()
+    if trace is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        trace.spans.append(
+            Span(
+                name,
+                trace.offset_ms(started),
+                round((time.perf_counter() - started) * 1000, 3),
+                detail,
+            )
+        )
+
+
+class TraceBuffer:
+    def __init__(self):
+        self._traces: Deque[Trace] = deque(maxlen=settings.trace_buffer_size)
+        self._file_lock = threading.Lock()
+        self._writes: Set[asyncio.Future] = set()
+
+    def add(self, trace: Trace) -> None:
+        self._traces.append(trace)
+        if settings.trace_file_path:
+            line = json.dumps(trace.to_dict(), ensure_ascii=False) + "\n"
+            write = asyncio.get_running_loop().run_in_executor(None, self._write, line)
+            self._writes.add(write)
+            write.add_done_callback(self._written)
+
+    def _write(self, line: str) -> None:
+        with self._file_lock:
+            with open(settings.trace_file_path, "a", encoding="utf-8") as sink:
+                sink.write(line)
+
+    def _written(self, write: asyncio.Future) -> None:
+        self._writes.discard(write)
+        if not write.cancelled() and write.exception() is not None:
+            logger.error(
+                "Could not append a trace to %s",
+                settings.trace_file_path,
+                exc_info=write.exception(),
+            )
+
+    async def drain(self) -> None:
+        """Wait for file writes still in flight, at shutdown."""
+        if self._writes:
+            await asyncio.wait(set(self._writes))
+
+    def recent(
+        self, gym_id: int, limit: int, min_duration_ms: float = 0
+    ) -> List[Trace]:
+        """Newest first, only traces of requests made on behalf of ``gym_id``."""
+        matching = (
+            trace
+            for trace in reversed(self._traces)
+            if trace.gym_id == gym_id and trace.duration_ms >= min_duration_ms
+        )
+        return [trace for _, trace in zip(range(limit), matching)]
+
+
+trace_buffer = TraceBuffer()
+
+
+# Statement spans. SQLAlchemy runs these hooks inside the calling task's
+# context, so the request's trace is visible here. The start time lives on the
+# statement's execution context, which is dropped with the statement whether
+# it succeeds or fails.
+
+
+@event.listens_for(engine.sync_engine, "before_cursor_execute")
+def _statement_started(conn, cursor, statement, parameters, context, executemany):
+    if _current.get() is not None and context is not None:
+        context._trace_started = time.perf_counter()
+
+
+@event.listens_for(engine.sync_engine, "after_cursor_execute")
+def _statement_finished(conn, cursor, statement, parameters, context, executemany):
+    trace = _current.get()
+    started = getattr(context, "_trace_started", None)
+    if trace is None or started is None:
+        return
+    trace.spans.append(
+        Span(
+            "sql",
+            trace.offset_ms(started),
+            round((time.perf_counter() - started) * 1000, 3),
+            " ".join(statement.split())[: settings.trace_max_statement_length],
+        )
+    )
+
+
+def _trace_id(scope: Scope) -> str:
+    for name, value in scope["headers"]:
+        if name == TRACE_HEADER.lower().encode():
+            candidate = value.decode("latin-1")
+            if _TRACE_ID.match(candidate):
+                return candidate
+    return uuid.uuid4().hex
+
+
+class TracingMiddleware:
+    """Assign trace IDs and record sampled requests into ``trace_buffer``."""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        trace_id = _trace_id(scope)
+        trace = None
+        if random.random() < settings.trace_sample_rate:
+            trace = Trace(trace_id, scope["method"], scope["path"], datetime.utcnow())
+
+        async def send_with_trace_id(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                MutableHeaders(scope=message)[TRACE_HEADER] = trace_id
+                if trace is not None:
+                    trace.status_code = message["status"]
+                    _add_serialize_span(trace)
+            await send(message)
+
+        token = _current.set(trace)
+        try:
+            await self.app(scope, receive, send_with_trace_id)
+        finally:
+            _current.reset(token)
+            if trace is not None:
+                route = scope.get("route")
+                trace.route = getattr(route, "path", None)
+                trace.duration_ms = trace.offset_ms()
+                trace_buffer.add(trace)
+
+
+def _add_serialize_span(trace: Trace) -> None:
+    handler = next(
+        (recorded for recorded in reversed(trace.spans) if recorded.name == "handler"),
+        None,
+    )
+    if handler is None:
+        return
+    started_ms = round(handler.start_ms + handler.duration_ms, 3)
+    trace.spans.append(
+        Span("serialize", started_ms, round(trace.offset_ms() - started_ms, 3))
+    )
@@ -0,0 +1,48 @@
+"""Admission control: rejected requests leave the caller's budgets alone."""
+
+import pytest
+
+from config import settings
+from services.admission import AdmissionController
+
+
+@pytest.fixture
+def controller(monkeypatch):
+    # Slow refill so the test sees the buckets exactly as the calls left them.
+    monkeypatch.setattr(settings, "rate_limit_user_per_second", 0.001)
+    monkeypatch.setattr(settings, "rate_limit_user_burst", 2)
+    monkeypatch.setattr(settings, "rate_limit_gym_per_second", 0.001)
+    monkeypatch.setattr(settings, "rate_limit_gym_burst", 1)
+    monkeypatch.setattr(settings, "gym_max_concurrent_requests", 10)
+    return AdmissionController()
+
+
+def test_gym_rejection_keeps_the_user_token(controller):
+    assert controller.admit(1, user_id=10) is None
+    reason, _ = controller.admit(1, user_id=11)
+
+    assert reason == "gym_rate"
+    # The gym is throttled, but user 11 has not spent anything.
+    assert controller._bucket("user", 11).tokens == pytest.approx(2, abs=0.01)
+
+
+def test_concurrency_rejection_keeps_both_tokens(controller, monkeypatch):
+    monkeypatch.setattr(settings, "gym_max_concurrent_requests", 0)
+
+    reason, _ = controller.admit(1, user_id=10)
+
+    assert reason == "gym_concurrency"
+    assert controller._bucket("user", 10).tokens == pytest.approx(2, abs=0.01)
+    assert controller._bucket("gym", 1).tokens == pytest.approx(1, abs=0.01)
+
+
+def test_user_rejection_keeps_the_gym_token(controller, monkeypatch):
+    monkeypatch.setattr(settings, "rate_limit_gym_burst", 5)
+    assert controller.admit(1, user_id=10) is None
+    assert controller.admit(1, user_id=10) is None
+
+    reason, wait = controller.admit(1, user_id=10)
+
+    assert reason == "user_rate" and wait > 0
+    assert controller._bucket("gym", 1).tokens == pytest.approx(3, abs=0.01)
+    assert controller.stats(1) == {"user_rate": 1, "in_flight": 2}
@@ -0,0 +1,49 @@
+"""Write-behind audit queue bound."""
+
+from datetime import datetime
+
+import pytest
+
+from config import settings
+from services.audit import AuditWriter
+
+
+def _entries(count: int):
+    return [
+        {
+            "gym_id": 1,
+            "user_id": 1,
+            "entity": "session",
+            "entity_id": entity_id,
+            "field": "status",
+            "old_value": "scheduled",
+            "new_value": "completed",
+            "changed_at": datetime.utcnow(),
+        }
+        for entity_id in range(count)
+    ]
+
+
+@pytest.fixture
+def writer(monkeypatch):
+    monkeypatch.setattr(settings, "audit_queue_max_entries", 5)
+    return AuditWriter()
+
+
+def test_full_queue_drops_and_counts_new_entries(writer, caplog):
+    writer.enqueue(_entries(3))
+    with caplog.at_level("WARNING", logger="services.audit"):
+        writer.enqueue(_entries(4))
+        writer.enqueue(_entries(1))
+
+    assert writer.stats() == {"queued": 5, "max_queued": 5, "dropped": 3}
+    assert len(caplog.records) == 2
+
+
+def test_health_reports_the_queue(runner, client, gym_factory):
+    gym = gym_factory("audit-health")
+
+    response = runner.run(client.get("/health/audit", headers=gym.headers))
+
+    assert response.status_code == 200
+    assert set(response.json()) == {"queued", "max_queued", "dropped"}
@@ -0,0 +1,93 @@
+"""Branch switching and the chain dashboard for owners with several gyms."""
+
+
+def _request(runner, client, method, path, gym, **kwargs):
+    return runner.run(client.request(method, path, headers=gym.headers, **kwargs))
+
+
+def _add_branch(runner, client, gym, name):
+    response = _request(runner, client, "POST", "/gyms", gym, json={"name": name})
+    assert response.status_code == 201, response.text
+    return response.json()["id"]
+
+
+def test_switch_to_unlinked_gym_is_not_found(runner, client, gym_factory):
+    owner = gym_factory("owner")
+    other = gym_factory("other")
+
+    response = _request(
+        runner, client, "POST", f"/gyms/{other.ids['gym_id']}/switch", owner
+    )
+
+    assert response.status_code == 404
+
+
+def test_switch_token_acts_on_its_branch_only(runner, client, gym_factory):
+    owner = gym_factory("switching-owner")
+    branch_id = _add_branch(runner, client, owner, "Second Branch")
+
+    response = _request(runner, client, "POST", f"/gyms/{branch_id}/switch", owner)
+    assert response.status_code == 200, response.text
+    switched = type(owner)(
+        label="switched",
+        token=response.json()["access_token"],
+        owner_email=owner.owner_email,
+    )
+
+    me = _request(runner, client, "GET", "/auth/me", switched).json()
+    assert me["gym_id"] == branch_id
+    assert _request(runner, client, "GET", "/members", switched).json() == []
+    # The token issued before the switch still acts on the home branch.
+    me = _request(runner, client, "GET", "/auth/me", owner).json()
+    assert me["gym_id"] == owner.ids["gym_id"]
+    assert len(_request(runner, client, "GET", "/members", owner).json()) > 0
+
+
+def test_token_for_unlinked_gym_is_rejected(runner, client, gym_factory):
+    from services.auth import create_access_token
+
+    owner = gym_factory("forging-owner")
+    other = gym_factory("forged")
+    forged = type(owner)(
+        label="forged-token",
+        token=create_access_token(
+            {
+                "sub": str(owner.ids["owner_id"]),
+                "gym_id": str(other.ids["gym_id"]),
+                "role": "owner",
+            }
+        ),
+        owner_email=owner.owner_email,
+    )
+
+    response = _request(runner, client, "GET", "/members", forged)
+
+    assert response.status_code == 401
+
+
+def test_chain_totals_are_the_sum_of_branches(runner, client, gym_factory):
+    owner = gym_factory("chain-owner", members=6)
+    branch_id = _add_branch(runner, client, owner, "Chain Branch")
+    switched = type(owner)(
+        label="chain-branch",
+        token=_request(
+            runner, client, "POST", f"/gyms/{branch_id}/switch", owner
+        ).json()["access_token"],
+        owner_email=owner.owner_email,
+    )
+    created = _request(
+        runner, client, "POST", "/members", switched, json={"name": "Branch Member"}
+    )
+    assert created.status_code == 201, created.text
+
+    chain = _request(runner, client, "GET", "/dashboard/chain", owner).json()
+
+    assert {branch["gym_id"] for branch in chain["branches"]} == {
+        owner.ids["gym_id"],
+        branch_id,
+    }
+    for metric, total in chain["totals"].items():
+        assert total == sum(branch[metric] for branch in chain["branches"]), metric
+    by_gym = {branch["gym_id"]: branch for branch in chain["branches"]}
+    assert by_gym[branch_id]["active_members"] == 1
+    assert by_gym[owner.ids["gym_id"]]["active_members"] > 1
@@ -0,0 +1,48 @@
+"""Dashboard stats cache: results loaded across an invalidation are not kept."""
+
+from datetime import date
+
+import pytest
+
+
+@pytest.fixture
+def stats_cache(database):
+    from routers.dashboard import _stats_cache
+
+    _stats_cache.clear()
+    yield _stats_cache
+    _stats_cache.clear()
+
+
+def test_stats_are_cached(runner, gym_factory, stats_cache):
+    from routers.dashboard import _load_stats
+
+    gym = gym_factory("cached-stats")
+    today = date.today()
+
+    stats = runner.run(_load_stats(gym.ids["gym_id"], None, today))
+
+    assert stats_cache.get((gym.ids["gym_id"], today, None)) == stats
+
+
+def test_invalidation_during_load_is_not_undone(
+    runner, gym_factory, stats_cache, monkeypatch
+):
+    from routers import dashboard
+    from services.cache import registry
+
+    gym = gym_factory("raced-stats")
+    today = date.today()
+    open_session = dashboard.async_session_maker
+
+    def write_lands_mid_query():
+        # Another request commits and its invalidation arrives while the
+        # dashboard's queries are still running.
+        registry.invalidate(gym.ids["gym_id"], "member", None)
+        return open_session()
+
+    monkeypatch.setattr(dashboard, "async_session_maker", write_lands_mid_query)
+
+    runner.run(dashboard._load_stats(gym.ids["gym_id"], None, today))
+
+    assert stats_cache.get((gym.ids["gym_id"], today, None)) is None
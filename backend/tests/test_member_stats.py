@@ -0,0 +1,142 @@
+"""Denormalized member columns: refreshed with each write, repaired on drift."""
+
+from datetime import date, datetime, timedelta
+
+from tests.conftest import SeededGym
+
+
+def _stats(runner, member_id: int):
+    from sqlalchemy import text
+
+    from models.database import engine
+
+    async def run():
+        async with engine.connect() as conn:
+            row = await conn.execute(
+                text(
+                    "SELECT active_package_until, sessions_remaining, "
+                    "last_visit_at, next_session_at FROM members WHERE id = :id"
+                ),
+                {"id": member_id},
+            )
+            return tuple(row.one())
+
+    return runner.run(run())
+
+
+def _write(runner, client, gym: SeededGym, method: str, path: str, body: dict):
+    response = runner.run(client.request(method, path, json=body, headers=gym.headers))
+    assert response.status_code in (200, 201), response.text
+    return response.json()
+
+
+def test_writes_refresh_member_columns(runner, client, gym_factory):
+    gym = gym_factory("stats")
+    member = _write(runner, client, gym, "POST", "/members", {"name": "Counted"})
+    assert _stats(runner, member["id"]) == (None, 0, None, None)
+
+    payment = _write(
+        runner,
+        client,
+        gym,
+        "POST",
+        "/payments",
+        {
+            "member_id": member["id"],
+            "package_id": gym.ids["package_id"],
+            "price_paid": 650000,
+            "start_date": date.today().isoformat(),
+        },
+    )
+    assert _stats(runner, member["id"]) == (
+        date.fromisoformat(payment["expiry_date"]),
+        payment["sessions_total"],
+        None,
+        None,
+    )
+
+    starts = (datetime.now() + timedelta(days=1)).replace(microsecond=0)
+    session = _write(
+        runner,
+        client,
+        gym,
+        "POST",
+        "/sessions",
+        {
+            "member_id": member["id"],
+            "trainer_id": gym.ids["trainer_id"],
+            "member_package_id": payment["id"],
+            "scheduled_at": starts.isoformat(),
+        },
+    )
+    assert _stats(runner, member["id"])[3] == starts
+
+    visited = starts - timedelta(days=2)
+    _write(
+        runner,
+        client,
+        gym,
+        "PUT",
+        f"/sessions/{session['id']}",
+        {"scheduled_at": visited.isoformat(), "status": "completed"},
+    )
+    remaining = runner.run(
+        client.get(f"/payments/{payment['id']}", headers=gym.headers)
+    ).json()["sessions_remaining"]
+    assert _stats(runner, member["id"])[1:] == (remaining, visited, None)
+
+
+def test_rolled_back_write_leaves_columns_alone(runner, client, gym_factory):
+    from models.database import MemberPackage, async_session_maker
+
+    gym = gym_factory("rollback")
+    member = _write(runner, client, gym, "POST", "/members", {"name": "Untouched"})
+
+    async def add_and_roll_back():
+        async with async_session_maker() as db:
+            db.add(
+                MemberPackage(
+                    member_id=member["id"],
+                    package_id=gym.ids["package_id"],
+                    sessions_total=10,
+                    sessions_remaining=10,
+                    price_paid=0,
+                    start_date=date.today(),
+                    expiry_date=date.today() + timedelta(days=30),
+                )
+            )
+            await db.flush()
+            await db.rollback()
+
+    runner.run(add_and_roll_back())
+
+    assert _stats(runner, member["id"]) == (None, 0, None, None)
+
+
+def test_repair_drift_fixes_corrupted_rows(runner, gym_factory):
+    from sqlalchemy import text
+
+    from models.database import engine
+    from services.member_stats import repair_drift
+
+    gym = gym_factory("drift")
+    member_id = gym.ids["member_ids"][0]
+    runner.run(repair_drift())
+    expected = _stats(runner, member_id)
+
+    async def corrupt():
+        async with engine.begin() as conn:
+            await conn.execute(
+                text(
+                    "UPDATE members SET active_package_until = '1999-01-01', "
+                    "sessions_remaining = 999, last_visit_at = NULL, "
+                    "next_session_at = '2099-01-01' WHERE id = :id"
+                ),
+                {"id": member_id},
+            )
+
+    runner.run(corrupt())
+    assert _stats(runner, member_id) != expected
+
+    assert runner.run(repair_drift()) == 1
+    assert _stats(runner, member_id) == expected
@@ -0,0 +1,45 @@
+"""Member detail payload."""
+
+from datetime import date, datetime, timedelta
+
+
+def test_detail_rows_carry_their_member(runner, client, gym_factory):
+    gym = gym_factory("detail")
+    member_id = gym.ids["member_ids"][0]
+
+    def post(path, body):
+        response = runner.run(client.post(path, json=body, headers=gym.headers))
+        assert response.status_code == 201, response.text
+        return response.json()
+
+    payment = post(
+        "/payments",
+        {
+            "member_id": member_id,
+            "package_id": gym.ids["package_id"],
+            "price_paid": 650000,
+            "start_date": date.today().isoformat(),
+        },
+    )
+    post(
+        "/sessions",
+        {
+            "member_id": member_id,
+            "trainer_id": gym.ids["trainer_id"],
+            "member_package_id": payment["id"],
+            "scheduled_at": (datetime.now() + timedelta(days=1))
+            .replace(microsecond=0)
+            .isoformat(),
+        },
+    )
+
+    detail = runner.run(
+        client.get(f"/members/{member_id}/detail", headers=gym.headers)
+    ).json()
+    single = runner.run(
+        client.get(f"/payments/{payment['id']}", headers=gym.headers)
+    ).json()
+
+    assert detail["packages"] and detail["recent_sessions"]
+    for row in detail["packages"] + detail["recent_sessions"]:
+        assert row["member"] == single["member"]
@@ -0,0 +1,206 @@
+"""Reminder queue: deduplicated enqueue, per-gym send cap and retries."""
+
+import json
+from datetime import datetime, timedelta
+from typing import Dict, List
+
+import pytest
+
+from tests.conftest import SeededGym
+
+
+class RecordingSender:
+    def __init__(self, fail: bool = False):
+        self.fail = fail
+        self.sent: List = []
+
+    async def send(self, messages) -> Dict[int, str]:
+        self.sent.extend(messages)
+        if self.fail:
+            return {message.id: "smtp unavailable" for message in messages}
+        return {}
+
+
+def _sql(runner, statement: str, params: Dict = None):
+    from sqlalchemy import text
+
+    from models.database import engine
+
+    async def run():
+        async with engine.begin() as conn:
+            result = await conn.execute(text(statement), params or {})
+            return result.all() if result.returns_rows else None
+
+    return runner.run(run())
+
+
+def _member(runner, client, gym: SeededGym, name: str) -> int:
+    response = runner.run(
+        client.post(
+            "/members",
+            json={"name": name, "email": f"{name.lower()}@example.com"},
+            headers=gym.headers,
+        )
+    )
+    assert response.status_code == 201, response.text
+    return response.json()["id"]
+
+
+def _queue(runner, gym: SeededGym, member_id: int, count: int, first_ref: int):
+    _sql(
+        runner,
+        """
+        INSERT INTO notifications (
+            gym_id, member_id, kind, ref_id, channel, recipient, payload,
+            status, attempts, created_at
+        )
+        SELECT :gym_id, :member_id, 'package_expiring', ref, 'email',
+               'member@example.com', CAST(:payload AS json), 'pending', 0, :now
+        FROM generate_series(CAST(:first_ref AS int), CAST(:last_ref AS int)) AS ref
+        """,
+        {
+            "gym_id": gym.ids["gym_id"],
+            "member_id": member_id,
+            "payload": json.dumps(
+                {
+                    "member_name": "Member",
+                    "package_name": "PT 10",
+                    "expiry_date": "2026-01-01",
+                    "sessions_remaining": 3,
+                }
+            ),
+            "now": datetime.utcnow(),
+            "first_ref": first_ref,
+            "last_ref": first_ref + count - 1,
+        },
+    )
+
+
+@pytest.fixture
+def empty_queue(runner, database):
+    # Leave only what the test itself queues.
+    _sql(
+        runner,
+        "UPDATE notifications SET status = 'cancelled' "
+        "WHERE status IN ('pending', 'sending')",
+    )
+
+
+def test_enqueue_rerun_queues_nothing_new(runner, client, gym_factory, empty_queue):
+    from services.notifications import SESSION_UPCOMING, enqueue_reminders
+
+    gym = gym_factory("reminders")
+    member_id = _member(runner, client, gym, "Reminded")
+    starts = (datetime.now() + timedelta(hours=2)).replace(microsecond=0)
+    session = runner.run(
+        client.post(
+            "/sessions",
+            json={
+                "member_id": member_id,
+                "trainer_id": gym.ids["trainer_id"],
+                "scheduled_at": starts.isoformat(),
+                "duration_minutes": 50,
+            },
+            headers=gym.headers,
+        )
+    )
+    assert session.status_code == 201, session.text
+
+    first = runner.run(enqueue_reminders())
+    second = runner.run(enqueue_reminders())
+
+    assert first[SESSION_UPCOMING] >= 1
+    assert second == {kind: 0 for kind in first}
+    rows = _sql(
+        runner,
+        "SELECT count(*) FROM notifications WHERE kind = :kind AND ref_id = :ref",
+        {"kind": SESSION_UPCOMING, "ref": session.json()["id"]},
+    )
+    assert rows[0][0] == 1
+
+
+def test_send_batch_caps_each_gym(
+    runner, client, gym_factory, empty_queue, monkeypatch
+):
+    from config import settings
+    from services.notifications import send_batch
+
+    monkeypatch.setattr(settings, "notification_gym_per_minute", 12)
+    monkeypatch.setattr(settings, "notification_interval_seconds", 10)  # 2 a batch
+    busy = gym_factory("busy")
+    quiet = gym_factory("quiet")
+    _queue(runner, busy, _member(runner, client, busy, "Busy"), 7, 1_000_000)
+    _queue(runner, quiet, _member(runner, client, quiet, "Quiet"), 1, 1_000_000)
+    sender = RecordingSender()
+
+    sent = runner.run(send_batch(sender))
+
+    per_gym = {}
+    for message in sender.sent:
+        per_gym[message.gym_id] = per_gym.get(message.gym_id, 0) + 1
+    assert sent == 3
+    assert per_gym == {busy.ids["gym_id"]: 2, quiet.ids["gym_id"]: 1}
+    # The rest of the busy gym's backlog goes out in later batches.
+    assert runner.run(send_batch(sender)) == 2
+
+
+def test_failures_retry_then_fail(
+    runner, client, gym_factory, empty_queue, monkeypatch
+):
+    from config import settings
+    from services.notifications import send_batch
+
+    monkeypatch.setattr(settings, "notification_max_attempts", 2)
+    gym = gym_factory("flaky")
+    member_id = _member(runner, client, gym, "Flaky")
+    _queue(runner, gym, member_id, 1, 2_000_000)
+    failing = RecordingSender(fail=True)
+
+    def state():
+        return _sql(
+            runner,
+            "SELECT status, attempts, last_error FROM notifications "
+            "WHERE member_id = :member_id AND ref_id = 2000000",
+            {"member_id": member_id},
+        )[0]
+
+    assert runner.run(send_batch(failing)) == 0
+    assert tuple(state()) == ("pending", 1, "smtp unavailable")
+    assert runner.run(send_batch(failing)) == 0
+    assert tuple(state()) == ("failed", 2, "smtp unavailable")
+    assert runner.run(send_batch(failing)) == 0
+    assert len(failing.sent) == 2
+
+
+def test_abandoned_claims_stop_at_max_attempts(
+    runner, client, gym_factory, empty_queue, monkeypatch
+):
+    from config import settings
+    from services.notifications import send_batch
+
+    monkeypatch.setattr(settings, "notification_max_attempts", 2)
+    gym = gym_factory("crashing")
+    member_id = _member(runner, client, gym, "Crashing")
+    _queue(runner, gym, member_id, 2, 3_000_000)
+    stale = datetime.utcnow() - timedelta(
+        seconds=settings.notification_claim_timeout_seconds + 60
+    )
+    # A worker died mid-send: one row has an attempt left, one does not.
+    _sql(
+        runner,
+        "UPDATE notifications SET status = 'sending', claimed_at = :stale, "
+        "attempts = ref_id - 2999999 WHERE member_id = :member_id",
+        {"stale": stale, "member_id": member_id},
+    )
+    sender = RecordingSender()
+
+    assert runner.run(send_batch(sender)) == 1
+
+    rows = dict(
+        _sql(
+            runner,
+            "SELECT ref_id, status FROM notifications WHERE member_id = :member_id",
+            {"member_id": member_id},
+        )
+    )
+    assert rows == {3_000_000: "sent", 3_000_001: "failed"}
@@ -0,0 +1,64 @@
+"""Payment list paging."""
+
+import pytest
+
+
+@pytest.mark.parametrize(
+    "sort, order",
+    [
+        ("created_at", "desc"),
+        ("expiry_date", "asc"),
+        ("price_paid", "desc"),
+        ("member_name", "asc"),
+    ],
+)
+def test_pages_cover_the_full_list(runner, client, gym_factory, sort, order):
+    gym = gym_factory("paging", members=6)
+    params = {"sort": sort, "order": order}
+    everything = runner.run(client.get("/payments", params=params, headers=gym.headers))
+    assert everything.status_code == 200
+    assert "X-Next-Cursor" not in everything.headers
+
+    paged, cursor = [], None
+    while True:
+        page = runner.run(
+            client.get(
+                "/payments",
+                params={**params, "limit": 3, **({"cursor": cursor} if cursor else {})},
+                headers=gym.headers,
+            )
+        )
+        assert page.status_code == 200
+        assert len(page.json()) <= 3
+        paged.extend(row["id"] for row in page.json())
+        cursor = page.headers.get("X-Next-Cursor")
+        if cursor is None:
+            break
+
+    assert len(everything.json()) > 3
+    assert paged == [row["id"] for row in everything.json()]
+
+
+def test_columnar_pages_carry_the_cursor(runner, client, gym_factory):
+    gym = gym_factory("paging-columnar", members=6)
+    page = runner.run(
+        client.get(
+            "/payments",
+            params={"format": "columnar", "limit": 2},
+            headers=gym.headers,
+        )
+    )
+    assert page.status_code == 200
+    assert page.headers["X-Next-Cursor"]
+
+
+def test_invalid_cursor_is_rejected(runner, client, gym_factory):
+    gym = gym_factory("paging-invalid")
+    response = runner.run(
+        client.get(
+            "/payments",
+            params={"sort": "price_paid", "cursor": "cheap_1", "limit": 2},
+            headers=gym.headers,
+        )
+    )
+    assert response.status_code == 400
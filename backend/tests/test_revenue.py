@@ -0,0 +1,77 @@
+"""Daily deferred revenue snapshots."""
+
+from datetime import date
+
+
+def _snapshot(runner, gym_id: int, day: date):
+    from sqlalchemy import text
+
+    from models.database import engine
+
+    async def run():
+        async with engine.connect() as conn:
+            rows = await conn.execute(
+                text(
+                    "SELECT liability, sessions_remaining, packages "
+                    "FROM deferred_revenue_snapshots "
+                    "WHERE gym_id = :gym_id AND snapshot_date = :day"
+                ),
+                {"gym_id": gym_id, "day": day},
+            )
+            return [tuple(row) for row in rows]
+
+    return runner.run(run())
+
+
+def test_rerun_after_packages_are_used_up_zeroes_the_day(runner, client, gym_factory):
+    from sqlalchemy import text
+
+    from models.database import engine
+    from services.revenue import take_snapshot
+
+    gym = gym_factory("liability")
+    today = date.today()
+    payment = runner.run(
+        client.post(
+            "/payments",
+            json={
+                "member_id": gym.ids["member_ids"][0],
+                "package_id": gym.ids["package_id"],
+                "price_paid": 650000,
+                "start_date": today.isoformat(),
+            },
+            headers=gym.headers,
+        )
+    )
+    assert payment.status_code == 201, payment.text
+
+    runner.run(take_snapshot(today))
+    [(liability, sessions_remaining, packages)] = _snapshot(
+        runner, gym.ids["gym_id"], today
+    )
+    assert liability > 0 and sessions_remaining > 0 and packages > 0
+
+    async def use_everything():
+        async with engine.begin() as conn:
+            await conn.execute(
+                text(
+                    "UPDATE member_packages mp SET sessions_remaining = 0 "
+                    "FROM members m WHERE m.id = mp.member_id AND m.gym_id = :gym_id"
+                ),
+                {"gym_id": gym.ids["gym_id"]},
+            )
+
+    runner.run(use_everything())
+    runner.run(take_snapshot(today))
+
+    assert _snapshot(runner, gym.ids["gym_id"], today) == [(0, 0, 0)]
+
+
+def test_gym_without_packages_gets_a_zero_row(runner, gym_factory):
+    from services.revenue import take_snapshot
+
+    gym = gym_factory("no-liability", members=0)
+
+    runner.run(take_snapshot(date.today()))
+
+    assert _snapshot(runner, gym.ids["gym_id"], date.today()) == [(0, 0, 0)]
@@ -0,0 +1,397 @@
+"""SQL statement budgets per endpoint.
+
+Every route is called for a small and a large seeded gym. The number of SQL
+statements must be identical for both (anything else means per-row queries,
+i.e. an N+1) and must stay within the route's declared budget. New routes
+fail ``test_every_route_has_a_budget`` until they are added to ENDPOINTS.
+"""
+
+import random
+from datetime import date, datetime, time, timedelta
+from typing import Any, Callable, Dict, List, NamedTuple, Optional
+
+import pytest
+
+from tests.conftest import SeededGym
+
+TODAY = date.today()
+WEEK_AGO = (TODAY - timedelta(days=7)).isoformat()
+NEXT_WEEK = (TODAY + timedelta(days=7)).isoformat()
+# Routes served by FastAPI itself.
+EXEMPT = {"/openapi.json", "/docs", "/docs/oauth2-redirect", "/redoc"}
+
+Ids = Dict[str, Any]
+
+
+class Case(NamedTuple):
+    method: str
+    path: str
+    budget: int
+    json: Optional[Callable[[Ids], Any]] = None
+    params: Optional[Dict[str, Any]] = None
+    files: Optional[Dict[str, Any]] = None
+    authenticated: bool = True
+    spare: bool = False  # use the fixture's spare_* rows for path ids
+
+
+STATEMENT_CSV = "date,amount,name\n{today},650000,김민준\n".format(today=TODAY)
+
+ENDPOINTS: List[Case] = [
+    Case("GET", "/health", 0, authenticated=False),
+    Case("GET", "/health/admission", 1),
+    Case("GET", "/health/audit", 1),
+    Case("GET", "/health/connections", 1),
+    Case(
+        "POST",
+        "/auth/register",
+        5,
+        json=lambda ids: {
+            "email": f"budget-owner-{ids['label']}@example.com",
+            "password": "password123",
+            "name": "Budget Owner",
+            "gym_name": "Budget Gym",
+        },
+        authenticated=False,
+    ),
+    Case(
+        "POST",
+        "/auth/login",
+        1,
+        json=lambda ids: {"email": ids["owner_email"], "password": "password123"},
+        authenticated=False,
+    ),
+    Case("GET", "/auth/me", 1),
+    Case("GET", "/members", 4),
+    Case("GET", "/members", 4, params={"format": "columnar"}),
+    Case(
+        "GET",
+        "/members",
+        4,
+        params={"has_active_package": "true", "sort": "last_visit", "order": "desc"},
+    ),
+    Case(
+        "POST",
+        "/members",
+        7,
+        json=lambda ids: {
+            "name": "Budget Member",
+            "trainer_id": ids["trainer_id"],
+            "goals": ["재활"],
+        },
+    ),
+    Case("GET", "/members/{member_id}", 4),
+    Case("PUT", "/members/{member_id}", 9, json=lambda ids: {"notes": "budget"}),
+    Case("GET", "/members/{member_id}/sessions", 5),
+    Case(
+        "GET",
+        "/members/{member_id}/sessions",
+        6,
+        params={"include_archived": "true", "limit": 5},
+    ),
+    Case("GET", "/members/{member_id}/packages", 5),
+    Case("GET", "/members/{member_id}/detail", 7),
+    Case("GET", "/sessions", 4),
+    Case("GET", "/sessions", 4, params={"date": TODAY.isoformat()}),
+    Case("GET", "/sessions/calendar", 2, params={"from": WEEK_AGO, "to": NEXT_WEEK}),
+    Case(
+        "POST",
+        "/sessions",
+        10,
+        json=lambda ids: {
+            "member_id": ids["member_id"],
+            "trainer_id": ids["trainer_id"],
+            "member_package_id": ids["spare_payment_id"],
+            "scheduled_at": datetime.combine(
+                TODAY + timedelta(days=2), time(11)
+            ).isoformat(),
+        },
+    ),
+    Case("PUT", "/sessions/{session_id}", 13, json=lambda ids: {"status": "completed"}),
+    Case(
+        "PATCH",
+        "/sessions/bulk",
+        7,
+        json=lambda ids: {
+            "updates": [
+                {"id": ids["session_id"], "status": "no_show"},
+                {"id": ids["spare_session_id"], "status": "completed"},
+            ]
+        },
+    ),
+    Case("GET", "/payments", 3),
+    Case("GET", "/payments", 3, params={"format": "columnar"}),
+    Case(
+        "GET",
+        "/payments",
+        3,
+        params={
+            "payment_status": ["pending", "overdue"],
+            "expiry_from": TODAY.isoformat(),
+            "sort": "member_name",
+            "order": "asc",
+        },
+    ),
+    Case("GET", "/payments", 3, params={"limit": 2}),
+    Case(
+        "GET",
+        "/payments",
+        3,
+        params={"sort": "expiry_date", "cursor": "2026-01-01_1", "limit": 2},
+    ),
+    Case(
+        "POST",
+        "/payments",
+        9,
+        json=lambda ids: {
+            "member_id": ids["member_id"],
+            "package_id": ids["package_id"],
+            "price_paid": 650000,
+            "start_date": TODAY.isoformat(),
+        },
+    ),
+    Case(
+        "POST",
+        "/payments/reconcile",
+        2,
+        params={"dry_run": "true"},
+        files={"statement": ("statement.csv", STATEMENT_CSV.encode(), "text/csv")},
+    ),
+    Case("GET", "/payments/deferred-revenue", 2),
+    Case("GET", "/payments/deferred-revenue/history", 2),
+    Case("GET", "/payments/{payment_id}", 3),
+    Case("PUT", "/payments/{payment_id}", 7, json=lambda ids: {"notes": "budget"}),
+    Case("GET", "/packages", 2),
+    Case(
+        "POST",
+        "/packages",
+        4,
+        json=lambda ids: {"name": "Budget", "total_sessions": 10, "price": 100000},
+    ),
+    Case(
+        "PUT", "/packages/{package_id}", 5, json=lambda ids: {"description": "budget"}
+    ),
+    Case("GET", "/dashboard", 5),
+    Case("GET", "/dashboard/chain", 6),
+    Case("GET", "/dashboard/today", 4),
+    Case("GET", "/dashboard/expiring", 2),
+    Case("GET", "/dashboard/retention", 5),
+    Case("GET", "/trainers", 2),
+    Case("GET", "/trainers/report", 2, params={"from": WEEK_AGO, "to": NEXT_WEEK}),
+    Case(
+        "POST",
+        "/trainers",
+        5,
+        json=lambda ids: {
+            "name": "Budget Trainer",
+            "email": f"budget-trainer-{ids['label']}@example.com",
+            "password": "password123",
+        },
+    ),
+    Case("PUT", "/trainers/{trainer_id}", 5, json=lambda ids: {"phone": "010-0000"}),
+    Case("GET", "/trainers/{trainer_id}/working-hours", 3),
+    Case(
+        "PUT",
+        "/trainers/{trainer_id}/working-hours",
+        4,
+        json=lambda ids: [
+            {"weekday": day, "start_time": "09:00", "end_time": "18:00"}
+            for day in range(5)
+        ],
+    ),
+    Case(
+        "GET",
+        "/trainers/{trainer_id}/availability",
+        4,
+        params={"from": TODAY.isoformat(), "to": NEXT_WEEK},
+    ),
+    Case("GET", "/audit", 2),
+    Case("GET", "/debug/traces", 1),
+    Case("GET", "/gyms", 2),
+    Case(
+        "POST",
+        "/gyms",
+        5,
+        json=lambda ids: {"name": f"Budget Branch {ids['label']}"},
+    ),
+    # Switches to the gym the owner is already in, so later cases are unaffected.
+    Case("POST", "/gyms/{gym_id}/switch", 3),
+    # Deletes last, on rows created for them by the fixture.
+    Case("DELETE", "/sessions/{session_id}", 8, spare=True),
+    Case("DELETE", "/payments/{payment_id}", 7, spare=True),
+    Case("DELETE", "/members/{member_id}", 4, spare=True),
+    Case("DELETE", "/packages/{package_id}", 4, spare=True),
+    Case("DELETE", "/trainers/{trainer_id}", 4, spare=True),
+]
+
+
+def _pick_member(rows, fewest_sessions: bool) -> int:
+    # Only members with a trainer, so the small gym does not skip the loads
+    # that the large one has to do.
+    with_trainer = {member[0] for member in rows["members"] if member[2] is not None}
+    counts: Dict[int, int] = {}
+    for session in rows["sessions"]:
+        if session[1] not in with_trainer:
+            continue
+        counts[session[1]] = counts.get(session[1], 0) + 1
+    pick = min if fewest_sessions else max
+    return pick(counts, key=lambda member_id: (counts[member_id], member_id))
+
+
+async def _seed(client) -> List[SeededGym]:
+    import asyncpg
+
+    from scripts.seed_synthetic import (
+        PASSWORD_HASH,
+        GymGenerator,
+        Preset,
+        asyncpg_dsn,
+        copy_gym,
+        current_ids,
+        finish_load,
+    )
+    from services.auth import create_access_token
+    from services.member_stats import repair_drift
+
+    sizes = [("small", 4), ("large", 40)]
+    rng = random.Random(43)
+    gyms = []
+    conn = await asyncpg.connect(asyncpg_dsn())
+    try:
+        ids = await current_ids(conn)
+        for label, members in sizes:
+            preset = Preset(
+                gyms=1, trainers_per_gym=3, members_per_gym=members, months=4
+            )
+            rows = GymGenerator(rng, ids, preset, TODAY, PASSWORD_HASH).generate()
+            await copy_gym(conn, rows)
+            gym_id = rows["gyms"][0][0]
+            owner = rows["users"][0]
+            member_id = _pick_member(rows, fewest_sessions=label == "small")
+            gyms.append(
+                SeededGym(
+                    label=label,
+                    owner_email=owner[2],
+                    token=create_access_token(
+                        {"sub": str(owner[0]), "gym_id": str(gym_id), "role": "owner"}
+                    ),
+                    ids={
+                        "label": label,
+                        "owner_email": owner[2],
+                        "gym_id": gym_id,
+                        "trainer_id": rows["users"][1][0],
+                        "package_id": rows["packages"][0][0],
+                        "member_id": member_id,
+                        "payment_id": max(
+                            mp[0]
+                            for mp in rows["member_packages"]
+                            if mp[1] == member_id
+                        ),
+                    },
+                )
+            )
+        await finish_load(conn)
+    finally:
+        await conn.close()
+    await repair_drift()
+
+    for gym in gyms:
+        await _create_spares(client, gym)
+    return gyms
+
+
+async def _create_spares(client, gym: SeededGym) -> None:
+    """Create the rows that the write and delete cases operate on."""
+    headers = {"Authorization": f"Bearer {gym.token}"}
+    ids = gym.ids
+
+    async def post(path: str, body: Dict[str, Any]) -> int:
+        response = await client.post(path, json=body, headers=headers)
+        assert response.status_code == 201, response.text
+        return response.json()["id"]
+
+    ids["spare_member_id"] = await post("/members", {"name": "Spare Member"})
+    ids["spare_package_id"] = await post(
+        "/packages", {"name": "Spare", "total_sessions": 5, "price": 50000}
+    )
+    ids["spare_payment_id"] = await post(
+        "/payments",
+        {
+            "member_id": ids["member_id"],
+            "package_id": ids["package_id"],
+            "price_paid": 650000,
+            "start_date": TODAY.isoformat(),
+        },
+    )
+    session = {
+        "member_id": ids["member_id"],
+        "trainer_id": ids["trainer_id"],
+        "member_package_id": ids["spare_payment_id"],
+        "scheduled_at": datetime.combine(TODAY, time(20)).isoformat(),
+    }
+    ids["session_id"] = await post("/sessions", session)
+    ids["spare_session_id"] = await post("/sessions", session)
+    ids["spare_trainer_id"] = await post(
+        "/trainers",
+        {
+            "name": "Spare Trainer",
+            "email": f"spare-trainer-{ids['label']}@example.com",
+            "password": "password123",
+        },
+    )
+
+
+def _spare_ids(ids: Ids) -> Ids:
+    return {
+        key.removeprefix("spare_"): value
+        for key, value in ids.items()
+        if key.startswith("spare_")
+    }
+
+
+@pytest.fixture(scope="module")
+def seeded_gyms(runner, client) -> List[SeededGym]:
+    return runner.run(_seed(client))
+
+
+def test_every_route_has_a_budget():
+    from main import app
+
+    routes = {
+        (method, route.path)
+        for route in app.routes
+        if route.path not in EXEMPT
+        for method in getattr(route, "methods", ()) - {"HEAD"}
+    }
+    budgeted = {(case.method, case.path) for case in ENDPOINTS}
+    assert routes - budgeted == set(), "declare a statement budget in ENDPOINTS"
+    assert budgeted - routes == set(), "ENDPOINTS lists routes that no longer exist"
+
+
+@pytest.mark.parametrize(
+    "case",
+    ENDPOINTS,
+    ids=[
+        f"{case.method} {case.path}{'?' + '&'.join(case.params) if case.params else ''}"
+        for case in ENDPOINTS
+    ],
+)
+def test_statement_budget(case: Case, seeded_gyms, measure):
+    counts = {}
+    for gym in seeded_gyms:
+        response, statements = measure(
+            case.method,
+            case.path.format(**(_spare_ids(gym.ids) if case.spare else gym.ids)),
+            gym.token if case.authenticated else None,
+            json=case.json(gym.ids) if case.json else None,
+            params=case.params,
+            files=case.files,
+        )
+        assert response.status_code < 400, response.text
+        counts[gym.label] = statements
+
+    assert (
+        counts["small"] == counts["large"]
+    ), f"statement count grows with data size: {counts}"
+    assert (
+        counts["large"] <= case.budget
+    ), f"{counts['large']} statements, budget is {case.budget}"
@@ -0,0 +1,102 @@
+"""Request tracing: trace IDs on every response, spans on sampled ones."""
+
+from datetime import datetime
+
+from services.tracing import TRACE_HEADER, trace_buffer
+
+
+def test_every_response_carries_a_trace_id(runner, client, gym_factory):
+    gym = gym_factory("trace-header")
+
+    fresh = runner.run(client.get("/members", headers=gym.headers))
+    reused = runner.run(
+        client.get(
+            "/members", headers={**gym.headers, TRACE_HEADER: "upstream-trace-1"}
+        )
+    )
+
+    assert len(fresh.headers[TRACE_HEADER]) == 32
+    assert reused.headers[TRACE_HEADER] == "upstream-trace-1"
+
+
+def test_sampled_request_records_its_spans(runner, client, gym_factory, monkeypatch):
+    from config import settings
+
+    monkeypatch.setattr(settings, "trace_sample_rate", 1.0)
+    gym = gym_factory("trace-spans")
+
+    response = runner.run(client.get("/members", headers=gym.headers))
+
+    assert response.status_code == 200
+    [trace] = trace_buffer.recent(gym.ids["gym_id"], 1)
+    assert trace.trace_id == response.headers[TRACE_HEADER]
+    assert trace.route == "/members"
+    assert trace.status_code == 200
+    names = [span.name for span in trace.spans]
+    assert {"auth.verify_token", "auth.load_user", "handler", "serialize"} <= set(names)
+    statements = [span for span in trace.spans if span.name == "sql"]
+    assert statements and all(span.detail for span in statements)
+    assert names.index("serialize") > names.index("handler")
+
+
+def test_failed_statement_leaves_nothing_behind(runner, database):
+    from sqlalchemy import text
+    from sqlalchemy.exc import DBAPIError
+
+    from models.database import engine
+    from services.tracing import Trace, _current
+
+    async def run():
+        trace = Trace("statement-test", "GET", "/", datetime.utcnow())
+        token = _current.set(trace)
+        try:
+            async with engine.connect() as conn:
+                try:
+                    await conn.execute(text("SELECT * FROM no_such_table"))
+                except DBAPIError:
+                    await conn.rollback()
+                await conn.execute(text("SELECT 1"))
+                leftovers = [key for key in conn.info if key.startswith("trace")]
+        finally:
+            _current.reset(token)
+        return trace, leftovers
+
+    trace, leftovers = runner.run(run())
+
+    # Pooled connections outlive requests, so nothing may pile up on them.
+    assert leftovers == []
+    assert [span.detail for span in trace.spans] == ["SELECT 1"]
+
+
+def test_sampled_traces_are_appended_to_the_file(
+    runner, client, gym_factory, monkeypatch, tmp_path
+):
+    from config import settings
+
+    sink = tmp_path / "traces.jsonl"
+    monkeypatch.setattr(settings, "trace_sample_rate", 1.0)
+    monkeypatch.setattr(settings, "trace_file_path", str(sink))
+    gym = gym_factory("trace-file")
+
+    response = runner.run(client.get("/members", headers=gym.headers))
+    runner.run(trace_buffer.drain())
+
+    assert response.headers[TRACE_HEADER] in sink.read_text(encoding="utf-8")
+
+
+def test_failed_trace_writes_are_logged(
+    runner, client, gym_factory, monkeypatch, tmp_path, caplog
+):
+    from config import settings
+
+    monkeypatch.setattr(settings, "trace_sample_rate", 1.0)
+    monkeypatch.setattr(settings, "trace_file_path", str(tmp_path / "missing" / "t"))
+    gym = gym_factory("trace-file-error")
+
+    with caplog.at_level("ERROR", logger="services.tracing"):
+        response = runner.run(client.get("/members", headers=gym.headers))
+        runner.run(trace_buffer.drain())
+
+    assert response.status_code == 200
+    [record] = caplog.records
+    assert record.exc_info[0] is FileNotFoundError
@@ -49,15 +49,23 @@ const paymentStatusConfig: Record<
 export default function PaymentsPage() {
   const [statusFilter, setStatusFilter] = useState("all");
 
-  const { data: allPayments, isLoading } = useQuery<MemberPackage[]>({
-    queryKey: ["payments"],
-    queryFn: () => paymentsApi.getAll().then((r) => r.data),
+  // The status filter runs on the server, so the outstanding view only
+  // loads outstanding rows.
+  const { data: payments, isLoading } = useQuery<MemberPackage[]>({
+    queryKey: ["payments", statusFilter],
+    queryFn: () =>
+      paymentsApi
+        .getAll(statusFilter === "all" ? undefined : statusFilter)
+        .then((r) => r.data),
   });
 
-  const payments =
-    statusFilter === "all"
-      ? allPayments
-      : allPayments?.filter((p) => p.payment_status === statusFilter);
+  const { data: unpaidPayments, isLoading: unpaidLoading } = useQuery<
+    MemberPackage[]
+  >({
+    queryKey: ["payments", "unpaid"],
+    queryFn: () =>
+      paymentsApi.getAll(["pending", "overdue"]).then((r) => r.data),
+  });
 
   const now = new Date();
   const monthStart = startOfMonth(now);
@@ -71,8 +79,7 @@ export default function PaymentsPage() {
       })
       .reduce((sum, p) => sum + p.price_paid, 0) ?? 0;
 
-  const unpaidCount =
-    allPayments?.filter((p) => p.payment_status !== "paid").length ?? 0;
+  const unpaidCount = unpaidPayments?.length ?? 0;
 
   return (
     <div className="space-y-6">
@@ -93,7 +100,7 @@ export default function PaymentsPage() {
         <Card className="shadow-sm">
           <CardContent className="pt-6">
             <p className="text-sm text-slate-500 font-medium">미결제 건수</p>
-            {isLoading ? (
+            {unpaidLoading ? (
               <Skeleton className="h-8 w-16 mt-1" />
             ) : (
               <p className="text-3xl font-bold text-red-600 mt-1">
@@ -58,9 +58,11 @@ export const sessionsApi = {
 };
 
 export const paymentsApi = {
-  getAll: (status?: string) =>
+  getAll: (status?: string | string[]) =>
     api.get<MemberPackage[]>("/payments", {
       params: status ? { payment_status: status } : undefined,
+      // Repeat the key (?payment_status=a&payment_status=b), as FastAPI expects.
+      paramsSerializer: { indexes: null },
     }),
   getByMember: (memberId: string) =>
     api.get<MemberPackage[]>(`/members/${memberId}/packages`),